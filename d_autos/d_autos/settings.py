@@ -46,21 +46,72 @@ INSTALLED_APPS = [
 # Custom User Model
 AUTH_USER_MODEL = 'd_autos_app.User'
 
+# Cache: 'locmem' (private to each process), 'database' (run
+# `manage.py createcachetable` once), 'redis' or 'memcached' (at
+# CACHE_LOCATION). Cached sessions, users, dashboard tables and chart
+# versions are only trusted when every process serving requests sees the
+# same cache: a write handled by one gunicorn worker must invalidate what
+# the others have cached. A locmem cache is never treated as shared, not
+# even with DEBUG on: gunicorn runs several workers whatever DEBUG says.
+CACHE_PROFILES = {
+    'locmem': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'database': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'd_autos_cache',
+    },
+    'redis': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.getenv('CACHE_LOCATION', 'redis://127.0.0.1:6379'),
+    },
+    'memcached': {
+        'BACKEND': 'django.core.cache.backends.memcached.PyMemcacheCache',
+        'LOCATION': os.getenv('CACHE_LOCATION', '127.0.0.1:11211'),
+    },
+}
+CACHE_PROFILE = os.getenv('CACHE_PROFILE', 'locmem')
+CACHES = {'default': CACHE_PROFILES[CACHE_PROFILE]}
+SHARED_CACHE = CACHE_PROFILE != 'locmem'
+
 # Authentication settings
+# request.user (and its employee profile) comes from the cache when the
+# cache is shared (SHARED_CACHE), else from one query per request
+AUTHENTICATION_BACKENDS = ['d_autos_app.principals.CachedModelBackend']
 LOGIN_URL = '/login/'
 LOGIN_REDIRECT_URL = '/dashboard/'
 LOGOUT_REDIRECT_URL = '/login/'
 
 # Session settings
 SESSION_COOKIE_AGE = 86400  # 24 hours in seconds
-SESSION_SAVE_EVERY_REQUEST = True
+
+# Where sessions live: 'db', 'cached_db' (cache in front of the db, no
+# query to read a session) or 'signed_cookies' (no server-side storage;
+# a logout cannot revoke a copied cookie). 'cached_db' is only the default
+# with a shared cache: otherwise a logout in one worker leaves the session
+# cached, and valid, in the others.
+SESSION_MODES = {
+    'db': 'django.contrib.sessions.backends.db',
+    'cached_db': 'django.contrib.sessions.backends.cached_db',
+    'signed_cookies': 'django.contrib.sessions.backends.signed_cookies',
+}
+SESSION_MODE = os.getenv('SESSION_MODE', 'cached_db' if SHARED_CACHE else 'db')
+SESSION_ENGINE = SESSION_MODES[SESSION_MODE]
+
+# Instead of saving every session on every request, SessionRefreshMiddleware
+# slides the 24-hour expiry forward at most once per this many seconds
+# (0: every request, like SESSION_SAVE_EVERY_REQUEST).
+SESSION_SAVE_EVERY_REQUEST = False
+SESSION_REFRESH_INTERVAL = int(os.getenv('SESSION_REFRESH_INTERVAL', '300'))
 
 
 
 MIDDLEWARE = [
+    'd_autos_app.middleware.ProfilingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     "whitenoise.middleware.WhiteNoiseMiddleware",
     'django.contrib.sessions.middleware.SessionMiddleware',
+    'd_autos_app.middleware.SessionRefreshMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
@@ -69,11 +120,45 @@ MIDDLEWARE = [
     'd_autos_app.middleware.UserTypeMiddleware',
 ]
 
+# Request profiling (ProfilingMiddleware): off unless PROFILING=True.
+# Measures this share of requests, adds a Server-Timing header to them and
+# logs those slower than PROFILING_SLOW_REQUEST_MS to PROFILING_SLOW_LOG.
+PROFILING_ENABLED = os.getenv('PROFILING', 'False') == 'True'
+PROFILING_SAMPLE_RATE = float(os.getenv('PROFILING_SAMPLE_RATE', '0.1'))
+PROFILING_SLOW_REQUEST_MS = int(os.getenv('PROFILING_SLOW_REQUEST_MS', '500'))
+PROFILING_SLOW_QUERIES = 5
+PROFILING_SLOW_LOG = os.getenv('PROFILING_SLOW_LOG', BASE_DIR / 'slow_requests.log')
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'message': {'format': '%(message)s'},
+    },
+    'handlers': {
+        'slow_requests': {
+            'class': 'logging.FileHandler',
+            'filename': PROFILING_SLOW_LOG,
+            'formatter': 'message',
+            'delay': True,  # no file until something is slow
+        },
+    },
+    'loggers': {
+        # One JSON object per line
+        'd_autos_app.slow_requests': {
+            'handlers': ['slow_requests'],
+            'level': 'WARNING',
+            'propagate': False,
+        },
+    },
+}
+
 ROOT_URLCONF = 'd_autos.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # DjangoTemplates, plus render timing for ProfilingMiddleware
+        'BACKEND': 'd_autos_app.profiling.ProfilingDjangoTemplates',
         'DIRS': [BASE_DIR / 'templates'],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -92,11 +177,57 @@ WSGI_APPLICATION = 'd_autos.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/6.0/ref/settings/#databases
 
-DATABASES = {
-    'default': {
+# DB_PROFILE picks the database: 'sqlite' (db.sqlite3) or 'postgresql'
+# (DB_NAME, DB_USER, DB_PASSWORD, DB_HOST, DB_PORT). Either way a
+# connection is kept for DB_CONN_MAX_AGE seconds, and checked before it is
+# reused, rather than opened for every request. DB_POOL=True puts
+# PostgreSQL connections in psycopg's pool instead (needs psycopg[pool];
+# Django does not combine a pool with persistent connections).
+DB_PROFILE = os.getenv('DB_PROFILE', 'sqlite')
+DB_CONN_MAX_AGE = int(os.getenv('DB_CONN_MAX_AGE', '600'))
+DB_POOL = os.getenv('DB_POOL', 'False') == 'True'
+
+DATABASE_PROFILES = {
+    'sqlite': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
-    }
+        'CONN_MAX_AGE': DB_CONN_MAX_AGE,
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            # Take the write lock at BEGIN, waiting up to busy_timeout for it;
+            # a deferred transaction that reads first fails straight away
+            # with "database is locked" when another connection is writing
+            'transaction_mode': 'IMMEDIATE',
+        },
+        'TEST': {
+            # A real file rather than shared-cache memory, so that tests with
+            # concurrent connections see SQLite's normal locking behaviour
+            'NAME': BASE_DIR / 'test_db.sqlite3',
+        },
+    },
+    'postgresql': {
+        'ENGINE': 'django.db.backends.postgresql',
+        'NAME': os.getenv('DB_NAME', 'd_autos'),
+        'USER': os.getenv('DB_USER', ''),
+        'PASSWORD': os.getenv('DB_PASSWORD', ''),
+        'HOST': os.getenv('DB_HOST', ''),
+        'PORT': os.getenv('DB_PORT', ''),
+        'CONN_MAX_AGE': 0 if DB_POOL else DB_CONN_MAX_AGE,
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {'pool': True} if DB_POOL else {},
+    },
+}
+DATABASES = {'default': DATABASE_PROFILES[DB_PROFILE]}
+
+# Run on every new SQLite connection (signals.py). WAL lets readers carry on
+# while one connection writes, and with it synchronous=NORMAL is safe (a
+# power cut can lose the last commits, never corrupt the file).
+SQLITE_PRAGMAS = {
+    'journal_mode': 'wal',
+    'synchronous': 'normal',
+    'busy_timeout': 5000,  # ms to wait for a lock before "database is locked"
+    'mmap_size': 128 * 1024 * 1024,
+    'cache_size': -32000,  # negative: KiB rather than pages
 }
 
 
@@ -1,7 +1,7 @@
 from django.contrib import admin
 from .models import (
     Customer, Employee, Car,
-    Rental, Payment, Reservation, Maintenance
+    Rental, Payment, Reservation, Maintenance, EquipmentRate, RevenueCube, CustomerLedger
 )
 
 @admin.register(Customer)
@@ -15,6 +15,7 @@ class EmployeeAdmin(admin.ModelAdmin):
     list_display = ('employee_id', 'get_full_name', 'role', 'department', 'hire_date')
     search_fields = ('employee_id', 'user__first_name', 'user__last_name', 'user__email')
     list_filter = ('role', 'department', 'hire_date')
+    list_select_related = ('user',)
     
     def get_full_name(self, obj):
         return obj.user.full_name
@@ -34,9 +35,15 @@ class RentalAdmin(admin.ModelAdmin):
     list_filter = ('rental_date',)
 
 
+@admin.register(EquipmentRate)
+class EquipmentRateAdmin(admin.ModelAdmin):
+    list_display = ('equipment', 'daily_rate', 'updated_at')
+
+
 @admin.register(Payment)
 class PaymentAdmin(admin.ModelAdmin):
     list_display = ('rental', 'amount', 'payment_status', 'payment_date')
+    list_select_related = ('rental__customer', 'rental__car')
 
 
 @admin.register(Reservation)
@@ -47,3 +54,16 @@ class ReservationAdmin(admin.ModelAdmin):
 @admin.register(Maintenance)
 class MaintenanceAdmin(admin.ModelAdmin):
     list_display = ('car', 'employee', 'scheduled_date', 'cost')
+    list_select_related = ('car', 'employee__user')
+
+
+@admin.register(RevenueCube)
+class RevenueCubeAdmin(admin.ModelAdmin):
+    list_display = ('period', 'bucket', 'dimension', 'key', 'total', 'payments')
+    list_filter = ('period', 'dimension')
+
+
+@admin.register(CustomerLedger)
+class CustomerLedgerAdmin(admin.ModelAdmin):
+    list_display = ('customer', 'charged', 'deposits', 'paid', 'balance', 'updated_at')
+    list_select_related = ('customer',)
@@ -0,0 +1,192 @@
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import CharField, Count, F, Sum, Value
+from django.db.models.functions import Cast, Coalesce, TruncDay, TruncMonth, TruncWeek
+from django.utils import timezone
+
+from .models import Car, DashboardStats, Employee, Payment, Rental, RevenueCube
+from .stats import get_dashboard_stats
+
+PERIODS = [period for period, label in RevenueCube.PERIOD_CHOICES]
+DIMENSIONS = [dimension for dimension, label in RevenueCube.DIMENSION_CHOICES]
+
+PERIOD_TRUNCS = {
+    'day': TruncDay,
+    'week': TruncWeek,
+    'month': TruncMonth,
+}
+
+# Dimension -> Payment lookup of its value (None: one cell for everything)
+DIMENSION_LOOKUPS = {
+    'all': None,
+    'car': 'rental__car_id',
+    'brand': 'rental__car__brand',
+    'fuel_type': 'rental__car__fuel_type',
+    'payment_method': 'payment_method',
+    'employee': 'rental__employee_id',
+}
+
+
+def bucket_of(period, day):
+    """First day of the ``period`` bucket containing ``day``."""
+    if isinstance(day, str):
+        day = date.fromisoformat(day)
+    if period == 'week':
+        return day - timedelta(days=day.weekday())
+    if period == 'month':
+        return day.replace(day=1)
+    return day
+
+
+def is_built():
+    return DashboardStats.objects.filter(
+        pk=DashboardStats.SINGLETON_PK, revenue_cube_built_at__isnull=False
+    ).exists()
+
+
+# ================= INCREMENTAL UPDATES =================
+def _add_to_cell(amount, count, **cell):
+    changes = {'total': F('total') + amount, 'payments': F('payments') + count}
+    if RevenueCube.objects.filter(**cell).update(**changes) or count < 0:
+        return
+    obj, created = RevenueCube.objects.get_or_create(
+        defaults={'total': amount, 'payments': count}, **cell
+    )
+    if not created:
+        RevenueCube.objects.filter(pk=obj.pk).update(**changes)
+
+
+def payment_keys(payment_method, rental_id):
+    """Dimension values a payment is counted under."""
+    car_id = brand = fuel_type = employee_id = None
+    if rental_id:
+        car_id, brand, fuel_type, employee_id = (
+            Rental.objects.filter(pk=rental_id)
+            .values_list('car_id', 'car__brand', 'car__fuel_type', 'employee_id')
+            .first()
+        ) or (None, None, None, None)
+    values = {
+        'all': '',
+        'car': car_id,
+        'brand': brand,
+        'fuel_type': fuel_type,
+        'payment_method': payment_method,
+        'employee': employee_id,
+    }
+    return {dimension: '' if value is None else str(value) for dimension, value in values.items()}
+
+
+def record_payment(amount, payment_date, payment_method, rental_id, sign=1):
+    """
+    Add (sign=1) or remove (sign=-1) one payment in every cell it falls in.
+
+    Values are resolved from the rental's current car and employee; edits to
+    those made later are picked up by the next build_revenue_cube run.
+    """
+    amount = Decimal(amount or 0) * sign
+    if not is_built():
+        return
+    for dimension, key in payment_keys(payment_method, rental_id).items():
+        for period in PERIODS:
+            _add_to_cell(
+                amount, sign,
+                period=period, bucket=bucket_of(period, payment_date),
+                dimension=dimension, key=key,
+            )
+
+
+def change_payment(old, new):
+    """``old``/``new``: (amount, payment_date, payment_method, rental_id)."""
+    if tuple(old) == tuple(new):
+        return
+    record_payment(*old, sign=-1)
+    record_payment(*new)
+
+
+# ================= FULL REBUILD =================
+def _cells(period, dimension):
+    lookup = DIMENSION_LOOKUPS[dimension]
+    key = Value('') if lookup is None else Coalesce(
+        Cast(lookup, output_field=CharField()), Value('')
+    )
+    return (
+        Payment.objects
+        .annotate(cube_bucket=PERIOD_TRUNCS[period]('payment_date'), cube_key=key)
+        .values('cube_bucket', 'cube_key')
+        .annotate(total=Sum('amount'), payments=Count('id'))
+        .order_by()
+    )
+
+
+@transaction.atomic
+def build_revenue_cube():
+    """Refill the whole cube from the payments table; returns the cell count."""
+    get_dashboard_stats()
+    RevenueCube.objects.all().delete()
+    cells = 0
+    for period in PERIODS:
+        for dimension in DIMENSIONS:
+            created = RevenueCube.objects.bulk_create(
+                (
+                    RevenueCube(
+                        period=period,
+                        bucket=row['cube_bucket'],
+                        dimension=dimension,
+                        key=row['cube_key'],
+                        total=row['total'],
+                        payments=row['payments'],
+                    )
+                    for row in _cells(period, dimension)
+                ),
+                batch_size=1000,
+            )
+            cells += len(created)
+    DashboardStats.objects.filter(pk=DashboardStats.SINGLETON_PK).update(
+        revenue_cube_built_at=timezone.now()
+    )
+    return cells
+
+
+# ================= QUERIES =================
+def _labels(dimension, keys):
+    """Readable names for car and employee keys; other keys are names already."""
+    ids = [int(key) for key in keys if key.isdigit()]
+    if dimension == 'car':
+        return {str(car.pk): str(car) for car in Car.objects.filter(pk__in=ids)}
+    if dimension == 'employee':
+        return {
+            str(employee.pk): str(employee)
+            for employee in Employee.objects.filter(pk__in=ids).select_related('user')
+        }
+    return {}
+
+
+def revenue_series(period='month', dimension='all', start=None, end=None):
+    """
+    Revenue per ``period`` bucket and ``dimension`` value between ``start``
+    and ``end`` (buckets containing those days included).
+
+    Reads only cube cells through the (period, dimension, bucket) index, so
+    the cost follows the number of buckets and dimension values asked for,
+    not the number of payments behind them.
+    """
+    if period not in PERIODS:
+        raise ValueError(f'Unknown period "{period}"')
+    if dimension not in DIMENSIONS:
+        raise ValueError(f'Unknown dimension "{dimension}"')
+    if not is_built():
+        build_revenue_cube()
+
+    cells = RevenueCube.objects.filter(period=period, dimension=dimension, payments__gt=0)
+    if start:
+        cells = cells.filter(bucket__gte=bucket_of(period, start))
+    if end:
+        cells = cells.filter(bucket__lte=end)
+    rows = list(cells.order_by('bucket', 'key').values('bucket', 'key', 'total', 'payments'))
+
+    labels = _labels(dimension, {row['key'] for row in rows})
+    for row in rows:
+        row['label'] = labels.get(row['key'], row['key'] or 'None')
+    return rows
@@ -3,3 +3,6 @@ from django.apps import AppConfig
 class DAutosAppConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'd_autos_app'
+
+    def ready(self):
+        from . import signals  # noqa: F401
\ No newline at end of file
@@ -0,0 +1,131 @@
+from datetime import date
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Exists, OuterRef, Q
+
+from .models import Car, Rental, Reservation
+from .versions import get_version
+
+# Bookings that still hold a car. Returned rentals and cancelled
+# reservations free it again.
+BLOCKING_RENTAL_STATUSES = ('active',)
+BLOCKING_RESERVATION_STATUSES = ('pending', 'approved')
+
+# Car, Rental and Reservation changes bump this counter (see signals.py)
+FLEET_VERSION = 'fleet'
+CAR_CHOICES_TIMEOUT = 60 * 10
+
+
+class CarUnavailable(ValueError):
+    """The car is already booked for (part of) the requested dates."""
+
+
+# Date ranges are inclusive on both ends: a car returned on the 14th is
+# not offered for a booking that starts on the 14th.
+def overlapping_rentals(start, end, exclude_rental=None):
+    """Rentals holding a car at any point between ``start`` and ``end``."""
+    rentals = Rental.objects.filter(
+        status__in=BLOCKING_RENTAL_STATUSES,
+        rental_date__lte=end,
+        return_date__gte=start,
+    )
+    if exclude_rental is not None:
+        rentals = rentals.exclude(pk=exclude_rental)
+    return rentals
+
+
+def overlapping_reservations(start, end, exclude_reservation=None, for_customer=None):
+    """
+    Reservations holding a car at any point between ``start`` and ``end``.
+
+    Reservations held by ``for_customer`` are left out: they are what that
+    customer's rental fulfils, not a competing booking.
+    """
+    reservations = Reservation.objects.filter(
+        reservation_status__in=BLOCKING_RESERVATION_STATUSES,
+        start_date__lte=end,
+        end_date__gte=start,
+    )
+    if exclude_reservation is not None:
+        reservations = reservations.exclude(pk=exclude_reservation)
+    if for_customer is not None:
+        reservations = reservations.exclude(customer=for_customer)
+    return reservations
+
+
+def available_cars(start, end, exclude_rental=None, exclude_reservation=None,
+                   for_customer=None, cars=None):
+    """
+    Cars with no rental or reservation overlapping ``start``..``end``.
+
+    Evaluates as a single query with two correlated NOT EXISTS probes, each
+    answered from the (car, start, end) index of its table. A car whose
+    ``availability`` flag is off is out right now, so it is only offered for
+    ranges that start in the future.
+    """
+    if cars is None:
+        cars = Car.objects.all()
+    rentals = overlapping_rentals(start, end, exclude_rental).filter(car=OuterRef('pk'))
+    reservations = (
+        overlapping_reservations(start, end, exclude_reservation, for_customer)
+        .filter(car=OuterRef('pk'))
+    )
+    cars = cars.filter(~Exists(rentals), ~Exists(reservations))
+    if start <= date.today():
+        flag = Q(availability=True)
+        if exclude_rental is not None:
+            # The flag may be off only because of the rental being edited
+            flag |= Q(pk__in=Rental.objects.filter(pk=exclude_rental).values('car'))
+        cars = cars.filter(flag)
+    return cars
+
+
+def is_car_available(car, start, end, exclude_rental=None, exclude_reservation=None,
+                     for_customer=None):
+    """Whether ``car`` is free for the whole of ``start``..``end``."""
+    car_id = getattr(car, 'pk', car)
+    return available_cars(
+        start, end,
+        exclude_rental=exclude_rental,
+        exclude_reservation=exclude_reservation,
+        for_customer=for_customer,
+        cars=Car.objects.filter(pk=car_id),
+    ).exists()
+
+
+def car_choice_label(car):
+    price = car.rental_price_per_day or car.daily_rate or 0
+    return f"{car.brand} {car.model} ({car.plate_number}) - ₵{price}"
+
+
+def car_choices(start, end, exclude_rental=None, exclude_reservation=None, for_customer=None):
+    """
+    ``(id, label)`` pairs of the cars available_cars() returns, cached.
+
+    Entries are keyed on the fleet version, so any car, rental or
+    reservation change makes every cached list stale at once. Without a
+    shared cache (settings.SHARED_CACHE) another worker's changes would go
+    unseen, so the list is read every time.
+    """
+    if not settings.SHARED_CACHE:
+        return _read_car_choices(start, end, exclude_rental, exclude_reservation, for_customer)
+    key = 'd_autos:car-choices:{}:{}:{}:{}:{}:{}:{}'.format(
+        get_version(FLEET_VERSION), date.today(), start, end,
+        exclude_rental, exclude_reservation, for_customer,
+    )
+    choices = cache.get(key)
+    if choices is None:
+        choices = _read_car_choices(start, end, exclude_rental, exclude_reservation, for_customer)
+        cache.set(key, choices, CAR_CHOICES_TIMEOUT)
+    return choices
+
+
+def _read_car_choices(start, end, exclude_rental, exclude_reservation, for_customer):
+    cars = available_cars(
+        start, end,
+        exclude_rental=exclude_rental,
+        exclude_reservation=exclude_reservation,
+        for_customer=for_customer,
+    ).only('brand', 'model', 'plate_number', 'rental_price_per_day', 'daily_rate')
+    return [(car.id, car_choice_label(car)) for car in cars]
@@ -0,0 +1,305 @@
+import json
+import platform
+import statistics
+import threading
+import time
+from datetime import date, timedelta
+
+import django
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.core.cache import cache
+from django.db import OperationalError, close_old_connections, connection, transaction
+from django.db.backends.signals import connection_created
+from django.test import AsyncClient, Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from . import charts
+from .models import Car, Customer, Employee, IdSequence, User
+from .seeding import seed_benchmark_data
+
+SCALES = {'1k': 1_000, '100k': 100_000, '1M': 1_000_000}
+BENCHMARK_REPEAT = 5
+# A slower median than this many times the previous run's is a regression
+TIME_TOLERANCE = 1.25
+WRITERS = 8
+WRITER_TRANSACTIONS = 200
+
+
+class Scenario:
+    """
+    One request the suite times: who sends it and what it sends, through
+    the WSGI handler or, with asgi=True, the ASGI one. ``headers`` may be a
+    callable, evaluated per request.
+    """
+
+    def __init__(self, name, url, as_user='admin', data=None, expect=200, asgi=False, headers=None):
+        self.name = name
+        self.url = url
+        self.as_user = as_user
+        self.data = data
+        self.expect = expect
+        self.asgi = asgi
+        self.headers = headers
+
+    def request(self, client, run):
+        url = self.url() if callable(self.url) else self.url
+        headers = (self.headers() if callable(self.headers) else self.headers) or {}
+        if self.data is None:
+            response = client.get(url, headers=headers)
+        else:
+            response = client.post(url, self.data(run), headers=headers)
+        if self.asgi:
+            # Awaited from this thread, which then also runs the async ORM's
+            # queries, so they are counted like the sync ones
+            response = async_to_sync(_await)(response)
+        return response
+
+
+async def _await(awaitable):
+    return await awaitable
+
+
+def rental_form_data(run):
+    """A booking far enough ahead that every run gets a free car."""
+    start = date.today() + timedelta(days=1000 + 40 * run)
+    return {
+        'customer': Customer.objects.order_by('pk').values_list('pk', flat=True).first(),
+        'car': Car.objects.order_by('pk').values_list('pk', flat=True).first(),
+        'rental_date': start,
+        'return_date': start + timedelta(days=3),
+        'deposit_paid': '0',
+        'payment_status': 'pending',
+        'payment_method': 'cash',
+        'status': 'active',
+    }
+
+
+def scenarios():
+    return [
+        Scenario('admin dashboard', reverse('admin_dashboard')),
+        Scenario('employee dashboard', reverse('employee_dashboard'), as_user='employee'),
+        Scenario('admin dashboard (async)', reverse('admin_dashboard_async'), asgi=True),
+        Scenario(
+            'employee dashboard (async)', reverse('employee_dashboard_async'),
+            as_user='employee', asgi=True,
+        ),
+        Scenario('customer list', reverse('customer_list')),
+        Scenario('car list', reverse('car_list')),
+        Scenario('rental list', reverse('rental_list')),
+        Scenario('payment list', reverse('payment_list')),
+        Scenario('reservation list', reverse('reservation_list')),
+        Scenario('maintenance list', reverse('maintenance_list')),
+        Scenario('rentals table page', reverse('dashboard_table', args=['rentals'])),
+        Scenario('revenue chart', reverse('dashboard_chart', args=['revenue-per-month'])),
+        Scenario(
+            'revenue chart (revalidated)', reverse('dashboard_chart', args=['revenue-per-month']),
+            headers=lambda: {'If-None-Match': charts.etag('revenue-per-month')}, expect=304,
+        ),
+        Scenario('customer search', reverse('customer_list') + '?q=mensah'),
+        Scenario('rental search', reverse('rental_list') + '?q=toyota'),
+        Scenario('rental create', reverse('rental_add'), data=rental_form_data, expect=302),
+    ]
+
+
+def benchmark_users():
+    """
+    Clients logged in as an admin and as a seeded sales agent, keyed
+    (name, asgi).
+    """
+    admin, created = User.objects.get_or_create(
+        email='benchmark-admin@example.com', defaults={'user_type': User.USER_TYPE_ADMIN},
+    )
+    agent = Employee.objects.filter(role=Employee.ROLE_SALES_AGENT).select_related('user').first()
+    clients = {}
+    for name, user in (('admin', admin), ('employee', agent.user)):
+        # AsyncClient always sends "Host: testserver"; see run_scenarios()
+        for asgi, client in ((False, Client(SERVER_NAME='localhost')), (True, AsyncClient())):
+            client.force_login(user)
+            clients[name, asgi] = client
+    return clients
+
+
+def run_scenarios(repeat=BENCHMARK_REPEAT, only=None):
+    """
+    Time every scenario ``repeat`` times after one warm-up request, on the
+    data already in the database. Returns {name: measurements}.
+    """
+    clients = benchmark_users()
+    results = {}
+    # The AsyncClient's fixed host name
+    with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']):
+        for scenario in scenarios():
+            if only and scenario.name not in only:
+                continue
+            client = clients[scenario.as_user, scenario.asgi]
+            scenario.request(client, 0)  # warm caches and snapshots, not measured
+            timings = []
+            for run in range(1, repeat + 1):
+                with CaptureQueriesContext(connection) as queries:
+                    started = time.perf_counter()
+                    response = scenario.request(client, run)
+                    timings.append((time.perf_counter() - started) * 1000)
+                if response.status_code != scenario.expect:
+                    raise AssertionError(
+                        f'{scenario.name}: status {response.status_code}, expected {scenario.expect}'
+                    )
+            results[scenario.name] = {
+                'median_ms': round(statistics.median(timings), 2),
+                'min_ms': round(min(timings), 2),
+                'max_ms': round(max(timings), 2),
+                'queries': len(queries),
+            }
+    return results
+
+
+def run_scale(rentals, repeat=BENCHMARK_REPEAT, only=None, seed=0):
+    """Seed ``rentals`` rentals into the (empty) current database and benchmark."""
+    cache.clear()  # nothing cached from another database
+    started = time.perf_counter()
+    rows = seed_benchmark_data(rentals, seed=seed)
+    seeded = time.perf_counter() - started
+    return {
+        'rows': rows,
+        'seed_seconds': round(seeded, 2),
+        'scenarios': run_scenarios(repeat, only),
+    }
+
+
+def environment():
+    return {
+        'date': date.today().isoformat(),
+        'python': platform.python_version(),
+        'django': django.get_version(),
+        'database': connection.vendor,
+    }
+
+
+def regressions(previous, current, tolerance=TIME_TOLERANCE):
+    """
+    Messages for every scenario that runs more queries, or is more than
+    ``tolerance`` times slower, than in ``previous`` (both as saved JSON).
+    """
+    found = []
+    for scale, result in current['scales'].items():
+        before = previous.get('scales', {}).get(scale)
+        if not before:
+            continue
+        for name, now in result['scenarios'].items():
+            then = before['scenarios'].get(name)
+            if not then:
+                continue
+            if now['queries'] > then['queries']:
+                found.append(f'{scale} {name}: {then["queries"]} -> {now["queries"]} queries')
+            if now['median_ms'] > then['median_ms'] * tolerance:
+                found.append(f'{scale} {name}: {then["median_ms"]} -> {now["median_ms"]} ms')
+    return found
+
+
+def load_results(path):
+    with open(path, encoding='utf-8') as file:
+        return json.load(file)
+
+
+def save_results(results, path):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as file:
+        json.dump(results, file, indent=2)
+
+
+# ================= CONCURRENT WRITERS =================
+def writer_profiles():
+    """
+    (label, database settings, SQLite PRAGMAs run on each connection,
+    SQLite journal mode) of the old setup and of the configured profile
+    (settings.DB_PROFILE).
+    """
+    configured = settings.DATABASES['default']
+    options = {key: value for key, value in configured.get('OPTIONS', {}).items() if key != 'pool'}
+    sqlite = connection.vendor == 'sqlite'
+    if sqlite:
+        options['transaction_mode'] = 'DEFERRED'
+    yield 'reconnect per request (old)', {
+        **configured, 'CONN_MAX_AGE': 0, 'CONN_HEALTH_CHECKS': False, 'OPTIONS': options,
+    }, {}, 'delete' if sqlite else None
+    yield f'{settings.DB_PROFILE} profile', configured, settings.SQLITE_PRAGMAS, None
+
+
+def _writer(number, database, transactions, barrier, results):
+    # This thread's connection is made from the profile's settings
+    connection.settings_dict = {**database, 'NAME': connection.settings_dict['NAME']}
+    name = f'writer-benchmark-{number}'
+    done = failed = 0
+    try:
+        barrier.wait()
+        for _ in range(transactions):
+            close_old_connections()  # as at the start and end of a request
+            try:
+                # Read, then write: the pattern of booking a car
+                with transaction.atomic():
+                    last = IdSequence.objects.filter(name=name).values_list('last_value', flat=True).get()
+                    IdSequence.objects.filter(name=name).update(last_value=last + 1)
+                done += 1
+            except OperationalError:
+                failed += 1
+            close_old_connections()
+    finally:
+        connection.close()
+        results.append((done, failed))
+
+
+def run_writer_benchmark(writers=WRITERS, transactions=WRITER_TRANSACTIONS):
+    """
+    ``writers`` threads each commit ``transactions`` short read-then-write
+    transactions, one per simulated request, under every writer_profiles()
+    entry. Returns {label: measurements}.
+    """
+    names = [f'writer-benchmark-{number}' for number in range(writers)]
+    opened = []
+
+    def count_connection(sender, **kwargs):
+        opened.append(1)
+
+    connection_created.connect(count_connection, weak=False)
+    results = {}
+    try:
+        for label, database, pragmas, journal_mode in writer_profiles():
+            IdSequence.objects.filter(name__in=names).delete()
+            IdSequence.objects.bulk_create(IdSequence(name=name, last_value=0) for name in names)
+            if journal_mode:
+                with connection.cursor() as cursor:
+                    cursor.execute(f'PRAGMA journal_mode = {journal_mode}')
+            # Nothing may stay open across a journal mode change
+            connection.close()
+            opened.clear()
+            outcomes = []
+            barrier = threading.Barrier(writers + 1)
+            with override_settings(SQLITE_PRAGMAS=pragmas):
+                threads = [
+                    threading.Thread(
+                        target=_writer, args=(number, database, transactions, barrier, outcomes),
+                    )
+                    for number in range(writers)
+                ]
+                for thread in threads:
+                    thread.start()
+                barrier.wait()
+                started = time.perf_counter()
+                for thread in threads:
+                    thread.join()
+                seconds = time.perf_counter() - started
+            committed = sum(done for done, failed in outcomes)
+            results[label] = {
+                'transactions_per_second': round(committed / seconds, 1),
+                'committed': committed,
+                'locked_errors': sum(failed for done, failed in outcomes),
+                'connections_opened': len(opened),
+                # What the counters say was committed, to catch lost updates
+                'counted': sum(IdSequence.objects.filter(name__in=names).values_list('last_value', flat=True)),
+            }
+    finally:
+        connection_created.disconnect(count_connection)
+        IdSequence.objects.filter(name__in=names).delete()
+    return results
+
@@ -0,0 +1,71 @@
+import hashlib
+from datetime import datetime, timezone
+
+from .models import Car, CarRentalStats, MonthlyRevenueStats, Payment, Rental
+from .stats import get_dashboard_stats
+from .versions import get_versions, last_changed, table_version
+
+
+def rentals_per_car():
+    return (
+        CarRentalStats.objects
+        .filter(rental_count__gt=0)
+        .values('car__brand', 'car__model', 'rental_count')
+        .order_by('car_id')
+    )
+
+
+def revenue_per_month():
+    return MonthlyRevenueStats.objects.values('month', 'total').order_by('month')
+
+
+def rentals_per_car_series():
+    rows = list(rentals_per_car())
+    return {
+        'labels': [f"{r['car__brand']} {r['car__model']}" for r in rows],
+        'data': [r['rental_count'] for r in rows],
+    }
+
+
+def revenue_per_month_series():
+    rows = list(revenue_per_month())
+    return {
+        'labels': [r['month'].strftime('%b %Y') for r in rows],
+        'data': [float(r['total'] or 0) for r in rows],
+    }
+
+
+# chart name -> (models it is read from, series function)
+CHARTS = {
+    'rentals-per-car': ((Rental, Car), rentals_per_car_series),
+    'revenue-per-month': ((Payment,), revenue_per_month_series),
+}
+
+ADMIN_ONLY_CHARTS = {'revenue-per-month'}
+
+
+def content_etag(content):
+    """ETag of a response body, for when the table versions are not shared."""
+    return '"{}"'.format(hashlib.md5(content).hexdigest())
+
+
+def etag(chart):
+    """
+    The chart's ETag: its tables' change counters, so no query is needed.
+    Only valid with a shared cache (settings.SHARED_CACHE).
+    """
+    models, _ = CHARTS[chart]
+    counters = get_versions([table_version(model) for model in models])
+    return '"{}-{}"'.format(chart, '-'.join(map(str, counters)))
+
+
+def last_modified(chart):
+    models, _ = CHARTS[chart]
+    changed_at = max(last_changed(table_version(model)) for model in models)
+    return datetime.fromtimestamp(changed_at, tz=timezone.utc)
+
+
+def chart_series(chart):
+    """{'labels': [...], 'data': [...]} for ``chart``, from the dashboard snapshot."""
+    get_dashboard_stats()  # builds the snapshot tables on first use
+    return CHARTS[chart][1]()
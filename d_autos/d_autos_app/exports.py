@@ -0,0 +1,116 @@
+import csv
+
+from .models import Maintenance, Payment, Rental
+
+EXPORT_CHUNK_SIZE = 2000
+
+
+class Echo:
+    """File-like object whose write() hands the line back to csv.writer's caller."""
+
+    def write(self, value):
+        return value
+
+
+class CsvExport:
+    """
+    A table finance can download: its rows, optionally limited to a
+    ``date_field`` range and one ``status_field`` value, as (header, lookup)
+    columns.
+    """
+
+    def __init__(self, queryset, date_field, status_field, columns):
+        self.queryset = queryset
+        self.date_field = date_field
+        self.status_field = status_field
+        self.columns = columns
+
+    @property
+    def statuses(self):
+        return self.queryset.model._meta.get_field(self.status_field).choices
+
+    def filter(self, start=None, end=None, status=None):
+        rows = self.queryset
+        if start:
+            rows = rows.filter(**{f'{self.date_field}__gte': start})
+        if end:
+            rows = rows.filter(**{f'{self.date_field}__lte': end})
+        if status:
+            rows = rows.filter(**{self.status_field: status})
+        return rows
+
+    def rows(self, start=None, end=None, status=None, chunk_size=EXPORT_CHUNK_SIZE):
+        """
+        Plain tuples, fetched ``chunk_size`` at a time, so memory does not
+        grow with the date range.
+        """
+        return (
+            self.filter(start, end, status)
+            .order_by(self.date_field, 'pk')
+            .values_list(*[lookup for header, lookup in self.columns])
+            .iterator(chunk_size=chunk_size)
+        )
+
+    def stream(self, start=None, end=None, status=None):
+        """CSV lines, header first, produced as the rows are read."""
+        writer = csv.writer(Echo())
+        yield writer.writerow([header for header, lookup in self.columns])
+        for row in self.rows(start, end, status):
+            yield writer.writerow(row)
+
+
+EXPORTS = {
+    'rentals': CsvExport(
+        Rental.objects.all(), 'rental_date', 'status', (
+            ('Rental ID', 'id'),
+            ('Rental date', 'rental_date'),
+            ('Return date', 'return_date'),
+            ('Actual return date', 'actual_return_date'),
+            ('Status', 'status'),
+            ('Customer first name', 'customer__first_name'),
+            ('Customer last name', 'customer__last_name'),
+            ('Customer email', 'customer__email'),
+            ('Car', 'car__brand'),
+            ('Model', 'car__model'),
+            ('Plate number', 'car__plate_number'),
+            ('Employee ID', 'employee__employee_id'),
+            ('Total cost', 'total_cost'),
+            ('Deposit paid', 'deposit_paid'),
+            ('Payment status', 'payment_status'),
+            ('Payment method', 'payment_method'),
+        ),
+    ),
+    'payments': CsvExport(
+        Payment.objects.all(), 'payment_date', 'payment_status', (
+            ('Payment ID', 'id'),
+            ('Payment date', 'payment_date'),
+            ('Rental ID', 'rental_id'),
+            ('Customer first name', 'customer__first_name'),
+            ('Customer last name', 'customer__last_name'),
+            ('Amount', 'amount'),
+            ('Payment method', 'payment_method'),
+            ('Status', 'payment_status'),
+            ('Transaction ID', 'transaction_id'),
+        ),
+    ),
+    'maintenances': CsvExport(
+        Maintenance.objects.all(), 'scheduled_date', 'status', (
+            ('Maintenance ID', 'id'),
+            ('Scheduled date', 'scheduled_date'),
+            ('Completed date', 'completed_date'),
+            ('Status', 'status'),
+            ('Priority', 'priority'),
+            ('Type', 'service_type'),
+            ('Title', 'title'),
+            ('Car', 'car__brand'),
+            ('Model', 'car__model'),
+            ('Plate number', 'car__plate_number'),
+            ('Employee ID', 'employee__employee_id'),
+            ('Mileage at service', 'mileage_at_service'),
+            ('Labor cost', 'labor_cost'),
+            ('Parts cost', 'parts_cost'),
+            ('Tax', 'tax_amount'),
+            ('Total cost', 'cost'),
+        ),
+    ),
+}
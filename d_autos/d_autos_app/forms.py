@@ -6,9 +6,31 @@ from .models import (
 from django.contrib.auth.forms import AuthenticationForm
 from django.utils.translation import gettext_lazy as _
 from .models import User
+from .availability import available_cars, car_choices
+from datetime import date
 import random
 
 
+def booking_range(form, start_field, end_field):
+    """
+    Dates a rental/reservation form is booking: the submitted ones when
+    they parse, else the instance's, else today.
+    """
+    dates = []
+    for name in (start_field, end_field):
+        value = None
+        if form.is_bound:
+            try:
+                value = form.fields[name].clean(form.data.get(form.add_prefix(name)))
+            except forms.ValidationError:
+                value = None
+        if value is None:
+            value = getattr(form.instance, name, None)
+        dates.append(value or date.today())
+    start, end = dates
+    return start, max(start, end)
+
+
 class CustomerForm(forms.ModelForm):
     class Meta:
         model = Customer
@@ -91,20 +113,22 @@ class RentalForm(forms.ModelForm):
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        # ONLY AVAILABLE CARS
-        self.fields['car'].queryset = Car.objects.filter(availability=True)
+        # ONLY CARS FREE FOR THE REQUESTED DATES
+        start, end = booking_range(self, 'rental_date', 'return_date')
+        customer = self.data.get(self.add_prefix('customer')) or self.instance.customer_id
+        customer = int(customer) if str(customer).isdigit() else None
+        # The queryset is only queried to validate a submitted car
+        self.fields['car'].queryset = available_cars(
+            start, end, exclude_rental=self.instance.pk, for_customer=customer,
+        )
         # Format car choices with prices
-        car_choices = []
-        for car in Car.objects.filter(availability=True):
-            price = car.rental_price_per_day or car.daily_rate or 0
-            car_choices.append((
-                car.id,
-                f"{car.brand} {car.model} ({car.plate_number}) - ₵{price}"
-            ))
-        self.fields['car'].choices = car_choices
+        self.fields['car'].choices = car_choices(
+            start, end, exclude_rental=self.instance.pk, for_customer=customer,
+        )
         # Make employee optional on the form (we assign it in the view)
         if 'employee' in self.fields:
             self.fields['employee'].required = False
+            self.fields['employee'].queryset = Employee.objects.select_related('user')
 
 class PaymentForm(forms.ModelForm):
     class Meta:
@@ -126,6 +150,11 @@ class PaymentForm(forms.ModelForm):
             }),
         }
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Rental choices are labelled with their car and customer
+        self.fields['rental'].queryset = Rental.objects.select_related('car', 'customer')
+
 
 class ReservationForm(forms.ModelForm):
     class Meta:
@@ -150,15 +179,12 @@ class ReservationForm(forms.ModelForm):
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        # Add data attributes to car choices with rental prices
-        car_choices = []
-        for car in Car.objects.filter(availability=True):
-            price = car.rental_price_per_day or car.daily_rate or 0
-            car_choices.append((
-                car.id,
-                f"{car.brand} {car.model} ({car.plate_number}) - ₵{price}"
-            ))
-        self.fields['car'].choices = car_choices
+        # Only cars free for the requested dates, labelled with rental prices
+        start, end = booking_range(self, 'start_date', 'end_date')
+        self.fields['car'].queryset = available_cars(
+            start, end, exclude_reservation=self.instance.pk,
+        )
+        self.fields['car'].choices = car_choices(start, end, exclude_reservation=self.instance.pk)
 
 
 class MaintenanceForm(forms.ModelForm):
@@ -182,11 +208,11 @@ class MaintenanceForm(forms.ModelForm):
         # Limit employee choices to mechanics, managers, technicians
         self.fields['employee'].queryset = Employee.objects.filter(
             role__in=['mechanic', 'manager', 'technician']
-        )
+        ).select_related('user')
         # Limit approved_by choices to managers and supervisors
         self.fields['approved_by'].queryset = Employee.objects.filter(
             role__in=['manager', 'supervisor']
-        )
+        ).select_related('user')
 
 
 class EmployeeForm(forms.ModelForm):
@@ -275,6 +301,38 @@ class EmployeeForm(forms.ModelForm):
 
     # Custom Login Form
     
+class ImportUploadForm(forms.Form):
+    KIND_CHOICES = [
+        ('fleet', 'Cars'),
+        ('customers', 'Customers'),
+    ]
+
+    kind = forms.ChoiceField(choices=KIND_CHOICES)
+    file = forms.FileField(
+        help_text='CSV or Excel (.xlsx) with a header row naming the car/customer form fields'
+    )
+
+
+class StatementUploadForm(forms.Form):
+    file = forms.FileField(
+        help_text='CSV or Excel (.xlsx) statement with transaction_id and amount columns'
+    )
+
+
+class CheckInForm(forms.Form):
+    """One row of the end-of-day check-in sheet."""
+
+    rental = forms.IntegerField(widget=forms.HiddenInput)
+    selected = forms.BooleanField(required=False, label='Returned')
+    actual_return_date = forms.DateField(widget=forms.DateInput(attrs={'type': 'date'}))
+    mileage = forms.IntegerField(
+        required=False, min_value=0, help_text='Odometer reading (km); blank keeps the current one'
+    )
+
+
+CheckInFormSet = forms.formset_factory(CheckInForm, extra=0)
+
+
 class UserLoginForm(AuthenticationForm):
     """Custom login form with user type selection."""
     
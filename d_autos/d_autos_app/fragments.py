@@ -0,0 +1,87 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import Car, Customer, Employee, Maintenance, Payment, Rental, Reservation, User
+from .versions import get_versions, table_version
+
+FRAGMENT_KEY = 'd_autos:fragment:{}'
+COUNTER_KEY = 'd_autos:fragment_count:{}:{}'
+OUTCOMES = ('hits', 'misses')
+# Keys move on with the table versions; superseded HTML only has to expire.
+# Fragments are only cached with a shared cache (settings.SHARED_CACHE):
+# per-worker versions would let a worker serve HTML another one changed.
+FRAGMENT_TIMEOUT = 60 * 60 * 24
+
+# Dashboard table -> models its rows are rendered from
+FRAGMENT_MODELS = {
+    'customers': (Customer,),
+    'cars': (Car,),
+    'rentals': (Rental, Customer, Car, Employee, User),
+    'payments': (Payment, Rental, Customer, Car),
+    'maintenances': (Maintenance, Car, Employee, User),
+    'reservations': (Reservation, Customer, Car),
+    'employees': (Employee, User),
+}
+
+
+def fragment_key(template_name, table, *vary_on):
+    """
+    Cache key of ``table``'s fragment in ``template_name``: it changes
+    whenever one of the table's models is written (see signals.py).
+    """
+    counters = get_versions([table_version(model) for model in FRAGMENT_MODELS[table]])
+    parts = [template_name, table, *vary_on, *counters]
+    return FRAGMENT_KEY.format(hashlib.md5(':'.join(map(str, parts)).encode()).hexdigest())
+
+
+def count(table, outcome):
+    key = COUNTER_KEY.format(table, outcome)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # The first count, or the counter was evicted
+        if not cache.add(key, 1, timeout=None):
+            cache.incr(key)
+
+
+def render_fragment(template_name, table, vary_on, render):
+    """The cached HTML of a fragment, from ``render()`` on a miss."""
+    if not settings.SHARED_CACHE:
+        return render()
+    # Keyed before rendering: rows written meanwhile make this key stale
+    key = fragment_key(template_name, table, *vary_on)
+    html = cache.get(key)
+    if html is None:
+        count(table, 'misses')
+        html = render()
+        cache.set(key, html, FRAGMENT_TIMEOUT)
+    else:
+        count(table, 'hits')
+    return html
+
+
+def cached_tables(template_name, tables):
+    """Those of ``tables`` whose fragment in ``template_name`` is cached."""
+    if not settings.SHARED_CACHE:
+        return set()
+    keys = {fragment_key(template_name, table): table for table in tables}
+    return {keys[key] for key in cache.get_many(keys)}
+
+
+def _counter_keys():
+    return [COUNTER_KEY.format(table, outcome) for table in FRAGMENT_MODELS for outcome in OUTCOMES]
+
+
+def fragment_counts():
+    """{table: (hits, misses)} since the counters were last reset."""
+    found = cache.get_many(_counter_keys())
+    return {
+        table: tuple(found.get(COUNTER_KEY.format(table, outcome), 0) for outcome in OUTCOMES)
+        for table in FRAGMENT_MODELS
+    }
+
+
+def reset_fragment_counts():
+    cache.delete_many(_counter_keys())
@@ -0,0 +1,305 @@
+import codecs
+import csv
+import io
+import os
+import zipfile
+from functools import partial
+from itertools import islice
+
+from django import forms
+from django.db import IntegrityError, transaction
+from django.utils.text import capfirst
+
+from . import search, stats, versions
+from .availability import FLEET_VERSION
+from .forms import CarForm, CustomerForm
+
+IMPORT_BATCH_SIZE = 500
+ENCODING_CHECK_CHUNK = 64 * 1024
+FALSE_VALUES = {'', '0', 'false', 'no', 'n', 'off'}
+
+
+class ImportFileError(ValueError):
+    """The file as a whole cannot be imported (format, missing columns)."""
+
+
+# ================= READERS =================
+# Each returns (header, rows) where rows lazily yields (line number, dict).
+# A file that cannot be read raises ImportFileError, from the row iterator
+# too, so callers only have the one exception to handle.
+NOT_UTF8 = 'The file is not UTF-8 text; save it as "CSV UTF-8" and upload it again.'
+
+
+def check_utf8(file):
+    """
+    Decode a seekable file once before importing it, so a bad byte deep in
+    the file is reported before any of its batches are committed.
+    """
+    if not file.seekable():
+        return
+    start = file.tell()
+    decoder = codecs.getincrementaldecoder('utf-8-sig')()
+    try:
+        for chunk in iter(partial(file.read, ENCODING_CHECK_CHUNK), b''):
+            decoder.decode(chunk)
+        decoder.decode(b'', final=True)
+    except UnicodeDecodeError:
+        raise ImportFileError(NOT_UTF8)
+    finally:
+        file.seek(start)
+
+
+def read_csv(file):
+    check_utf8(file)
+    text = io.TextIOWrapper(file, encoding='utf-8-sig', newline='')
+    reader = csv.DictReader(text)
+    try:
+        header = reader.fieldnames or []
+    except UnicodeDecodeError:
+        raise ImportFileError(NOT_UTF8)
+    except csv.Error as exc:
+        raise ImportFileError(f'Line 1 is not valid CSV: {exc}')
+
+    def rows():
+        try:
+            for row in reader:
+                yield reader.line_num, row
+        except UnicodeDecodeError:
+            raise ImportFileError(NOT_UTF8)
+        except csv.Error as exc:
+            raise ImportFileError(f'Line {reader.line_num} is not valid CSV: {exc}')
+    return header, rows()
+
+
+def read_xlsx(file):
+    try:
+        from openpyxl import load_workbook
+        from openpyxl.utils.exceptions import InvalidFileException
+    except ImportError:
+        raise ImportFileError('Reading Excel files needs the openpyxl package.')
+    # A renamed or damaged file fails as a zip archive, a workbook missing
+    # one of its parts (KeyError) or a sheet that is not XML (SyntaxError)
+    unreadable = (zipfile.BadZipFile, InvalidFileException, KeyError, SyntaxError)
+    not_xlsx = 'The file is not a readable Excel (.xlsx) workbook.'
+    try:
+        # read_only mode streams rows instead of loading the whole sheet
+        workbook = load_workbook(file, read_only=True, data_only=True)
+        sheet_rows = workbook.active.iter_rows(values_only=True)
+        header = ['' if name is None else str(name).strip() for name in next(sheet_rows, ())]
+    except unreadable:
+        raise ImportFileError(not_xlsx)
+
+    def rows():
+        try:
+            for line, values in enumerate(sheet_rows, start=2):
+                if all(value in (None, '') for value in values):
+                    continue
+                yield line, {
+                    name: '' if value is None else value
+                    for name, value in zip(header, values) if name
+                }
+        except unreadable:
+            raise ImportFileError(not_xlsx)
+        finally:
+            workbook.close()
+    return header, rows()
+
+
+READERS = {
+    '.csv': read_csv,
+    '.xlsx': read_xlsx,
+}
+
+
+def read_rows(file, filename):
+    """Header and row iterator for an uploaded or opened (binary) file."""
+    extension = os.path.splitext(filename)[1].lower()
+    try:
+        reader = READERS[extension]
+    except KeyError:
+        raise ImportFileError(f'Unsupported file type "{extension}"; use CSV or .xlsx.')
+    return reader(getattr(file, 'file', file))
+
+
+# ================= IMPORTERS =================
+class CarImportForm(CarForm):
+    # Uniqueness is checked once per batch (BulkImporter.check_unique)
+    def validate_unique(self):
+        pass
+
+
+class CustomerImportForm(CustomerForm):
+    def validate_unique(self):
+        pass
+
+
+def error_messages(errors):
+    """Flatten a form-style error dict into (field, message) pairs."""
+    for field, field_errors in errors.items():
+        for error in field_errors:
+            yield ('' if field == '__all__' else field), error['message']
+
+
+class ImportResult:
+    def __init__(self):
+        self.created = 0
+        self.failed = 0
+
+
+class BulkImporter:
+    """
+    Validate rows with a ModelForm and insert the valid ones with
+    bulk_create, ``batch_size`` rows per transaction.
+
+    Rows are consumed lazily and each batch is discarded once written, so
+    memory does not grow with the file. Invalid rows are passed to
+    ``on_error(line, errors)`` as they are found and the rest still load.
+    """
+
+    form_class = None
+    unique_fields = ()
+
+    def __init__(self, batch_size=IMPORT_BATCH_SIZE, on_error=None):
+        self.model = self.form_class._meta.model
+        self.batch_size = batch_size
+        self.on_error = on_error or (lambda line, errors: None)
+
+    def required_columns(self):
+        return [
+            name for name, field in self.form_class.base_fields.items()
+            if field.required and not self.model._meta.get_field(name).has_default()
+        ]
+
+    def run(self, header, rows):
+        missing = [name for name in self.required_columns() if name not in header]
+        if missing:
+            raise ImportFileError(f'Missing column(s): {", ".join(missing)}')
+
+        result = ImportResult()
+        rows = iter(rows)
+        while True:
+            batch = list(islice(rows, self.batch_size))
+            if not batch:
+                break
+            valid = self.check_unique(self.validate(batch, result), result)
+            self.insert(valid, result)
+        return result
+
+    def report(self, result, line, errors):
+        result.failed += 1
+        self.on_error(line, errors)
+
+    def clean_row(self, row):
+        data = {}
+        for name, field in self.form_class.base_fields.items():
+            if name not in row:
+                # Columns the file leaves out take the model default
+                default = self.model._meta.get_field(name).get_default()
+                if default is not None:
+                    data[name] = default
+                continue
+            value = row[name]
+            if isinstance(value, str):
+                value = value.strip()
+            if isinstance(field, forms.BooleanField) and str(value).lower() in FALSE_VALUES:
+                value = False
+            data[name] = value
+        return data
+
+    def validate(self, batch, result):
+        valid = []
+        for line, row in batch:
+            form = self.form_class(data=self.clean_row(row))
+            if form.is_valid():
+                obj = form.save(commit=False)
+                self.prepare(obj)
+                valid.append((line, obj))
+            else:
+                self.report(result, line, form.errors.get_json_data())
+        return valid
+
+    def check_unique(self, valid, result):
+        """Drop rows clashing with stored rows or earlier rows of the batch."""
+        for field in self.unique_fields:
+            values = [getattr(obj, field) for line, obj in valid]
+            existing = set(
+                self.model.objects.filter(**{f'{field}__in': values})
+                .values_list(field, flat=True)
+            )
+            label = self.model._meta.get_field(field).verbose_name
+            unique = []
+            for line, obj in valid:
+                value = getattr(obj, field)
+                if value in existing:
+                    message = f'{capfirst(self.model._meta.verbose_name)} with this {label} already exists.'
+                    self.report(result, line, {field: [{'message': message}]})
+                else:
+                    existing.add(value)
+                    unique.append((line, obj))
+            valid = unique
+        return valid
+
+    def insert(self, valid, result):
+        if not valid:
+            return
+        objs = [obj for line, obj in valid]
+        try:
+            with transaction.atomic():
+                self.model.objects.bulk_create(objs)
+                self.created(objs)
+            result.created += len(objs)
+            return
+        except IntegrityError:
+            pass
+        # Someone inserted a clashing row since check_unique(); find it
+        for line, obj in valid:
+            obj.pk = None
+            try:
+                with transaction.atomic():
+                    self.model.objects.bulk_create([obj])
+                    self.created([obj])
+            except IntegrityError as exc:
+                self.report(result, line, {'__all__': [{'message': str(exc)}]})
+            else:
+                result.created += 1
+
+    def prepare(self, obj):
+        """Anything the model's save() would have done."""
+
+    def created(self, objs):
+        """Bookkeeping the model's signals would have done."""
+
+
+class FleetImporter(BulkImporter):
+    form_class = CarImportForm
+    unique_fields = ('plate_number',)
+
+    def prepare(self, car):
+        car.fill_derived_fields()
+
+    def created(self, cars):
+        stats.record_car(len(cars))
+        versions.changed(FLEET_VERSION)
+        versions.changed(versions.table_version(self.model))
+
+
+class CustomerImporter(BulkImporter):
+    form_class = CustomerImportForm
+    unique_fields = ('email', 'license_number')
+
+    def created(self, customers):
+        stats.record_customer(len(customers))
+        search.index_new_customers(customers)
+        versions.changed(versions.table_version(self.model))
+
+
+IMPORTERS = {
+    'fleet': FleetImporter,
+    'customers': CustomerImporter,
+}
+
+
+def import_file(kind, file, filename, batch_size=IMPORT_BATCH_SIZE, on_error=None):
+    """Import a CSV/Excel file of ``kind`` ('fleet' or 'customers')."""
+    header, rows = read_rows(file, filename)
+    return IMPORTERS[kind](batch_size, on_error).run(header, rows)
@@ -0,0 +1,152 @@
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import F, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import CustomerLedger, DashboardStats, Payment, Rental
+from .stats import get_dashboard_stats
+
+ZERO = Decimal('0.00')
+
+
+def is_built():
+    return DashboardStats.objects.filter(
+        pk=DashboardStats.SINGLETON_PK, ledger_built_at__isnull=False
+    ).exists()
+
+
+def payment_customer(customer_id, rental_id):
+    """Whose account a payment is credited to: its customer, else its rental's."""
+    if customer_id or not rental_id:
+        return customer_id
+    return Rental.objects.filter(pk=rental_id).values_list('customer_id', flat=True).first()
+
+
+# ================= INCREMENTAL UPDATES =================
+def record(customer_id, charged=ZERO, deposits=ZERO, paid=ZERO, create=True):
+    """
+    Add to ``customer_id``'s totals. Skipped until the ledger is built.
+
+    Deletes pass create=False: a missing row then means the customer is
+    being deleted too, and must not be recreated.
+    """
+    charged, deposits, paid = Decimal(charged or 0), Decimal(deposits or 0), Decimal(paid or 0)
+    if not customer_id or not (charged or deposits or paid) or not is_built():
+        return
+    changes = {
+        'charged': F('charged') + charged,
+        'deposits': F('deposits') + deposits,
+        'paid': F('paid') + paid,
+        'balance': F('balance') + (charged - deposits - paid),
+        'updated_at': timezone.now(),
+    }
+    if CustomerLedger.objects.filter(customer_id=customer_id).update(**changes) or not create:
+        return
+    obj, created = CustomerLedger.objects.get_or_create(customer_id=customer_id, defaults={
+        'charged': charged, 'deposits': deposits, 'paid': paid,
+        'balance': charged - deposits - paid,
+    })
+    if not created:
+        CustomerLedger.objects.filter(pk=obj.pk).update(**changes)
+
+
+def record_rental(customer_id, total_cost, deposit_paid, sign=1):
+    """A rental was added (sign=1) or removed (sign=-1)."""
+    record(
+        customer_id, Decimal(total_cost or 0) * sign, Decimal(deposit_paid or 0) * sign,
+        create=sign > 0,
+    )
+
+
+def change_rental(old, new):
+    """``old``/``new``: (customer_id, total_cost, deposit_paid)."""
+    if tuple(old) == tuple(new):
+        return
+    record_rental(*old, sign=-1)
+    record_rental(*new)
+
+
+def record_payment(customer_id, amount, sign=1):
+    """A payment credited to ``customer_id`` was added (sign=1) or removed (sign=-1)."""
+    record(customer_id, paid=Decimal(amount or 0) * sign, create=sign > 0)
+
+
+def move_rental_payments(rental_id, old_customer_id, new_customer_id):
+    """
+    The rental changed customer: its payments without a customer of their
+    own are credited through it (payment_customer()), so they move too.
+    """
+    if old_customer_id == new_customer_id or not is_built():
+        return
+    amount = (
+        Payment.objects.filter(rental_id=rental_id, customer__isnull=True)
+        .aggregate(total=Sum('amount'))['total']
+    )
+    if amount:
+        record_payment(old_customer_id, amount, sign=-1)
+        record_payment(new_customer_id, amount)
+
+
+def change_payment(old, new):
+    """``old``/``new``: (customer_id, amount)."""
+    if tuple(old) == tuple(new):
+        return
+    record_payment(*old, sign=-1)
+    record_payment(*new)
+
+
+def record_charges(changes):
+    """Apply {customer_id: total_cost difference}, e.g. after bulk repricing."""
+    for customer_id, difference in changes.items():
+        record(customer_id, charged=difference)
+
+
+# ================= FULL REBUILD =================
+@transaction.atomic
+def rebuild_customer_ledger():
+    """Refill the ledger from the rentals and payments tables; returns the row count."""
+    get_dashboard_stats()
+    totals = defaultdict(lambda: {'charged': ZERO, 'deposits': ZERO, 'paid': ZERO})
+    for row in (
+        Rental.objects.values('customer')
+        .annotate(charged=Sum('total_cost'), deposits=Sum('deposit_paid'))
+        .order_by()
+    ):
+        totals[row['customer']]['charged'] = row['charged'] or ZERO
+        totals[row['customer']]['deposits'] = row['deposits'] or ZERO
+    for row in (
+        Payment.objects.annotate(payer=Coalesce('customer', 'rental__customer'))
+        .filter(payer__isnull=False)
+        .values('payer')
+        .annotate(paid=Sum('amount'))
+        .order_by()
+    ):
+        totals[row['payer']]['paid'] = row['paid'] or ZERO
+
+    CustomerLedger.objects.all().delete()
+    created = CustomerLedger.objects.bulk_create(
+        (
+            CustomerLedger(
+                customer_id=customer_id,
+                balance=row['charged'] - row['deposits'] - row['paid'],
+                **row
+            )
+            for customer_id, row in totals.items()
+        ),
+        batch_size=1000,
+    )
+    DashboardStats.objects.filter(pk=DashboardStats.SINGLETON_PK).update(
+        ledger_built_at=timezone.now()
+    )
+    return len(created)
+
+
+# ================= QUERIES =================
+def outstanding_balances():
+    """Ledger rows of customers who owe money, through ledger_outstanding_idx."""
+    if not is_built():
+        rebuild_customer_ledger()
+    return CustomerLedger.objects.select_related('customer').filter(balance__gt=0)
@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+from django.db import connection
+from d_autos_app import benchmarks
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare write throughput of concurrent writers with one connection per '
+        'request and default journaling against the configured database profile'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--writers', type=int, default=benchmarks.WRITERS)
+        parser.add_argument('--transactions', type=int, default=benchmarks.WRITER_TRANSACTIONS,
+                            help='Transactions per writer')
+
+    def handle(self, *args, **options):
+        # A throwaway database; the real one is untouched
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            results = benchmarks.run_writer_benchmark(options['writers'], options['transactions'])
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        self.stdout.write(
+            f'{options["writers"]} writers x {options["transactions"]} transactions on {connection.vendor}'
+        )
+        self.stdout.write(f'{"profile":<30} {"tx/s":>10} {"committed":>10} {"locked":>8} {"connections":>12}')
+        for label, measured in results.items():
+            self.stdout.write(
+                f'{label:<30} {measured["transactions_per_second"]:>10.1f} {measured["committed"]:>10} '
+                f'{measured["locked_errors"]:>8} {measured["connections_opened"]:>12}'
+            )
+        self.stdout.write(self.style.SUCCESS('Done'))
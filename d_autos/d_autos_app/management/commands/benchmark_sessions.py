@@ -0,0 +1,71 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from d_autos_app.models import User
+
+WRITE_PREFIXES = ('INSERT', 'UPDATE', 'DELETE')
+
+
+def session_modes():
+    """(label, settings) of the old behaviour and of every SESSION_MODE."""
+    yield 'db, saved every request (old)', {
+        'SESSION_ENGINE': settings.SESSION_MODES['db'],
+        'SESSION_SAVE_EVERY_REQUEST': True,
+        'SESSION_REFRESH_INTERVAL': 0,
+    }
+    for mode, engine in settings.SESSION_MODES.items():
+        yield f'{mode}, refreshed every {settings.SESSION_REFRESH_INTERVAL}s', {
+            'SESSION_ENGINE': engine,
+            'SESSION_SAVE_EVERY_REQUEST': False,
+        }
+
+
+class Command(BaseCommand):
+    help = 'Count session queries and writes per request under each session mode'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200)
+        parser.add_argument('--url', default=None, help='Page to request (default: the car list)')
+
+    def handle(self, *args, **options):
+        url = options['url'] or reverse('car_list')
+        requests = options['requests']
+
+        self.stdout.write(f'{requests} requests to {url} by one logged-in admin')
+        self.stdout.write(
+            f'{"mode":<40} {"db queries":>10} {"db writes":>10} {"writes/request":>15} {"cookies set":>12}'
+        )
+        # Everything, including the throwaway user, is rolled back
+        with transaction.atomic():
+            user = User.objects.create_user(
+                email='session-benchmark@example.com', password=None,
+                user_type=User.USER_TYPE_ADMIN,
+            )
+            for label, overrides in session_modes():
+                with override_settings(**overrides):
+                    reads, writes, cookies = self.run_mode(user, url, requests)
+                self.stdout.write(
+                    f'{label:<40} {reads + writes:>10} {writes:>10} '
+                    f'{writes / requests:>15.2f} {cookies:>12}'
+                )
+            transaction.set_rollback(True)
+
+    def run_mode(self, user, url, requests):
+        client = Client(SERVER_NAME='localhost')  # an ALLOWED_HOSTS entry
+        client.force_login(user)
+        reads = writes = cookies = 0
+        for _ in range(requests):
+            with CaptureQueriesContext(connection) as queries:
+                response = client.get(url)
+            for query in queries:
+                if 'django_session' not in query['sql']:
+                    continue
+                if query['sql'].lstrip().upper().startswith(WRITE_PREFIXES):
+                    writes += 1
+                else:
+                    reads += 1
+            cookies += settings.SESSION_COOKIE_NAME in response.cookies
+        return reads, writes, cookies
@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from d_autos_app.analytics import build_revenue_cube
+
+
+class Command(BaseCommand):
+    help = 'Refill the revenue cube from all payments (run nightly)'
+
+    def handle(self, *args, **options):
+        cells = build_revenue_cube()
+        self.stdout.write(self.style.SUCCESS(f'Built revenue cube: {cells} cell(s)'))
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+from d_autos_app.fragments import fragment_counts, reset_fragment_counts
+
+
+class Command(BaseCommand):
+    help = (
+        'Show how often each cached dashboard table was served from the cache '
+        '(fragments are only cached, and counted, with a shared cache)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reset', action='store_true', help='Zero the counters afterwards')
+
+    def handle(self, *args, **options):
+        total_hits = total_misses = 0
+        for table, (hits, misses) in fragment_counts().items():
+            total_hits += hits
+            total_misses += misses
+            self.stdout.write(f'{table:<14} {hits:>8} hits {misses:>8} misses {hit_rate(hits, misses):>8}')
+        if options['reset']:
+            reset_fragment_counts()
+
+        self.stdout.write(self.style.SUCCESS(
+            f'{total_hits} hit(s), {total_misses} miss(es): {hit_rate(total_hits, total_misses)} served from the cache'
+        ))
+
+
+def hit_rate(hits, misses):
+    if not hits + misses:
+        return '-'
+    return f'{hits / (hits + misses):.0%}'
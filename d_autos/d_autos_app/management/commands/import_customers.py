@@ -0,0 +1,6 @@
+from .import_fleet import Command as ImportCommand
+
+
+class Command(ImportCommand):
+    help = 'Import customers from a CSV or Excel (.xlsx) file with one column per CustomerForm field'
+    kind = 'customers'
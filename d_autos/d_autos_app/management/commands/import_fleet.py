@@ -0,0 +1,43 @@
+import csv
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+from d_autos_app.importers import IMPORT_BATCH_SIZE, ImportFileError, error_messages, import_file
+
+
+class Command(BaseCommand):
+    help = 'Import cars from a CSV or Excel (.xlsx) file with one column per CarForm field'
+    kind = 'fleet'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV or .xlsx file')
+        parser.add_argument('--batch-size', type=int, default=IMPORT_BATCH_SIZE)
+        parser.add_argument(
+            '--report',
+            help='Write rejected rows (line, field, message) to this CSV file instead of stderr',
+        )
+
+    def handle(self, *args, **options):
+        report_file = open(options['report'], 'w', newline='') if options['report'] else sys.stderr
+        report = csv.writer(report_file)
+        report.writerow(['line', 'field', 'message'])
+
+        def on_error(line, errors):
+            for field, message in error_messages(errors):
+                report.writerow([line, field, message])
+
+        try:
+            with open(options['path'], 'rb') as file:
+                result = import_file(
+                    self.kind, file, options['path'],
+                    batch_size=options['batch_size'], on_error=on_error,
+                )
+        except (OSError, ImportFileError) as exc:
+            raise CommandError(exc)
+        finally:
+            if report_file is not sys.stderr:
+                report_file.close()
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {result.created} row(s); {result.failed} rejected'
+        ))
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand, CommandError
+from d_autos_app.query_plans import advise
+
+
+class Command(BaseCommand):
+    help = 'EXPLAIN the hot dashboard/list/export queries and flag full table scans'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--plans',
+            action='store_true',
+            help='Print every query plan, not only the flagged ones',
+        )
+
+    def handle(self, *args, **options):
+        flagged = 0
+        for name, plan, problems in advise():
+            if problems:
+                flagged += 1
+                self.stdout.write(self.style.WARNING(f'{name}: {"; ".join(problems)}'))
+            else:
+                self.stdout.write(f'{name}: ok')
+            if problems or options['plans']:
+                self.stdout.write(f'    {plan}'.replace('\n', '\n    '))
+        if flagged:
+            raise CommandError(f'{flagged} hot quer{"y" if flagged == 1 else "ies"} without a usable index')
+        self.stdout.write(self.style.SUCCESS('Every hot query is answered from an index'))
@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from d_autos_app.ledger import rebuild_customer_ledger
+
+
+class Command(BaseCommand):
+    help = 'Recompute every customer balance from all rentals and payments'
+
+    def handle(self, *args, **options):
+        rows = rebuild_customer_ledger()
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt customer ledger: {rows} customer(s)'))
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from d_autos_app.stats import rebuild_dashboard_stats
+
+
+class Command(BaseCommand):
+    help = 'Recompute the dashboard stats snapshot from rentals and payments'
+
+    def handle(self, *args, **options):
+        stats = rebuild_dashboard_stats()
+        self.stdout.write(self.style.SUCCESS(
+            f'Rebuilt dashboard stats: {stats.total_rentals} rentals, '
+            f'revenue ₵{stats.total_revenue}'
+        ))
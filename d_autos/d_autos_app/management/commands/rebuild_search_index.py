@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+from d_autos_app.search import rebuild_search_index
+
+
+class Command(BaseCommand):
+    help = 'Repopulate the customer and rental full-text search tables'
+
+    def handle(self, *args, **options):
+        if rebuild_search_index():
+            self.stdout.write(self.style.SUCCESS('Rebuilt the search index'))
+        else:
+            self.stdout.write('No full-text tables on this database; nothing to rebuild')
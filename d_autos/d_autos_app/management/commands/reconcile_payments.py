@@ -0,0 +1,45 @@
+import csv
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+from d_autos_app.importers import ImportFileError
+from d_autos_app.reconciliation import RECONCILE_BATCH_SIZE, reconcile_file
+
+
+class Command(BaseCommand):
+    help = (
+        'Mark payments paid from a processor or mobile-money statement (CSV or .xlsx) '
+        'with transaction_id and amount columns'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV or .xlsx statement')
+        parser.add_argument('--batch-size', type=int, default=RECONCILE_BATCH_SIZE)
+        parser.add_argument(
+            '--report',
+            help='Write unmatched and mismatched lines (line, transaction_id, problem) '
+                 'to this CSV file instead of stderr',
+        )
+
+    def handle(self, *args, **options):
+        report_file = open(options['report'], 'w', newline='') if options['report'] else sys.stderr
+        report = csv.writer(report_file)
+        report.writerow(['line', 'transaction_id', 'problem'])
+
+        try:
+            with open(options['path'], 'rb') as file:
+                result = reconcile_file(
+                    file, options['path'],
+                    batch_size=options['batch_size'],
+                    on_problem=lambda *problem: report.writerow(problem),
+                )
+        except (OSError, ImportFileError) as exc:
+            raise CommandError(exc)
+        finally:
+            if report_file is not sys.stderr:
+                report_file.close()
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Marked {result.matched} payment(s) paid; {result.already_paid} already paid, '
+            f'{result.problems} line(s) need attention'
+        ))
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+from d_autos_app.models import Rental
+from d_autos_app.pricing import REPRICE_BATCH_SIZE, reprice_rentals
+
+
+class Command(BaseCommand):
+    help = 'Recompute rental totals from the current equipment rates and car prices'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help='Reprice returned rentals too (default: active rentals only)',
+        )
+        parser.add_argument('--batch-size', type=int, default=REPRICE_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        rentals = Rental.objects.all() if options['all'] else Rental.objects.filter(status='active')
+        changed = reprice_rentals(rentals, batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Repriced {changed} rental(s)'))
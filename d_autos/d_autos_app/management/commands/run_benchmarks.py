@@ -0,0 +1,60 @@
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from d_autos_app import benchmarks
+
+
+class Command(BaseCommand):
+    help = (
+        'Time and count the queries of dashboards, lists, search and rental '
+        'creation on freshly seeded test databases; results are saved as JSON'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--scales', nargs='+', choices=list(benchmarks.SCALES), default=list(benchmarks.SCALES),
+            help='Data set sizes, in rentals',
+        )
+        parser.add_argument('--repeat', type=int, default=benchmarks.BENCHMARK_REPEAT)
+        parser.add_argument(
+            '--scenario', action='append', dest='scenarios',
+            help='Only run this scenario (repeatable), e.g. "rental list"',
+        )
+        parser.add_argument('--output', help='JSON file to write (default: benchmarks/<timestamp>.json)')
+        parser.add_argument('--compare', help='Earlier results JSON; fail on regressions against it')
+
+    def handle(self, *args, **options):
+        results = {'environment': benchmarks.environment(), 'scales': {}}
+        for scale in options['scales']:
+            self.stdout.write(f'== {scale} rentals')
+            results['scales'][scale] = result = self.run_scale(scale, options)
+            self.stdout.write(f'   seeded in {result["seed_seconds"]}s')
+            for name, measured in result['scenarios'].items():
+                self.stdout.write(
+                    f'   {name:<28} {measured["median_ms"]:>10.1f} ms {measured["queries"]:>5} queries'
+                )
+
+        output = Path(options['output'] or settings.BASE_DIR / 'benchmarks' / f'{time.strftime("%Y%m%d-%H%M%S")}.json')
+        benchmarks.save_results(results, output)
+        self.stdout.write(self.style.SUCCESS(f'Saved {output}'))
+
+        if options['compare']:
+            found = benchmarks.regressions(benchmarks.load_results(options['compare']), results)
+            for message in found:
+                self.stdout.write(self.style.WARNING(message))
+            if found:
+                raise CommandError(f'{len(found)} regression(s) against {options["compare"]}')
+
+    def run_scale(self, scale, options):
+        # Each scale gets its own throwaway database; the real one is untouched
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            return benchmarks.run_scale(
+                benchmarks.SCALES[scale], options['repeat'], options['scenarios'],
+            )
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
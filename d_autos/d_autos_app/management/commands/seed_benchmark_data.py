@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+from d_autos_app.seeding import SEED_BATCH_SIZE, seed_benchmark_data, table_sizes
+
+
+class Command(BaseCommand):
+    help = 'Add synthetic cars, customers, employees, rentals, payments, reservations and maintenance'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rentals', type=int, default=1000,
+            help='Rentals to create; the other tables are sized in proportion',
+        )
+        parser.add_argument('--seed', type=int, default=0, help='Random seed (same seed, same data)')
+        parser.add_argument('--batch-size', type=int, default=SEED_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        sizes = table_sizes(options['rentals'])
+        self.stdout.write('Seeding ' + ', '.join(f'{count} {table}' for table, count in sizes.items()))
+        rows = seed_benchmark_data(options['rentals'], options['seed'], options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            'Created ' + ', '.join(f'{count} {table}' for table, count in rows.items())
+        ))
@@ -0,0 +1,42 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from d_autos_app.service_due import (
+    NO_DATE, NO_KM, SERVICE_DUE_DAYS, SERVICE_DUE_KM, check_horizon, overdue_maintenances,
+    service_queue,
+)
+
+
+class Command(BaseCommand):
+    help = 'List cars due or overdue for service by date or mileage, most urgent first'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=SERVICE_DUE_DAYS,
+                            help='Include services due within this many days')
+        parser.add_argument('--km', type=int, default=SERVICE_DUE_KM,
+                            help='Include services due within this many kilometres')
+        parser.add_argument('--limit', type=int, default=50, help='Show at most this many cars')
+
+    def handle(self, *args, **options):
+        try:
+            check_horizon(options['days'], options['km'])
+        except ValueError as exc:
+            raise CommandError(exc)
+        today = date.today()
+        queue = service_queue(options['days'], options['km'], today)
+        rows = queue.values_list(
+            'plate_number', 'brand', 'model', 'due_date', 'km_left', 'due_rank'
+        )[:options['limit']]
+        for plate, brand, model, due_date, km_left, due_rank in rows:
+            targets = []
+            if due_date != NO_DATE:
+                targets.append(f'{due_date} ({(due_date - today).days:+d} days)')
+            if km_left != NO_KM:
+                targets.append(f'{km_left} km left')
+            flag = ' OVERDUE' if due_rank == 0 else ''
+            self.stdout.write(f'{plate:<12} {brand} {model}: {", ".join(targets)}{flag}')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'{queue.count()} car(s) due for service; '
+            f'{overdue_maintenances(today).count()} scheduled maintenance(s) overdue'
+        ))
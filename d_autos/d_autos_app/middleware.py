@@ -1,6 +1,114 @@
+import json
+import logging
+import random
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
 from django.shortcuts import redirect
 from django.urls import reverse
 
+from .profiling import RequestProfile, current_profile
+
+slow_request_log = logging.getLogger('d_autos_app.slow_requests')
+
+
+class ProfilingMiddleware:
+    """
+    Opt-in (PROFILING_ENABLED) per-request timing of SQL, template rendering
+    and the view, sent back in a Server-Timing header.
+
+    Only a PROFILING_SAMPLE_RATE share of requests is measured; the rest
+    pass straight through. Measured requests slower than
+    PROFILING_SLOW_REQUEST_MS are written, with their slowest queries, to
+    the d_autos_app.slow_requests log as one JSON object per line. Put it
+    first in MIDDLEWARE so "total" covers the other middleware too.
+    Queries run while a streaming response is iterated are not counted.
+    """
+
+    def __init__(self, get_response):
+        if not settings.PROFILING_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if random.random() >= settings.PROFILING_SAMPLE_RATE:
+            return self.get_response(request)
+
+        profile = RequestProfile()
+        token = current_profile.set(profile)
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(profile.record_query))
+                request.profile = profile
+                response = self.get_response(request)
+        finally:
+            current_profile.reset(token)
+        if profile.view_started is not None:
+            profile.view_seconds = time.perf_counter() - profile.view_started
+
+        total = profile.total_seconds
+        response['Server-Timing'] = profile.server_timing(total)
+        if total * 1000 >= settings.PROFILING_SLOW_REQUEST_MS:
+            self.log_slow_request(request, response, profile, total)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        profile = getattr(request, 'profile', None)
+        if profile is not None:
+            profile.view_started = time.perf_counter()
+            profile.view_name = f'{view_func.__module__}.{view_func.__qualname__}'
+
+    def log_slow_request(self, request, response, profile, total):
+        user = getattr(request, 'user', None)
+        slow_request_log.warning(json.dumps({
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            'method': request.method,
+            'path': request.get_full_path(),
+            'view': profile.view_name,
+            'status': response.status_code,
+            'user_id': user.pk if user is not None and user.is_authenticated else None,
+            'total_ms': round(total * 1000, 2),
+            'view_ms': round(profile.view_seconds * 1000, 2),
+            'template_ms': round(profile.template_seconds * 1000, 2),
+            'db_ms': round(profile.db_seconds * 1000, 2),
+            'queries': len(profile.queries),
+            'slowest_queries': profile.slowest_queries(settings.PROFILING_SLOW_QUERIES),
+        }))
+
+
+
+class SessionRefreshMiddleware:
+    """
+    Keep the sliding session expiry without a session write per request.
+
+    A session is saved (and its cookie and stored expiry pushed forward by
+    SESSION_COOKIE_AGE) only when a view changed it or when its last refresh
+    is older than SESSION_REFRESH_INTERVAL seconds. An idle session thus
+    expires between SESSION_COOKIE_AGE minus the interval and
+    SESSION_COOKIE_AGE after the last request.
+    """
+
+    REFRESHED_KEY = '_refreshed_at'
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        session = getattr(request, 'session', None)
+        # Nothing to refresh for visitors without a session or after logout
+        if session is None or session.is_empty():
+            return response
+        now = int(time.time())
+        if session.modified or now - session.get(self.REFRESHED_KEY, 0) >= settings.SESSION_REFRESH_INTERVAL:
+            session[self.REFRESHED_KEY] = now
+        return response
+
+
 class UserTypeMiddleware:
     """Middleware to check user type and redirect accordingly."""
 
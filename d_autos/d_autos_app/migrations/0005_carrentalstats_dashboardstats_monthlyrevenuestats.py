@@ -0,0 +1,52 @@
+# Generated by Django 5.2.18 on 2026-10-18 05:37
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('d_autos_app', '0004_car_daily_rate_car_license_plate_car_status'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CarRentalStats',
+            fields=[
+                ('car', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='rental_stats', serialize=False, to='d_autos_app.car')),
+                ('rental_count', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Car Rental Stats',
+                'verbose_name_plural': 'Car Rental Stats',
+            },
+        ),
+        migrations.CreateModel(
+            name='DashboardStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('total_customers', models.PositiveIntegerField(default=0)),
+                ('total_cars', models.PositiveIntegerField(default=0)),
+                ('total_rentals', models.PositiveIntegerField(default=0)),
+                ('total_revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Dashboard Stats',
+                'verbose_name_plural': 'Dashboard Stats',
+            },
+        ),
+        migrations.CreateModel(
+            name='MonthlyRevenueStats',
+            fields=[
+                ('month', models.DateField(primary_key=True, serialize=False)),
+                ('total', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+            ],
+            options={
+                'verbose_name': 'Monthly Revenue Stats',
+                'verbose_name_plural': 'Monthly Revenue Stats',
+                'ordering': ['month'],
+            },
+        ),
+    ]
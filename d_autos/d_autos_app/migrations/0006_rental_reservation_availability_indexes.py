@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-18 05:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('d_autos_app', '0005_carrentalstats_dashboardstats_monthlyrevenuestats'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='rental',
+            index=models.Index(fields=['car', 'rental_date', 'return_date'], name='d_autos_app_car_id_27f9c9_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reservation',
+            index=models.Index(fields=['car', 'start_date', 'end_date'], name='d_autos_app_car_id_d6934d_idx'),
+        ),
+    ]
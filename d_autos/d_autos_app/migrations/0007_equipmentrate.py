@@ -0,0 +1,48 @@
+# Generated by Django 5.2.18 on 2026-10-18 05:46
+
+from decimal import Decimal
+
+from django.db import migrations, models
+
+
+# The rates Rental.save() used to hard-code
+INITIAL_RATES = {
+    'gps': Decimal('10.00'),
+    'child_seat': Decimal('5.00'),
+    'roof_rack': Decimal('8.00'),
+    'premium_insurance': Decimal('15.00'),
+    'driver': Decimal('20.00'),
+    'wifi': Decimal('12.00'),
+}
+
+
+def seed_rates(apps, schema_editor):
+    EquipmentRate = apps.get_model('d_autos_app', 'EquipmentRate')
+    EquipmentRate.objects.bulk_create(
+        EquipmentRate(equipment=code, daily_rate=rate) for code, rate in INITIAL_RATES.items()
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('d_autos_app', '0006_rental_reservation_availability_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EquipmentRate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('equipment', models.CharField(choices=[('gps', 'GPS Navigation'), ('child_seat', 'Child Seat'), ('roof_rack', 'Roof Rack'), ('premium_insurance', 'Premium Insurance'), ('driver', 'Additional Driver'), ('wifi', 'Mobile WiFi')], max_length=30, unique=True)),
+                ('daily_rate', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Equipment Rate',
+                'verbose_name_plural': 'Equipment Rates',
+                'ordering': ['equipment'],
+            },
+        ),
+        migrations.RunPython(seed_rates, migrations.RunPython.noop),
+    ]
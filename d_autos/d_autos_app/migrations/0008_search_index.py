@@ -0,0 +1,58 @@
+# Generated by Django 5.2.18 on 2026-10-18 05:49
+
+from django.db import migrations
+
+SQLITE_FORWARDS = [
+    "CREATE VIRTUAL TABLE d_autos_app_customer_fts USING fts5("
+    "first_name, last_name, email, license_number, tokenize='unicode61 remove_diacritics 2')",
+    "INSERT INTO d_autos_app_customer_fts (rowid, first_name, last_name, email, license_number) "
+    "SELECT id, first_name, last_name, email, license_number FROM d_autos_app_customer",
+    "CREATE VIRTUAL TABLE d_autos_app_rental_fts USING fts5("
+    "first_name, last_name, brand, model, tokenize='unicode61 remove_diacritics 2')",
+    "INSERT INTO d_autos_app_rental_fts (rowid, first_name, last_name, brand, model) "
+    "SELECT r.id, cu.first_name, cu.last_name, ca.brand, ca.model "
+    "FROM d_autos_app_rental r "
+    "JOIN d_autos_app_customer cu ON cu.id = r.customer_id "
+    "JOIN d_autos_app_car ca ON ca.id = r.car_id",
+]
+
+SQLITE_BACKWARDS = [
+    "DROP TABLE IF EXISTS d_autos_app_customer_fts",
+    "DROP TABLE IF EXISTS d_autos_app_rental_fts",
+]
+
+
+def sqlite_has_fts5(cursor):
+    cursor.execute("SELECT sqlite_compileoption_used('ENABLE_FTS5')")
+    return bool(cursor.fetchone()[0])
+
+
+def create_search_index(apps, schema_editor):
+    connection = schema_editor.connection
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            # Without FTS5 search falls back to substring matching
+            if sqlite_has_fts5(cursor):
+                for sql in SQLITE_FORWARDS:
+                    cursor.execute(sql)
+        elif connection.vendor == 'postgresql':
+            cursor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+
+
+def drop_search_index(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            for sql in SQLITE_BACKWARDS:
+                cursor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('d_autos_app', '0007_equipmentrate'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
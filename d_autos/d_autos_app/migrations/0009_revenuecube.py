@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-18 06:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('d_autos_app', '0008_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dashboardstats',
+            name='revenue_cube_built_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.CreateModel(
+            name='RevenueCube',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period', models.CharField(choices=[('day', 'Day'), ('week', 'Week'), ('month', 'Month')], max_length=10)),
+                ('bucket', models.DateField()),
+                ('dimension', models.CharField(choices=[('all', 'All payments'), ('car', 'Car'), ('brand', 'Brand'), ('fuel_type', 'Fuel type'), ('payment_method', 'Payment method'), ('employee', 'Employee')], max_length=20)),
+                ('key', models.CharField(blank=True, max_length=100)),
+                ('total', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('payments', models.IntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Revenue Cube Cell',
+                'verbose_name_plural': 'Revenue Cube',
+                'constraints': [models.UniqueConstraint(fields=('period', 'dimension', 'bucket', 'key'), name='revenue_cube_cell')],
+            },
+        ),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 5.2.18 on 2026-10-18 06:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('d_autos_app', '0009_revenuecube'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='car',
+            index=models.Index(condition=models.Q(('availability', True)), fields=['id'], name='car_available_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='maintenance',
+            index=models.Index(fields=['scheduled_date', 'id'], name='d_autos_app_schedul_07d07d_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='maintenance',
+            index=models.Index(fields=['employee', 'scheduled_date'], name='d_autos_app_employe_a5af18_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='maintenance',
+            index=models.Index(fields=['status', 'scheduled_date'], name='d_autos_app_status_232841_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='payment',
+            index=models.Index(fields=['payment_date', 'id'], name='d_autos_app_payment_4d21a2_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='rental',
+            index=models.Index(fields=['rental_date', 'id'], name='d_autos_app_rental__9942e1_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='rental',
+            index=models.Index(fields=['status', 'rental_date'], name='d_autos_app_status_43e7bf_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='rental',
+            index=models.Index(fields=['status', 'id'], name='d_autos_app_status_90fdcd_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='rental',
+            index=models.Index(fields=['employee', 'rental_date'], name='d_autos_app_employe_911a9a_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reservation',
+            index=models.Index(fields=['start_date', 'id'], name='d_autos_app_start_d_90741a_idx'),
+        ),
+    ]
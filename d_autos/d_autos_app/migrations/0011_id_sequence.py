@@ -0,0 +1,53 @@
+# Generated by Django 5.2.18 on 2026-10-18 06:11
+
+import re
+
+from django.db import migrations, models
+
+EMPLOYEE_ID_PATTERN = re.compile(r'^EMP-(\d+)$')
+EMPLOYEE_SEQUENCE = 'd_autos_app_employee_id_seq'
+
+
+def create_employee_sequence(apps, schema_editor):
+    """Start the employee ID counter after the highest EMP-NNNN in use."""
+    Employee = apps.get_model('d_autos_app', 'Employee')
+    IdSequence = apps.get_model('d_autos_app', 'IdSequence')
+    numbers = [
+        int(match.group(1))
+        for match in map(EMPLOYEE_ID_PATTERN.match, Employee.objects.values_list('employee_id', flat=True))
+        if match
+    ]
+    highest = max(numbers, default=0)
+    connection = schema_editor.connection
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute(f'CREATE SEQUENCE IF NOT EXISTS {EMPLOYEE_SEQUENCE}')
+            if highest:
+                cursor.execute('SELECT setval(%s, %s)', [EMPLOYEE_SEQUENCE, highest])
+    else:
+        IdSequence.objects.create(name='employee_id', last_value=highest)
+
+
+def drop_employee_sequence(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute(f'DROP SEQUENCE IF EXISTS {EMPLOYEE_SEQUENCE}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('d_autos_app', '0010_hot_query_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IdSequence',
+            fields=[
+                ('name', models.CharField(max_length=50, primary_key=True, serialize=False)),
+                ('last_value', models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(create_employee_sequence, drop_employee_sequence),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-18 06:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('d_autos_app', '0011_id_sequence'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='payment',
+            index=models.Index(fields=['transaction_id'], name='d_autos_app_transac_b0533a_idx'),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-18 06:27
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('d_autos_app', '0012_payment_transaction_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dashboardstats',
+            name='ledger_built_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.CreateModel(
+            name='CustomerLedger',
+            fields=[
+                ('customer', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='ledger', serialize=False, to='d_autos_app.customer')),
+                ('charged', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('deposits', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('paid', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('balance', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Customer Ledger',
+                'verbose_name_plural': 'Customer Ledgers',
+                'indexes': [models.Index(condition=models.Q(('balance__gt', 0)), fields=['-balance', '-customer'], name='ledger_outstanding_idx')],
+            },
+        ),
+    ]
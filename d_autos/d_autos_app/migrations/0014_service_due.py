@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-18 06:29
+
+from django.db import migrations, models
+from django.db.models import Max, OuterRef, Subquery
+
+
+def fill_last_service_date(apps, schema_editor):
+    """Date of each car's latest completed maintenance."""
+    Car = apps.get_model('d_autos_app', 'Car')
+    Maintenance = apps.get_model('d_autos_app', 'Maintenance')
+    latest = (
+        Maintenance.objects.filter(car=OuterRef('pk'), status='completed')
+        .values('car').annotate(latest=Max('completed_date')).values('latest')
+    )
+    Car.objects.update(last_service_date=Subquery(latest))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('d_autos_app', '0013_customer_ledger'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='car',
+            name='last_service_date',
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='maintenance',
+            index=models.Index(fields=['car', 'status', 'completed_date'], name='d_autos_app_car_id_23ccd0_idx'),
+        ),
+        migrations.RunPython(fill_last_service_date, migrations.RunPython.noop),
+    ]
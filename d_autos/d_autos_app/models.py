@@ -56,12 +56,24 @@ class Car(models.Model):
     daily_rate = models.DecimalField(max_digits=10, decimal_places=2, blank=True, null=True)
     license_plate = models.CharField(max_length=20, blank=True, null=True)
     status = models.CharField(max_length=20, default='available')
+    # Set when a maintenance record is completed (Maintenance.save)
+    last_service_date = models.DateField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # Available cars, newest first (employee dashboard, car choices)
+            models.Index(
+                fields=['id'], condition=models.Q(availability=True),
+                name='car_available_idx',
+            ),
+        ]
 
     def __str__(self):
         return f"{self.brand} {self.model} ({self.plate_number})"
     
     
-    def save(self, *args, **kwargs):
+    def fill_derived_fields(self):
+        """Defaults save() fills in; bulk inserts call this themselves."""
         # Set daily_rate from rental_price_per_day if not set
         if not self.daily_rate and self.rental_price_per_day:
             self.daily_rate = self.rental_price_per_day
@@ -69,8 +81,49 @@ class Car(models.Model):
             self.license_plate = self.plate_number
         if not self.status:
             self.status = 'available' if self.availability else 'unavailable'
+
+    def save(self, *args, **kwargs):
+        self.fill_derived_fields()
         super().save(*args, **kwargs)
 
+# =========================
+# EQUIPMENT RATE MODEL
+# =========================
+class EquipmentRate(models.Model):
+    """Daily price of an optional extra that can be added to a rental."""
+
+    EQUIPMENT_CHOICES = [
+        ('gps', 'GPS Navigation'),
+        ('child_seat', 'Child Seat'),
+        ('roof_rack', 'Roof Rack'),
+        ('premium_insurance', 'Premium Insurance'),
+        ('driver', 'Additional Driver'),
+        ('wifi', 'Mobile WiFi'),
+    ]
+
+    # Rates used until a row exists for an item
+    DEFAULT_RATES = {
+        'gps': Decimal('10.00'),
+        'child_seat': Decimal('5.00'),
+        'roof_rack': Decimal('8.00'),
+        'premium_insurance': Decimal('15.00'),
+        'driver': Decimal('20.00'),
+        'wifi': Decimal('12.00'),
+    }
+
+    equipment = models.CharField(max_length=30, choices=EQUIPMENT_CHOICES, unique=True)
+    daily_rate = models.DecimalField(max_digits=10, decimal_places=2)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = 'Equipment Rate'
+        verbose_name_plural = 'Equipment Rates'
+        ordering = ['equipment']
+
+    def __str__(self):
+        return f"{self.get_equipment_display()}: ₵{self.daily_rate}/day"
+
+
 # =========================
 # RENTAL MODEL  
 # =========================
@@ -127,38 +180,46 @@ class Rental(models.Model):
     equipment_driver = models.BooleanField(default=False)
     equipment_wifi = models.BooleanField(default=False)
 
+    class Meta:
+        indexes = [
+            # Overlap probes of the availability engine (availability.py)
+            models.Index(fields=['car', 'rental_date', 'return_date']),
+            # Dashboard/recent lists, exports, repricing batches and the
+            # employee dashboard (checked by the index_advisor command)
+            models.Index(fields=['rental_date', 'id']),
+            models.Index(fields=['status', 'rental_date']),
+            models.Index(fields=['status', 'id']),
+            models.Index(fields=['employee', 'rental_date']),
+        ]
+
     def save(self, *args, **kwargs):
-        # Only prevent creating a new active rental for an unavailable car.
+        from .availability import CarUnavailable, is_car_available
+
+        # Only prevent creating a new active rental for a car that is already
+        # booked for these dates.
         # Allow saving/updating existing rentals (e.g., marking paid or updating fields).
-        if self.status == 'active' and not self.car.availability and getattr(self, '_state', None) and getattr(self._state, 'adding', False):
-            raise ValueError("This car is already rented.")
-
-        days = (self.return_date - self.rental_date).days
-        if days < 1:
-            days = 1
-
-        # Calculate base cost
-        base_cost = days * self.car.rental_price_per_day
-
-        # Add equipment costs
-        equipment_cost = 0
-        if self.equipment_gps:
-            equipment_cost += 10 * days
-        if self.equipment_child_seat:
-            equipment_cost += 5 * days
-        if self.equipment_roof_rack:
-            equipment_cost += 8 * days
-        if self.equipment_premium_insurance:
-            equipment_cost += 15 * days
-        if self.equipment_driver:
-            equipment_cost += 20 * days
-        if self.equipment_wifi:
-            equipment_cost += 12 * days
-
-        self.total_cost = base_cost + equipment_cost
-
-        self.car.availability = self.status != 'active'
-        self.car.save()
+        if self.status == 'active' and self._state.adding and not is_car_available(
+            self.car_id, self.rental_date, self.return_date, for_customer=self.customer_id
+        ):
+            raise CarUnavailable("This car is already rented.")
+
+        # Same engine as bulk repricing, so single and batch totals agree
+        from .pricing import price_rental
+        self.total_cost = price_rental(self)
+
+        # The flag means "out right now" (available_cars() reads it for
+        # ranges starting today): a booking for later dates leaves it alone,
+        # the overlap probe holds the car for those dates.
+        # Only write the car when its availability actually changes
+        if self.status != 'active':
+            availability = True
+        elif self.rental_date <= date.today() <= self.return_date:
+            availability = False
+        else:
+            availability = self.car.availability
+        if self.car.availability != availability:
+            self.car.availability = availability
+            self.car.save(update_fields=['availability'])
 
         super().save(*args, **kwargs)
 
@@ -202,6 +263,14 @@ class Payment(models.Model):
         help_text='Additional notes about this payment'
     )
 
+    class Meta:
+        indexes = [
+            # Dashboard table order and export date ranges
+            models.Index(fields=['payment_date', 'id']),
+            # Statement reconciliation (reconciliation.py)
+            models.Index(fields=['transaction_id']),
+        ]
+
     def save(self, *args, **kwargs):
         super().save(*args, **kwargs)
 
@@ -213,7 +282,7 @@ class Payment(models.Model):
             Rental.objects.filter(pk=self.rental_id).update(payment_status='paid')
 
     def __str__(self):
-        return f"Payment for Rental {self.rental.id}"
+        return f"Payment for Rental {self.rental_id}"
     
     
 
@@ -261,6 +330,14 @@ class Reservation(models.Model):
         help_text="Additional equipment requested (GPS, child seat, etc.)"
     )
 
+    class Meta:
+        indexes = [
+            # Overlap probes of the availability engine (availability.py)
+            models.Index(fields=['car', 'start_date', 'end_date']),
+            # Dashboard table order
+            models.Index(fields=['start_date', 'id']),
+        ]
+
     def __str__(self):
         return f"{self.customer} reserved {self.car}"
 
@@ -520,6 +597,11 @@ class Maintenance(models.Model):
             models.Index(fields=['status', 'priority']),
             models.Index(fields=['car', 'scheduled_date']),
             models.Index(fields=['employee', 'status']),
+            models.Index(fields=['scheduled_date', 'id']),
+            models.Index(fields=['employee', 'scheduled_date']),
+            models.Index(fields=['status', 'scheduled_date']),
+            # Latest completed service and open work per car (service_due.py)
+            models.Index(fields=['car', 'status', 'completed_date']),
         ]
     
     def __str__(self):
@@ -577,8 +659,8 @@ class Maintenance(models.Model):
         }
         return priority_classes.get(self.priority, 'priority-badge')
     
-    def save(self, *args, **kwargs):
-        # Auto-calculate next service if not set
+    def fill_next_service(self):
+        """Recommend the next service from this one, unless already set."""
         if not self.next_service_date and self.completed_date:
             # Add 6 months for most services, 1 year for major services
             if self.service_type in [self.TYPE_OIL_CHANGE, self.TYPE_TIRE_ROTATION, self.TYPE_GENERAL_SERVICE]:
@@ -589,6 +671,10 @@ class Maintenance(models.Model):
                 self.next_service_date = self.completed_date + timedelta(days=365)  # 1 year
                 if self.mileage_at_service:
                     self.next_service_mileage = self.mileage_at_service + 10000
+
+    def save(self, *args, **kwargs):
+        # Auto-calculate next service if not set
+        self.fill_next_service()
         
         # Auto-calculate warranty expiry if warranty period is set
         if self.warranty_period and self.completed_date and not self.warranty_expiry_date:
@@ -778,12 +864,170 @@ class Employee(models.Model):
     
     def save(self, *args, **kwargs):
         if not self.employee_id:
-            # Generate employee ID
-            last_employee = Employee.objects.order_by('id').last()
-            if last_employee:
-                last_id = int(last_employee.employee_id.split('-')[1])
-                new_id = f"EMP-{last_id + 1:04d}"
-            else:
-                new_id = "EMP-0001"
-            self.employee_id = new_id
-        super().save(*args, **kwargs)
\ No newline at end of file
+            # Next EMP-NNNN from the employee ID counter (sequences.py)
+            from .sequences import employee_ids
+            self.employee_id = employee_ids()[0]
+        super().save(*args, **kwargs)
+
+
+# =========================
+# DASHBOARD STATS
+# =========================
+class DashboardStats(models.Model):
+    """
+    Snapshot of the dashboard summary figures.
+
+    A single row (pk=1) kept current by the Rental/Payment/Customer/Car
+    signals in signals.py; see stats.py for the update and rebuild logic.
+    """
+
+    SINGLETON_PK = 1
+
+    total_customers = models.PositiveIntegerField(default=0)
+    total_cars = models.PositiveIntegerField(default=0)
+    total_rentals = models.PositiveIntegerField(default=0)
+    total_revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    # Set once the revenue cube has been filled; until then payment
+    # signals leave the cube alone (see analytics.py)
+    revenue_cube_built_at = models.DateTimeField(null=True, blank=True)
+    # Likewise for the customer ledger (see ledger.py)
+    ledger_built_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = 'Dashboard Stats'
+        verbose_name_plural = 'Dashboard Stats'
+
+    def __str__(self):
+        return f"Dashboard stats ({self.updated_at:%Y-%m-%d %H:%M})"
+
+
+class IdSequence(models.Model):
+    """
+    Counter handing out numbers for generated IDs (see sequences.py).
+    Unused on PostgreSQL, which has native sequences.
+    """
+
+    name = models.CharField(max_length=50, primary_key=True)
+    last_value = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.name}: {self.last_value}"
+
+
+class CarRentalStats(models.Model):
+    """Number of rentals recorded against each car."""
+
+    car = models.OneToOneField(
+        Car,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='rental_stats'
+    )
+    rental_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name = 'Car Rental Stats'
+        verbose_name_plural = 'Car Rental Stats'
+
+    def __str__(self):
+        return f"{self.car}: {self.rental_count} rentals"
+
+
+class MonthlyRevenueStats(models.Model):
+    """Sum of payment amounts per calendar month (keyed by its first day)."""
+
+    month = models.DateField(primary_key=True)
+    total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        verbose_name = 'Monthly Revenue Stats'
+        verbose_name_plural = 'Monthly Revenue Stats'
+        ordering = ['month']
+
+    def __str__(self):
+        return f"{self.month:%b %Y}: {self.total}"
+
+
+class RevenueCube(models.Model):
+    """
+    Payment totals per time bucket and dimension value, e.g. (month,
+    2025-03-01, brand, 'Toyota'). Filled by build_revenue_cube and kept
+    current by the Payment signals; see analytics.py.
+    """
+
+    PERIOD_CHOICES = [
+        ('day', 'Day'),
+        ('week', 'Week'),
+        ('month', 'Month'),
+    ]
+
+    DIMENSION_CHOICES = [
+        ('all', 'All payments'),
+        ('car', 'Car'),
+        ('brand', 'Brand'),
+        ('fuel_type', 'Fuel type'),
+        ('payment_method', 'Payment method'),
+        ('employee', 'Employee'),
+    ]
+
+    period = models.CharField(max_length=10, choices=PERIOD_CHOICES)
+    # First day of the bucket (weeks start on Monday)
+    bucket = models.DateField()
+    dimension = models.CharField(max_length=20, choices=DIMENSION_CHOICES)
+    # Dimension value: car/employee pk, brand, fuel type, method; '' if none
+    key = models.CharField(max_length=100, blank=True)
+    total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    payments = models.IntegerField(default=0)
+
+    class Meta:
+        verbose_name = 'Revenue Cube Cell'
+        verbose_name_plural = 'Revenue Cube'
+        constraints = [
+            # Also the index range queries walk: period, dimension, buckets
+            models.UniqueConstraint(
+                fields=['period', 'dimension', 'bucket', 'key'],
+                name='revenue_cube_cell',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.period} {self.bucket} {self.dimension}={self.key}: {self.total}"
+
+
+class CustomerLedger(models.Model):
+    """
+    What a customer has been charged and has paid, summed over their rentals
+    and payments. Filled by rebuild_customer_ledger and kept current by the
+    Rental/Payment signals; see ledger.py.
+    """
+
+    customer = models.OneToOneField(
+        Customer,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='ledger'
+    )
+    # Sum of rental total_cost
+    charged = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    # Sum of rental deposit_paid
+    deposits = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    # Sum of payment amounts
+    paid = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    # charged - deposits - paid; positive while the customer owes money
+    balance = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = 'Customer Ledger'
+        verbose_name_plural = 'Customer Ledgers'
+        indexes = [
+            # The outstanding balances page, largest first
+            models.Index(
+                fields=['-balance', '-customer'], condition=models.Q(balance__gt=0),
+                name='ledger_outstanding_idx',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.customer}: {self.balance}"
@@ -0,0 +1,111 @@
+import base64
+import json
+
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+
+# Number of rows sent to the browser per dashboard table request
+DASHBOARD_PAGE_SIZE = 25
+
+
+class InvalidCursor(ValueError):
+    """Raised when a pagination cursor cannot be decoded."""
+
+
+class KeysetPage:
+    """One page of rows plus the cursor pointing at the next page."""
+
+    def __init__(self, rows, next_cursor=None):
+        self.rows = rows
+        self.next_cursor = next_cursor
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def __iter__(self):
+        return iter(self.rows)
+
+    def __len__(self):
+        return len(self.rows)
+
+
+def encode_cursor(values):
+    """Encode the ordering key of the last row on a page."""
+    payload = json.dumps(values, cls=DjangoJSONEncoder, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode()
+
+
+def decode_cursor(cursor):
+    """Decode a cursor produced by encode_cursor."""
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (ValueError, TypeError) as exc:
+        raise InvalidCursor(cursor) from exc
+    if not isinstance(values, list):
+        raise InvalidCursor(cursor)
+    return values
+
+
+def _seek_filter(ordering, values):
+    """
+    Build the WHERE clause that selects rows strictly after ``values``.
+
+    For an ordering (a, b, c) this expands to
+    a > x OR (a = x AND b > y) OR (a = x AND b = y AND c > z),
+    with < instead of > for descending fields. The redundant a >= x in
+    front lets the database seek into an index on (a, ...) instead of
+    walking it from the start.
+    """
+    condition = Q()
+    equal = Q()
+    for field, value in zip(ordering, values):
+        name = field.lstrip('-')
+        lookup = 'lt' if field.startswith('-') else 'gt'
+        condition |= equal & Q(**{f'{name}__{lookup}': value})
+        equal &= Q(**{name: value})
+    first, value = ordering[0], values[0]
+    bound = Q(**{f"{first.lstrip('-')}__{'lte' if first.startswith('-') else 'gte'}": value})
+    return bound & condition
+
+
+def page_queryset(queryset, ordering, cursor=None, page_size=DASHBOARD_PAGE_SIZE):
+    """The unevaluated query for one page, plus one row to detect a next page."""
+    queryset = queryset.order_by(*ordering)
+    if cursor:
+        values = decode_cursor(cursor)
+        if len(values) != len(ordering):
+            raise InvalidCursor(cursor)
+        try:
+            queryset = queryset.filter(_seek_filter(ordering, values))
+        except (ValidationError, ValueError, TypeError) as exc:
+            raise InvalidCursor(cursor) from exc
+    return queryset[:page_size + 1]
+
+
+def keyset_paginate(queryset, ordering, cursor=None, page_size=DASHBOARD_PAGE_SIZE):
+    """
+    Return one page of ``queryset`` ordered by ``ordering``.
+
+    ``ordering`` must end with a unique field (normally ``id``) so that every
+    row has a distinct position. Unlike OFFSET pagination the cost of a page
+    does not depend on how deep into the table it is.
+    """
+    rows = list(page_queryset(queryset, ordering, cursor, page_size))
+    return _keyset_page(rows, ordering, page_size)
+
+
+async def akeyset_paginate(queryset, ordering, cursor=None, page_size=DASHBOARD_PAGE_SIZE):
+    """keyset_paginate() for async views."""
+    rows = [row async for row in page_queryset(queryset, ordering, cursor, page_size)]
+    return _keyset_page(rows, ordering, page_size)
+
+
+def _keyset_page(rows, ordering, page_size):
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        last = rows[-1]
+        next_cursor = encode_cursor([getattr(last, field.lstrip('-')) for field in ordering])
+    return KeysetPage(rows, next_cursor)
@@ -0,0 +1,103 @@
+from collections import defaultdict
+
+from django.db import transaction
+
+from . import versions
+from .ledger import record_charges
+from .models import EquipmentRate, Rental
+
+# Equipment code -> Rental boolean field, in a fixed order
+EQUIPMENT_FIELDS = {code: f'equipment_{code}' for code, _ in EquipmentRate.EQUIPMENT_CHOICES}
+
+REPRICE_BATCH_SIZE = 500
+
+
+def equipment_rates():
+    """Current daily rate per equipment code, falling back to the defaults."""
+    rates = dict(EquipmentRate.DEFAULT_RATES)
+    rates.update(EquipmentRate.objects.values_list('equipment', 'daily_rate'))
+    return rates
+
+
+def rental_days(start, end):
+    """Billable days; anything shorter than a day is charged as one."""
+    return max((end - start).days, 1)
+
+
+class PriceList:
+    """
+    Rates frozen for one pricing run.
+
+    The daily equipment surcharge depends only on which extras are selected,
+    so it is computed once per combination (at most 2**6) rather than once
+    per rental.
+    """
+
+    def __init__(self, rates=None):
+        rates = equipment_rates() if rates is None else rates
+        self.rates = tuple(rates[code] for code in EQUIPMENT_FIELDS)
+        self._surcharges = {}
+
+    def surcharge(self, selected):
+        """Daily price of the extras flagged in ``selected`` (EQUIPMENT_FIELDS order)."""
+        selected = tuple(bool(flag) for flag in selected)
+        try:
+            return self._surcharges[selected]
+        except KeyError:
+            total = sum(rate for rate, flag in zip(self.rates, selected) if flag)
+            self._surcharges[selected] = total
+            return total
+
+    def total(self, start, end, car_daily_price, selected):
+        return rental_days(start, end) * (car_daily_price + self.surcharge(selected))
+
+
+def price_rental(rental, prices=None):
+    """Total cost of a single (possibly unsaved) rental."""
+    prices = prices or PriceList()
+    selected = [getattr(rental, field) for field in EQUIPMENT_FIELDS.values()]
+    return prices.total(
+        rental.rental_date, rental.return_date, rental.car.rental_price_per_day, selected
+    )
+
+
+def reprice_rentals(rentals=None, prices=None, batch_size=REPRICE_BATCH_SIZE):
+    """
+    Recompute ``total_cost`` for every rental in ``rentals`` (default: all
+    active rentals) and return how many changed.
+
+    Rows are read as plain tuples in primary-key batches, priced in memory
+    and written back with one bulk_update per batch; unchanged rows are not
+    written. Like queryset.update(), this bypasses Rental.save() and its
+    signals; the customer ledger is adjusted once per customer and the
+    rentals table version bumped once instead.
+    """
+    if rentals is None:
+        rentals = Rental.objects.filter(status='active')
+    prices = prices or PriceList()
+    rows = rentals.order_by('pk').values_list(
+        'pk', 'customer_id', 'rental_date', 'return_date', 'total_cost',
+        'car__rental_price_per_day', *EQUIPMENT_FIELDS.values()
+    )
+
+    changed = 0
+    charges = defaultdict(int)
+    last_pk = 0
+    with transaction.atomic():
+        while True:
+            batch = list(rows.filter(pk__gt=last_pk)[:batch_size])
+            if not batch:
+                break
+            last_pk = batch[-1][0]
+            updates = []
+            for pk, customer_id, start, end, current, car_price, *selected in batch:
+                total = prices.total(start, end, car_price, selected)
+                if total != current:
+                    updates.append(Rental(pk=pk, total_cost=total))
+                    charges[customer_id] += total - current
+            Rental.objects.bulk_update(updates, ['total_cost'])
+            changed += len(updates)
+        record_charges(charges)
+        if changed:
+            versions.changed(versions.table_version(Rental))
+    return changed
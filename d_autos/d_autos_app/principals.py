@@ -0,0 +1,55 @@
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import cache
+
+from . import versions
+from .models import User
+
+PRINCIPAL_TIMEOUT = 300
+
+
+def principal_version(user_id):
+    return f'principal:{user_id}'
+
+
+def get_principal(user_id):
+    """
+    The user with ``user_id`` and their employee profile (or None), cached.
+
+    Entries are keyed on the user's version, which a User or Employee save
+    or delete moves on, so edits, deactivations and password changes show
+    up on the next request. Without a shared cache (settings.SHARED_CACHE)
+    another process would never see that move, so nothing is cached.
+    """
+    if not settings.SHARED_CACHE:
+        return load_principal(user_id)
+    key = 'd_autos:principal:{}:{}'.format(user_id, versions.get_version(principal_version(user_id)))
+    user = cache.get(key)
+    if user is None:
+        user = load_principal(user_id)
+        if user is not None:
+            cache.set(key, user, PRINCIPAL_TIMEOUT)
+    return user
+
+
+def load_principal(user_id):
+    # A missing profile is loaded (and cached) too: employee_profile then
+    # raises DoesNotExist without a query
+    return User.objects.select_related('employee_profile').filter(pk=user_id).first()
+
+
+def principal_changed(user_id):
+    versions.changed(principal_version(user_id))
+
+
+class CachedModelBackend(ModelBackend):
+    """ModelBackend whose per-request user lookup reads get_principal()."""
+
+    def get_user(self, user_id):
+        user = get_principal(user_id)
+        return user if user is not None and self.user_can_authenticate(user) else None
+
+    async def aget_user(self, user_id):
+        # request.auser() in async views; ModelBackend's would skip the cache
+        return await sync_to_async(self.get_user)(user_id)
@@ -0,0 +1,84 @@
+import time
+from contextvars import ContextVar
+
+from django.template import TemplateDoesNotExist
+from django.template.backends.django import DjangoTemplates, Template, reraise
+
+SLOW_QUERY_SQL_LENGTH = 500
+
+# The profile of the request being handled in this thread/task, if sampled
+current_profile = ContextVar('current_profile', default=None)
+
+
+class RequestProfile:
+    """Timings (in seconds) gathered while one request is handled."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.view_started = None
+        self.view_name = None
+        self.view_seconds = 0.0
+        self.template_seconds = 0.0
+        self.queries = []  # (seconds, sql)
+
+    @property
+    def total_seconds(self):
+        return time.perf_counter() - self.started
+
+    @property
+    def db_seconds(self):
+        return sum(seconds for seconds, sql in self.queries)
+
+    def record_query(self, execute, sql, params, many, context):
+        """connection.execute_wrapper() hook."""
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append((time.perf_counter() - started, sql))
+
+    def slowest_queries(self, count):
+        return [
+            {'ms': round(seconds * 1000, 2), 'sql': sql[:SLOW_QUERY_SQL_LENGTH]}
+            for seconds, sql in sorted(self.queries, key=lambda query: query[0], reverse=True)[:count]
+        ]
+
+    def server_timing(self, total_seconds):
+        """Server-Timing header value (durations in milliseconds)."""
+        return ', '.join([
+            f'db;dur={self.db_seconds * 1000:.1f};desc="{len(self.queries)} queries"',
+            f'tpl;dur={self.template_seconds * 1000:.1f}',
+            f'view;dur={self.view_seconds * 1000:.1f}',
+            f'total;dur={total_seconds * 1000:.1f}',
+        ])
+
+
+# ================= TEMPLATE TIMING =================
+class ProfiledTemplate(Template):
+
+    def render(self, context=None, request=None):
+        profile = current_profile.get()
+        if profile is None:
+            return super().render(context, request)
+        started = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            profile.template_seconds += time.perf_counter() - started
+
+
+class ProfilingDjangoTemplates(DjangoTemplates):
+    """
+    The Django template backend, timing top-level renders (render(),
+    render_to_string()) of requests ProfilingMiddleware samples. Included
+    templates count towards the template that includes them.
+    """
+
+    def from_string(self, template_code):
+        return ProfiledTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        try:
+            return ProfiledTemplate(self.engine.get_template(template_name), self)
+        except TemplateDoesNotExist as exc:
+            reraise(exc, self)
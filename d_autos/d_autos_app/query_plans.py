@@ -0,0 +1,108 @@
+import re
+from datetime import date, timedelta
+
+from django.db import connection
+
+from .availability import available_cars
+from .exports import EXPORTS
+from .models import Car, CustomerLedger, Rental, RevenueCube
+from .pagination import encode_cursor, page_queryset
+from .pricing import REPRICE_BATCH_SIZE
+from .service_due import service_queue
+
+# SQLite: "SCAN <table>" without an index is a full scan (SEARCH and
+# "SCAN ... USING INDEX" are not). PostgreSQL: "Seq Scan on <table>".
+SQLITE_FULL_SCAN = re.compile(r'\bSCAN (\w+)(?! USING (?:COVERING )?INDEX)(?:\s|$)')
+POSTGRES_FULL_SCAN = re.compile(r'Seq Scan on (\w+)')
+SQLITE_SORT = 'USE TEMP B-TREE FOR ORDER BY'
+
+# Problems a hot query has by design. The service queue ranks every car on
+# computed keys; only its per-car maintenance lookups have to use an index.
+EXPECTED_PROBLEMS = {
+    'service queue': {f'full scan of {Car._meta.db_table}', 'sort without an index'},
+}
+
+
+def _next_page(queryset, ordering):
+    """A dashboard table's second page: the keyset seek the view runs."""
+    model = queryset.model
+    values = []
+    for field in ordering:
+        field = model._meta.get_field(field.lstrip('-'))
+        values.append(date.today() if field.get_internal_type() == 'DateField' else 1)
+    return page_queryset(queryset, ordering, encode_cursor(values))
+
+
+def hot_queries():
+    """
+    Name -> queryset of every query a page or job runs per request/batch
+    that must be answered from an index rather than by reading whole tables.
+    Built with the views' own queryset functions, so they cannot drift apart.
+    """
+    # Imported here: views imports half the app
+    from .views import (
+        DASHBOARD_TABLES, employee_maintenances, employee_rentals, recent_available_cars,
+        recent_rentals,
+    )
+
+    today = date.today()
+    month_ago = today - timedelta(days=30)
+    queries = {}
+    for table, (queryset, ordering, template) in DASHBOARD_TABLES.items():
+        if ordering != ('id',):  # pk order is the table's own order
+            queries[f'dashboard {table}, next page'] = _next_page(queryset, ordering)
+
+    queries.update({
+        'recent rentals': recent_rentals(),
+        'employee dashboard rentals': employee_rentals(1),
+        'employee dashboard maintenances': employee_maintenances(1),
+        'recent available cars': recent_available_cars(),
+        'service queue': service_queue(),
+        'cars available today': available_cars(today, today + timedelta(days=3)),
+        'active rentals to reprice': (
+            Rental.objects.filter(status='active', pk__gt=0).order_by('pk')[:REPRICE_BATCH_SIZE]
+        ),
+        'revenue series': RevenueCube.objects.filter(
+            period='day', dimension='brand', bucket__gte=month_ago, bucket__lte=today,
+        ).order_by('bucket', 'key'),
+        # Not ledger.outstanding_balances(): it builds a missing ledger, and
+        # index_advisor must not write
+        'outstanding balances, next page': _next_page(
+            CustomerLedger.objects.select_related('customer').filter(balance__gt=0),
+            ('-balance', '-customer_id'),
+        ),
+    })
+    for table, export in EXPORTS.items():
+        status = export.statuses[0][0]
+        queries[f'{table} export by status and dates'] = (
+            export.filter(month_ago, today, status).order_by(export.date_field, 'pk')
+        )
+    return queries
+
+
+def explain(queryset):
+    """The backend's plan for ``queryset`` (EXPLAIN QUERY PLAN on SQLite)."""
+    return queryset.explain()
+
+
+def plan_problems(plan, vendor=None):
+    """Tables read in full, and sorts done without an index, in ``plan``."""
+    vendor = vendor or connection.vendor
+    problems = []
+    if vendor == 'sqlite':
+        problems += [f'full scan of {table}' for table in SQLITE_FULL_SCAN.findall(plan)]
+        if SQLITE_SORT in plan:
+            problems.append('sort without an index')
+    elif vendor == 'postgresql':
+        problems += [f'full scan of {table}' for table in POSTGRES_FULL_SCAN.findall(plan)]
+    return problems
+
+
+def advise():
+    """(name, plan, problems) for every hot query, less its EXPECTED_PROBLEMS."""
+    results = []
+    for name, queryset in hot_queries().items():
+        plan = explain(queryset)
+        expected = EXPECTED_PROBLEMS.get(name, set())
+        results.append((name, plan, [problem for problem in plan_problems(plan) if problem not in expected]))
+    return results
@@ -0,0 +1,125 @@
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+
+from django.db import transaction
+
+from . import versions
+from .importers import ImportFileError, read_rows
+from .models import Payment, Rental
+
+RECONCILE_BATCH_SIZE = 500
+STATEMENT_COLUMNS = ('transaction_id', 'amount')
+
+
+class ReconcileResult:
+    def __init__(self):
+        self.matched = 0
+        self.already_paid = 0
+        self.problems = 0
+
+
+def parse_amount(value):
+    try:
+        return Decimal(str(value).replace(',', '').strip())
+    except InvalidOperation:
+        return None
+
+
+class StatementReconciler:
+    """
+    Match processor/mobile-money statement lines to payments by
+    transaction ID and mark the matched payments (and their rentals) paid.
+
+    Lines are read lazily, ``batch_size`` at a time: one IN lookup finds the
+    batch's payments, then one UPDATE per table marks them paid, in one
+    transaction per batch. Lines that match nothing, match several payments,
+    repeat an earlier line or disagree on the amount are passed to
+    ``on_problem(line, transaction_id, message)`` and left alone.
+    """
+
+    def __init__(self, batch_size=RECONCILE_BATCH_SIZE, on_problem=None):
+        self.batch_size = batch_size
+        self.on_problem = on_problem or (lambda line, transaction_id, message: None)
+        self.seen = set()
+
+    def run(self, header, rows):
+        missing = [name for name in STATEMENT_COLUMNS if name not in header]
+        if missing:
+            raise ImportFileError(f'Missing column(s): {", ".join(missing)}')
+
+        result = ReconcileResult()
+        rows = iter(rows)
+        while True:
+            batch = list(islice(rows, self.batch_size))
+            if not batch:
+                break
+            self.reconcile(batch, result)
+        return result
+
+    def report(self, result, line, transaction_id, message):
+        result.problems += 1
+        self.on_problem(line, transaction_id, message)
+
+    def parse(self, batch, result):
+        """(line, transaction id, amount) for the usable lines of ``batch``."""
+        lines = []
+        for line, row in batch:
+            transaction_id = str(row['transaction_id']).strip()
+            amount = parse_amount(row['amount'])
+            if not transaction_id:
+                self.report(result, line, '', 'No transaction ID.')
+            elif amount is None:
+                self.report(result, line, transaction_id, f'Invalid amount "{row["amount"]}".')
+            elif transaction_id in self.seen:
+                self.report(result, line, transaction_id, 'Transaction ID repeated in the statement.')
+            else:
+                self.seen.add(transaction_id)
+                lines.append((line, transaction_id, amount))
+        return lines
+
+    @transaction.atomic
+    def reconcile(self, batch, result):
+        lines = self.parse(batch, result)
+        payments = {}
+        for payment in (
+            Payment.objects.filter(transaction_id__in=[transaction_id for line, transaction_id, amount in lines])
+            .values('pk', 'transaction_id', 'amount', 'payment_status', 'rental_id')
+        ):
+            payments.setdefault(payment['transaction_id'], []).append(payment)
+
+        to_pay = []
+        rentals = set()
+        for line, transaction_id, amount in lines:
+            found = payments.get(transaction_id, [])
+            if not found:
+                self.report(result, line, transaction_id, 'No payment with this transaction ID.')
+            elif len(found) > 1:
+                self.report(result, line, transaction_id, f'{len(found)} payments share this transaction ID.')
+            elif found[0]['amount'] != amount:
+                self.report(
+                    result, line, transaction_id,
+                    f'Statement amount {amount} differs from recorded {found[0]["amount"]}.',
+                )
+            elif found[0]['payment_status'] == 'paid':
+                result.already_paid += 1
+            else:
+                to_pay.append(found[0]['pk'])
+                if found[0]['rental_id']:
+                    rentals.add(found[0]['rental_id'])
+
+        # Set-based equivalent of Payment.save() marking each rental paid;
+        # the dashboard stats and revenue cube do not depend on the status
+        if to_pay:
+            Payment.objects.filter(pk__in=to_pay).update(payment_status='paid')
+        if rentals:
+            Rental.objects.filter(pk__in=rentals).exclude(payment_status='paid').update(payment_status='paid')
+        if to_pay:
+            versions.changed(versions.table_version(Payment))
+            versions.changed(versions.table_version(Rental))
+        result.matched += len(to_pay)
+
+
+def reconcile_file(file, filename, batch_size=RECONCILE_BATCH_SIZE, on_problem=None):
+    """Reconcile a CSV/Excel statement with transaction_id and amount columns."""
+    header, rows = read_rows(file, filename)
+    return StatementReconciler(batch_size, on_problem).run(header, rows)
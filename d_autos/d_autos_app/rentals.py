@@ -0,0 +1,96 @@
+from django.db import connection, transaction
+from django.db.models import F
+
+from . import versions
+from .availability import FLEET_VERSION, CarUnavailable  # noqa: F401  (re-exported for callers)
+from .models import Car, Rental
+
+
+class CheckInError(ValueError):
+    """Check-in rows that cannot be applied, as {rental id: message}."""
+
+    def __init__(self, errors):
+        self.errors = errors
+        super().__init__('; '.join(f'Rental {pk}: {message}' for pk, message in errors.items()))
+
+
+def lock_car(car_id):
+    """
+    Hold a write lock on ``car_id`` until the surrounding transaction ends
+    and return the car's current availability flag.
+
+    Backends with row locks use SELECT ... FOR UPDATE. SQLite has none but
+    takes its database-wide write lock on the first write of a transaction,
+    so there a no-op UPDATE of the row serializes competing bookings.
+    """
+    cars = Car.objects.filter(pk=car_id)
+    if connection.features.has_select_for_update:
+        return cars.select_for_update().values_list('availability', flat=True).get()
+    cars.update(availability=F('availability'))
+    return cars.values_list('availability', flat=True).get()
+
+
+@transaction.atomic
+def create_rental(rental):
+    """
+    Save a new rental, guaranteeing its car is not double-booked.
+
+    The availability check in Rental.save() runs while the car is locked, so
+    of several concurrent requests for the same car and dates exactly one
+    succeeds; the others raise CarUnavailable.
+    """
+    # Rental.save() compares against this to decide whether the car changes
+    rental.car.availability = lock_car(rental.car_id)
+    rental.save()
+    return rental
+
+
+@transaction.atomic
+def check_in_rentals(returns):
+    """
+    Return many rentals at once, e.g. the lot's returns at closing time.
+
+    ``returns`` holds (rental id, actual return date, mileage or None)
+    rows. Each rental is marked returned and its car available again, with
+    the odometer reading if one is given. Nothing is written unless every
+    row is valid (otherwise CheckInError). One SELECT, then one bulk UPDATE
+    for the rentals and one for the cars, however many rows there are;
+    like return_rental, the total cost is left as booked.
+    """
+    returns = list(returns)
+    rentals = (
+        Rental.objects.select_related('car')
+        .only('status', 'rental_date', 'actual_return_date', 'car__availability', 'car__mileage')
+        .in_bulk([pk for pk, day, mileage in returns])
+    )
+    errors = {}
+    cars = {}
+    for pk, day, mileage in returns:
+        rental = rentals.get(pk)
+        if rental is None:
+            errors[pk] = 'No such rental.'
+        elif rental.status != 'active':
+            errors[pk] = 'Already returned.'
+        elif day < rental.rental_date:
+            errors[pk] = 'The return date is before the rental date.'
+        elif mileage is not None and mileage < rental.car.mileage:
+            errors[pk] = f'The mileage is below the recorded {rental.car.mileage} km.'
+        else:
+            rental.status = 'returned'
+            rental.actual_return_date = day
+            car = cars.setdefault(rental.car_id, rental.car)
+            car.availability = True
+            if mileage is not None:
+                car.mileage = max(car.mileage, mileage)
+    if errors:
+        raise CheckInError(errors)
+
+    returned = [rentals[pk] for pk, day, mileage in returns]
+    Rental.objects.bulk_update(returned, ['status', 'actual_return_date'])
+    Car.objects.bulk_update(cars.values(), ['availability', 'mileage'])
+    # bulk_update sends no signals; the cached car choice lists and
+    # dashboard tables are stale
+    versions.changed(FLEET_VERSION)
+    versions.changed(versions.table_version(Rental))
+    versions.changed(versions.table_version(Car))
+    return returned
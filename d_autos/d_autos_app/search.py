@@ -0,0 +1,197 @@
+import re
+
+from django.db import connection, transaction
+from django.db.models import Case, IntegerField, Q, Value, When
+from django.db.models.functions import Concat
+
+from .models import Customer, Rental
+
+SEARCH_LIMIT = 50
+
+# SQLite FTS5 tables, keyed by the primary key of the row they index
+CUSTOMER_INDEX = 'd_autos_app_customer_fts'
+RENTAL_INDEX = 'd_autos_app_rental_fts'
+
+CUSTOMER_FIELDS = ('first_name', 'last_name', 'email', 'license_number')
+RENTAL_FIELDS = ('customer__first_name', 'customer__last_name', 'car__brand', 'car__model')
+
+# Rows for the rental index come straight from the joined tables so a
+# rental is indexed with what is stored, not what an instance has cached.
+RENTAL_INDEX_SELECT = (
+    'SELECT r.id, cu.first_name, cu.last_name, ca.brand, ca.model '
+    'FROM d_autos_app_rental r '
+    'JOIN d_autos_app_customer cu ON cu.id = r.customer_id '
+    'JOIN d_autos_app_car ca ON ca.id = r.car_id'
+)
+
+_fts_ready = False
+
+
+def search_terms(query):
+    """Words of ``query``, split the way the FTS5 unicode61 tokenizer does."""
+    return re.findall(r'\w+', query or '')
+
+
+def uses_fts():
+    """Whether the SQLite full-text tables exist on the default database."""
+    global _fts_ready
+    if not _fts_ready and connection.vendor == 'sqlite':
+        _fts_ready = CUSTOMER_INDEX in connection.introspection.table_names()
+    return _fts_ready
+
+
+def _in_rank_order(queryset, ids):
+    order = Case(
+        *[When(pk=pk, then=position) for position, pk in enumerate(ids)],
+        output_field=IntegerField(),
+    )
+    return queryset.filter(pk__in=ids).order_by(order)
+
+
+def _fts_search(queryset, table, terms, limit):
+    # Every word must match, each as a prefix: "jo smi" finds "John Smith"
+    match = ' '.join(f'"{term}"*' for term in terms)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'SELECT rowid FROM {table} WHERE {table} MATCH %s ORDER BY rank LIMIT %s',
+            [match, limit],
+        )
+        ids = [row[0] for row in cursor.fetchall()]
+    return _in_rank_order(queryset, ids)
+
+
+def _postgres_search(queryset, fields, terms, limit):
+    # Imported here: django.contrib.postgres needs psycopg installed
+    from django.contrib.postgres.search import (
+        SearchQuery, SearchRank, SearchVector, TrigramSimilarity,
+    )
+
+    vector = SearchVector(*fields, config='simple')
+    query = SearchQuery(
+        ' & '.join(f'{term}:*' for term in terms), config='simple', search_type='raw'
+    )
+    # Trigram similarity lets slightly misspelt names still rank
+    text = Concat(*[part for field in fields for part in (field, Value(' '))])
+    return (
+        queryset
+        .annotate(
+            search=vector,
+            rank=SearchRank(vector, query),
+            similarity=TrigramSimilarity(text, ' '.join(terms)),
+        )
+        .filter(Q(search=query) | Q(similarity__gt=0.3))
+        .order_by('-rank', '-similarity', 'pk')[:limit]
+    )
+
+
+def _substring_search(queryset, fields, terms, limit):
+    for term in terms:
+        matches = Q()
+        for field in fields:
+            matches |= Q(**{f'{field}__icontains': term})
+        queryset = queryset.filter(matches)
+    return queryset.order_by('pk')[:limit]
+
+
+def _search(queryset, table, fields, query, limit):
+    terms = search_terms(query)
+    if not terms:
+        return queryset.none()
+    if uses_fts():
+        return _fts_search(queryset, table, terms, limit)
+    if connection.vendor == 'postgresql':
+        return _postgres_search(queryset, fields, terms, limit)
+    return _substring_search(queryset, fields, terms, limit)
+
+
+def search_customers(query, limit=SEARCH_LIMIT, queryset=None):
+    """Best ``limit`` customers matching every word of ``query`` as a prefix."""
+    if queryset is None:
+        queryset = Customer.objects.all()
+    return _search(queryset, CUSTOMER_INDEX, CUSTOMER_FIELDS, query, limit)
+
+
+def search_rentals(query, limit=SEARCH_LIMIT, queryset=None):
+    """Best ``limit`` rentals whose customer or car matches ``query``."""
+    if queryset is None:
+        queryset = Rental.objects.all()
+    return _search(queryset, RENTAL_INDEX, RENTAL_FIELDS, query, limit)
+
+
+# ================= INDEX MAINTENANCE =================
+# Called from signals; no-ops unless the FTS5 tables are in use.
+def _execute(sql, params=()):
+    if uses_fts():
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+
+
+def index_customer(customer):
+    _execute(f'DELETE FROM {CUSTOMER_INDEX} WHERE rowid = %s', [customer.pk])
+    _execute(
+        f'INSERT INTO {CUSTOMER_INDEX} (rowid, first_name, last_name, email, license_number) '
+        'VALUES (%s, %s, %s, %s, %s)',
+        [customer.pk, customer.first_name, customer.last_name, customer.email,
+         customer.license_number],
+    )
+    # The customer's name is also part of each of their rentals' entries
+    _execute(
+        f'UPDATE {RENTAL_INDEX} SET first_name = %s, last_name = %s '
+        'WHERE rowid IN (SELECT id FROM d_autos_app_rental WHERE customer_id = %s)',
+        [customer.first_name, customer.last_name, customer.pk],
+    )
+
+
+def index_new_customers(customers):
+    """Index customers inserted with bulk_create (and so without signals)."""
+    if uses_fts():
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f'INSERT INTO {CUSTOMER_INDEX} (rowid, first_name, last_name, email, license_number) '
+                'VALUES (%s, %s, %s, %s, %s)',
+                [(c.pk, c.first_name, c.last_name, c.email, c.license_number) for c in customers],
+            )
+
+
+def unindex_customer(customer):
+    _execute(f'DELETE FROM {CUSTOMER_INDEX} WHERE rowid = %s', [customer.pk])
+
+
+def index_car(car):
+    _execute(
+        f'UPDATE {RENTAL_INDEX} SET brand = %s, model = %s '
+        'WHERE rowid IN (SELECT id FROM d_autos_app_rental WHERE car_id = %s)',
+        [car.brand, car.model, car.pk],
+    )
+
+
+def index_rental(rental):
+    _execute(f'DELETE FROM {RENTAL_INDEX} WHERE rowid = %s', [rental.pk])
+    _execute(
+        f'INSERT INTO {RENTAL_INDEX} (rowid, first_name, last_name, brand, model) '
+        f'{RENTAL_INDEX_SELECT} WHERE r.id = %s',
+        [rental.pk],
+    )
+
+
+def unindex_rental(rental):
+    _execute(f'DELETE FROM {RENTAL_INDEX} WHERE rowid = %s', [rental.pk])
+
+
+@transaction.atomic
+def rebuild_search_index():
+    """Repopulate the full-text tables from scratch; returns False if unused."""
+    if not uses_fts():
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {CUSTOMER_INDEX}')
+        cursor.execute(
+            f'INSERT INTO {CUSTOMER_INDEX} (rowid, first_name, last_name, email, license_number) '
+            'SELECT id, first_name, last_name, email, license_number FROM d_autos_app_customer'
+        )
+        cursor.execute(f'DELETE FROM {RENTAL_INDEX}')
+        cursor.execute(
+            f'INSERT INTO {RENTAL_INDEX} (rowid, first_name, last_name, brand, model) '
+            f'{RENTAL_INDEX_SELECT}'
+        )
+    return True
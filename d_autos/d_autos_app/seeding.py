@@ -0,0 +1,350 @@
+import heapq
+import random
+import uuid
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+
+from . import analytics, ledger, search, stats, versions
+from .availability import FLEET_VERSION
+from .models import Car, Customer, Employee, Maintenance, Payment, Rental, Reservation, User
+from .pricing import EQUIPMENT_FIELDS, PriceList
+from .sequences import assign_employee_ids
+from .signals import VERSIONED_MODELS
+
+SEED_BATCH_SIZE = 5000
+HISTORY_DAYS = 3 * 365
+BENCHMARK_PASSWORD = 'benchmark'
+
+# Rows of each table per rental (and the fewest of each)
+TABLE_RATIOS = {
+    'customers': (0.2, 10),
+    'cars': (0.02, 5),
+    'employees': (0.002, 3),
+    'reservations': (0.1, 1),
+    'maintenances': (0.05, 1),
+}
+
+FIRST_NAMES = [
+    'Kwame', 'Ama', 'Kofi', 'Akosua', 'Yaw', 'Abena', 'Kojo', 'Efua', 'Kwesi', 'Adwoa',
+    'John', 'Mary', 'Emmanuel', 'Grace', 'Daniel', 'Esther', 'Samuel', 'Joyce',
+]
+LAST_NAMES = [
+    'Mensah', 'Owusu', 'Boateng', 'Asante', 'Osei', 'Agyeman', 'Appiah', 'Addo',
+    'Amoah', 'Darko', 'Ofori', 'Quaye', 'Tetteh', 'Annan', 'Sarpong', 'Nkrumah',
+]
+# brand -> (models, fleet share, daily price range)
+BRANDS = {
+    'Toyota': (['Corolla', 'Camry', 'RAV4', 'Yaris', 'Hilux'], 30, (150, 350)),
+    'Hyundai': (['Elantra', 'Tucson', 'Accent', 'Santa Fe'], 20, (140, 320)),
+    'Honda': (['Civic', 'Accord', 'CR-V'], 15, (160, 340)),
+    'Kia': (['Rio', 'Sportage', 'Sorento'], 12, (130, 300)),
+    'Nissan': (['Sentra', 'X-Trail', 'Navara'], 10, (140, 320)),
+    'Mercedes-Benz': (['C-Class', 'E-Class', 'GLE'], 8, (400, 800)),
+    'BMW': (['3 Series', '5 Series', 'X5'], 5, (420, 850)),
+}
+COLORS = ['White', 'Black', 'Silver', 'Grey', 'Blue', 'Red']
+FUEL_TYPES = {'petrol': 60, 'diesel': 25, 'hybrid': 10, 'electric': 5}
+PAYMENT_METHODS = {'cash': 35, 'mobile_money': 35, 'credit_card': 20, 'bank_transfer': 10}
+EMPLOYEE_ROLES = {
+    Employee.ROLE_SALES_AGENT: 70,
+    Employee.ROLE_MECHANIC: 20,
+    Employee.ROLE_MANAGER: 10,
+}
+RESERVATION_STATUSES = {'approved': 60, 'pending': 30, 'cancelled': 10}
+SERVICE_TYPES = {
+    Maintenance.TYPE_OIL_CHANGE: 35,
+    Maintenance.TYPE_GENERAL_SERVICE: 20,
+    Maintenance.TYPE_TIRE_ROTATION: 15,
+    Maintenance.TYPE_BRAKE_SERVICE: 10,
+    Maintenance.TYPE_AIR_CONDITIONING: 8,
+    Maintenance.TYPE_ELECTRICAL: 5,
+    Maintenance.TYPE_BODY_REPAIR: 4,
+    Maintenance.TYPE_TRANSMISSION: 3,
+}
+MEAN_RENTAL_DAYS = 4
+
+
+def table_sizes(rentals):
+    """Rows per table for ``rentals`` rentals (about one payment each)."""
+    sizes = {'rentals': rentals}
+    for table, (ratio, least) in TABLE_RATIOS.items():
+        sizes[table] = max(least, int(rentals * ratio))
+    return sizes
+
+
+class Weighted:
+    """Draws from a {value: weight} distribution."""
+
+    def __init__(self, rng, weights):
+        self.rng = rng
+        self.values = list(weights)
+        self.weights = list(weights.values())
+
+    def __call__(self):
+        return self.rng.choices(self.values, self.weights)[0]
+
+
+def batches(objs, size):
+    batch = []
+    for obj in objs:
+        batch.append(obj)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class BenchmarkDataGenerator:
+    """
+    Synthetic data at production proportions, written with bulk_create.
+
+    Every car has a timeline of back-to-back rentals over the last
+    HISTORY_DAYS days (so the availability engine sees no overlaps), mostly
+    short ones; customers are skewed so a few rent often; every returned
+    rental is paid in full and about half the active ones have a deposit
+    paid. Rentals are generated roughly in date order, as they would have
+    been entered.
+    """
+
+    def __init__(self, rentals, seed=0, batch_size=SEED_BATCH_SIZE, today=None):
+        self.sizes = table_sizes(rentals)
+        self.rng = random.Random(seed)
+        self.batch_size = batch_size
+        self.today = today or date.today()
+        # Keeps emails, plates and licences unique across runs
+        self.tag = uuid.uuid4().hex[:8]
+        self.counts = {}
+
+    def insert(self, table, model, objs):
+        """bulk_create ``objs`` batch by batch; returns the saved objects."""
+        saved = []
+        for batch in batches(objs, self.batch_size):
+            saved.extend(model.objects.bulk_create(batch))
+        self.counts[table] = len(saved)
+        return saved
+
+    # ================= PEOPLE AND CARS =================
+    def customers(self):
+        rng = self.rng
+        for n in range(self.sizes['customers']):
+            issued = self.today - timedelta(days=rng.randint(60, 20 * 365))
+            yield Customer(
+                first_name=rng.choice(FIRST_NAMES),
+                last_name=rng.choice(LAST_NAMES),
+                phone=f'02{rng.randint(0, 99999999):08d}',
+                email=f'customer{n}.{self.tag}@example.com',
+                license_number=f'DL-{self.tag}-{n:07d}',
+                license_type=rng.choice(['B', 'B', 'B', 'C', 'D']),
+                license_issue_date=issued,
+                license_expiry_date=issued + timedelta(days=10 * 365),
+                date_of_birth=self.today - timedelta(days=rng.randint(19 * 365, 70 * 365)),
+            )
+
+    def cars(self):
+        rng = self.rng
+        brands = Weighted(rng, {brand: share for brand, (models, share, prices) in BRANDS.items()})
+        fuel = Weighted(rng, FUEL_TYPES)
+        for n in range(self.sizes['cars']):
+            brand = brands()
+            models, share, (low, high) = BRANDS[brand]
+            car = Car(
+                brand=brand,
+                model=rng.choice(models),
+                year=rng.randint(self.today.year - 10, self.today.year),
+                plate_number=f'GR-{self.tag}-{n:06d}',
+                rental_price_per_day=Decimal(rng.randrange(low, high, 10)),
+                color=rng.choice(COLORS),
+                mileage=rng.randint(5_000, 200_000),
+                fuel_type=fuel(),
+            )
+            car.fill_derived_fields()
+            yield car
+
+    def employees(self):
+        rng = self.rng
+        roles = Weighted(rng, EMPLOYEE_ROLES)
+        password = make_password(BENCHMARK_PASSWORD)  # hashed once, not per user
+        users = self.insert('users', User, (
+            User(
+                email=f'employee{n}.{self.tag}@example.com',
+                password=password,
+                first_name=rng.choice(FIRST_NAMES),
+                last_name=rng.choice(LAST_NAMES),
+                user_type=User.USER_TYPE_EMPLOYEE,
+            )
+            for n in range(self.sizes['employees'])
+        ))
+        employees = assign_employee_ids([
+            Employee(
+                user=user,
+                role=Employee.ROLE_SALES_AGENT if n == 0 else roles(),
+                hire_date=self.today - timedelta(days=rng.randint(30, 10 * 365)),
+                salary=Decimal(rng.randrange(2000, 9000, 50)),
+            )
+            for n, user in enumerate(users)
+        ])
+        return self.insert('employees', Employee, employees)
+
+    # ================= RENTALS AND PAYMENTS =================
+    def rental_dates(self, car_ids):
+        """(car id, start, end) of every rental, roughly in start order."""
+        rng = self.rng
+        rentals = self.sizes['rentals']
+        # Spread each car's share of the rentals over the whole history
+        # (a rental lasts MEAN_RENTAL_DAYS + 1 days, plus a day to turn around)
+        mean_gap = max(0.5, HISTORY_DAYS * len(car_ids) / rentals - MEAN_RENTAL_DAYS - 2)
+        start = self.today - timedelta(days=HISTORY_DAYS)
+        free = [(start + timedelta(days=rng.randint(0, int(mean_gap))), car_id) for car_id in car_ids]
+        heapq.heapify(free)
+        for _ in range(rentals):
+            day, car_id = heapq.heappop(free)
+            begin = day + timedelta(days=int(rng.expovariate(1 / mean_gap)))
+            end = begin + timedelta(days=1 + min(29, int(rng.expovariate(1 / MEAN_RENTAL_DAYS))))
+            heapq.heappush(free, (end + timedelta(days=1), car_id))
+            yield car_id, begin, end
+        self.car_free_dates = {car_id: day for day, car_id in free}
+
+    def rentals_and_payments(self, customers, cars, employees):
+        rng = self.rng
+        methods = Weighted(rng, PAYMENT_METHODS)
+        prices = {car.pk: car.rental_price_per_day for car in cars}
+        price_list = PriceList()
+        agents = [employee.pk for employee in employees if employee.role == Employee.ROLE_SALES_AGENT]
+        customer_ids = [customer.pk for customer in customers]
+        rented_out = set()
+        rental_count = payment_count = 0
+
+        for batch in batches(self.rental_dates(list(prices)), self.batch_size):
+            rentals = []
+            for car_id, begin, end in batch:
+                returned = end < self.today
+                if begin <= self.today <= end:
+                    rented_out.add(car_id)
+                equipment = {
+                    'equipment_gps': rng.random() < 0.2,
+                    'equipment_child_seat': rng.random() < 0.05,
+                }
+                selected = [equipment.get(field, False) for field in EQUIPMENT_FIELDS.values()]
+                # Priced as Rental.save() would, extras included
+                total = price_list.total(begin, end, prices[car_id], selected)
+                rentals.append(Rental(
+                    # Squaring skews towards the first customers: regulars
+                    customer_id=customer_ids[int(len(customer_ids) * rng.random() ** 2)],
+                    car_id=car_id,
+                    employee_id=rng.choice(agents),
+                    rental_date=begin,
+                    return_date=end,
+                    actual_return_date=end if returned else None,
+                    total_cost=total,
+                    deposit_paid=(total * Decimal('0.2')).quantize(Decimal('1')),
+                    payment_status='paid' if returned else rng.choice(['pending', 'partial']),
+                    payment_method=methods(),
+                    status='returned' if returned else 'active',
+                    **equipment,
+                ))
+            rentals = Rental.objects.bulk_create(rentals)
+            rental_count += len(rentals)
+
+            payments = []
+            for rental in rentals:
+                if rental.status == 'returned':
+                    amount, day, status = rental.total_cost, rental.return_date, 'paid'
+                elif rental.payment_status == 'partial':
+                    amount, day, status = rental.deposit_paid, rental.rental_date, 'paid'
+                else:
+                    continue
+                payments.append(Payment(
+                    rental_id=rental.pk,
+                    customer_id=rental.customer_id,
+                    amount=amount,
+                    payment_date=min(day, self.today),
+                    payment_method=rental.payment_method,
+                    payment_status=status,
+                    transaction_id=None if rental.payment_method == 'cash' else f'TX-{self.tag}-{rental.pk}',
+                ))
+            payment_count += len(Payment.objects.bulk_create(payments))
+
+        Car.objects.filter(pk__in=rented_out).update(availability=False, status='unavailable')
+        self.counts['rentals'] = rental_count
+        self.counts['payments'] = payment_count
+
+    # ================= RESERVATIONS AND MAINTENANCE =================
+    def reservations(self, customers):
+        """Upcoming bookings, each after its car's last rental."""
+        rng = self.rng
+        statuses = Weighted(rng, RESERVATION_STATUSES)
+        free = self.car_free_dates
+        car_ids = list(free)
+        for _ in range(self.sizes['reservations']):
+            car_id = rng.choice(car_ids)
+            begin = max(free[car_id], self.today) + timedelta(days=rng.randint(0, 14))
+            end = begin + timedelta(days=rng.randint(1, 10))
+            free[car_id] = end + timedelta(days=1)
+            yield Reservation(
+                customer=rng.choice(customers),
+                car_id=car_id,
+                start_date=begin,
+                end_date=end,
+                reservation_status=statuses(),
+                deposit_amount=Decimal(rng.randrange(0, 500, 50)),
+            )
+
+    def maintenances(self, cars, employees):
+        rng = self.rng
+        types = Weighted(rng, SERVICE_TYPES)
+        mechanics = [e.pk for e in employees if e.role == Employee.ROLE_MECHANIC] or [None]
+        labels = dict(Maintenance.MAINTENANCE_TYPE_CHOICES)
+        for _ in range(self.sizes['maintenances']):
+            car = rng.choice(cars)
+            scheduled = self.today + timedelta(days=rng.randint(-HISTORY_DAYS, 30))
+            done = scheduled < self.today - timedelta(days=3)
+            labor = Decimal(rng.randrange(50, 800, 10))
+            parts = Decimal(rng.randrange(0, 2000, 10))
+            service_type = types()
+            maintenance = Maintenance(
+                car=car,
+                employee_id=rng.choice(mechanics),
+                scheduled_date=scheduled,
+                completed_date=scheduled if done else None,
+                service_type=service_type,
+                title=labels[service_type],
+                status=Maintenance.STATUS_COMPLETED if done else Maintenance.STATUS_SCHEDULED,
+                priority=rng.choice([Maintenance.PRIORITY_LOW, Maintenance.PRIORITY_MEDIUM,
+                                     Maintenance.PRIORITY_MEDIUM, Maintenance.PRIORITY_HIGH]),
+                labor_cost=labor,
+                parts_cost=parts,
+                cost=labor + parts,
+                mileage_at_service=rng.randint(5_000, car.mileage or 5_000),
+            )
+            maintenance.fill_next_service()  # what save() would have done
+            yield maintenance
+
+    @transaction.atomic
+    def run(self):
+        customers = self.insert('customers', Customer, self.customers())
+        cars = self.insert('cars', Car, self.cars())
+        employees = self.employees()
+        self.rentals_and_payments(customers, cars, employees)
+        self.insert('reservations', Reservation, self.reservations(customers))
+        self.insert('maintenances', Maintenance, self.maintenances(cars, employees))
+
+        # What the skipped save() signals would have kept up to date
+        stats.rebuild_dashboard_stats()
+        search.rebuild_search_index()
+        if analytics.is_built():
+            analytics.build_revenue_cube()
+        if ledger.is_built():
+            ledger.rebuild_customer_ledger()
+        versions.changed(FLEET_VERSION)
+        for model in VERSIONED_MODELS:
+            versions.changed(versions.table_version(model))
+        return self.counts
+
+
+def seed_benchmark_data(rentals, seed=0, batch_size=SEED_BATCH_SIZE):
+    """Add ``rentals`` rentals and proportional other rows; returns row counts."""
+    return BenchmarkDataGenerator(rentals, seed, batch_size).run()
@@ -0,0 +1,82 @@
+import re
+
+from django.db import IntegrityError, connection, transaction
+from django.db.models import F
+
+from .models import Employee, IdSequence
+
+EMPLOYEE_SEQUENCE = 'employee_id'
+EMPLOYEE_ID_FORMAT = 'EMP-{:04d}'
+EMPLOYEE_ID_PATTERN = re.compile(r'^EMP-(\d+)$')
+
+
+def sequence_name(name):
+    """Name of the native PostgreSQL sequence behind counter ``name``."""
+    return f'd_autos_app_{name}_seq'
+
+
+def _allocate_counter(name, count, start):
+    with transaction.atomic():
+        # The UPDATE locks the counter row until this block commits, so
+        # concurrent callers get disjoint blocks
+        if not IdSequence.objects.filter(name=name).update(last_value=F('last_value') + count):
+            try:
+                with transaction.atomic():
+                    IdSequence.objects.create(name=name, last_value=start() + count)
+            except IntegrityError:
+                # Created concurrently; take the next block from it
+                IdSequence.objects.filter(name=name).update(last_value=F('last_value') + count)
+        last = IdSequence.objects.filter(name=name).values_list('last_value', flat=True).get()
+    return list(range(last - count + 1, last + 1))
+
+
+def _allocate_sequence(name, count):
+    # nextval() never blocks and is not rolled back, so a failed insert
+    # leaves a gap instead of holding up other inserts
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT nextval(%s) FROM generate_series(1, %s)', [sequence_name(name), count]
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+
+def allocate(name, count=1, start=lambda: 0):
+    """
+    ``count`` unused numbers from counter ``name``, ascending.
+
+    PostgreSQL draws them from a native sequence (created by migration
+    0011); other databases bump an IdSequence row. ``start()`` gives the
+    highest number already taken, for a counter row that does not exist yet.
+    """
+    if count < 1:
+        return []
+    if connection.vendor == 'postgresql':
+        return _allocate_sequence(name, count)
+    return _allocate_counter(name, count, start)
+
+
+# ================= EMPLOYEE IDS =================
+def highest_employee_number():
+    """Largest NNNN among stored EMP-NNNN employee IDs (0 when none)."""
+    numbers = [
+        int(match.group(1))
+        for match in map(EMPLOYEE_ID_PATTERN.match, Employee.objects.values_list('employee_id', flat=True))
+        if match
+    ]
+    return max(numbers, default=0)
+
+
+def employee_ids(count=1):
+    """``count`` new EMP-NNNN employee IDs, one counter update for all."""
+    return [
+        EMPLOYEE_ID_FORMAT.format(number)
+        for number in allocate(EMPLOYEE_SEQUENCE, count, highest_employee_number)
+    ]
+
+
+def assign_employee_ids(employees):
+    """Give every employee without an ID one; for bulk_create callers."""
+    missing = [employee for employee in employees if not employee.employee_id]
+    for employee, employee_id in zip(missing, employee_ids(len(missing))):
+        employee.employee_id = employee_id
+    return employees
@@ -0,0 +1,79 @@
+from datetime import date, timedelta
+
+from django.db.models import Case, Exists, F, IntegerField, OuterRef, Q, Subquery, Value, When
+from django.db.models.functions import Coalesce
+
+from .models import Car, Maintenance
+
+SERVICE_DUE_DAYS = 30
+SERVICE_DUE_KM = 1000
+# Widest horizons asked for: further dates overflow, and a wider mileage
+# one would reach NO_KM and list cars without a mileage target
+MAX_DUE_DAYS = 10 * 365
+MAX_DUE_KM = 1_000_000
+
+# Sort keys standing in for "no date / no mileage target"
+NO_DATE = date(9999, 12, 31)
+NO_KM = 2_000_000_000
+
+OPEN_STATUSES = [Maintenance.STATUS_SCHEDULED, Maintenance.STATUS_IN_PROGRESS]
+# Overdue first, then the soonest date, then the fewest kilometres left
+QUEUE_ORDERING = ('due_rank', 'due_date', 'km_left', 'id')
+
+
+def latest_service(field):
+    """``field`` of the car's latest completed maintenance, as a subquery."""
+    return Subquery(
+        Maintenance.objects.filter(car=OuterRef('pk'), status=Maintenance.STATUS_COMPLETED)
+        .order_by('-completed_date', '-pk')
+        .values(field)[:1]
+    )
+
+
+def check_horizon(days, km):
+    """Raise ValueError unless ``days`` and ``km`` are within the limits above."""
+    if not 0 <= days <= MAX_DUE_DAYS:
+        raise ValueError(f'days must be between 0 and {MAX_DUE_DAYS}.')
+    if not 0 <= km <= MAX_DUE_KM:
+        raise ValueError(f'km must be between 0 and {MAX_DUE_KM}.')
+
+
+def service_queue(days=SERVICE_DUE_DAYS, km=SERVICE_DUE_KM, today=None):
+    """
+    Cars whose next service falls within ``days`` days or ``km`` kilometres,
+    in QUEUE_ORDERING, as one query.
+
+    The targets come from each car's latest completed maintenance
+    (next_service_date/next_service_mileage, see Maintenance.save) and are
+    compared with Car.mileage in SQL, so no maintenance row is loaded. Cars
+    that already have scheduled or in-progress work are left out. Rows carry
+    next_date, next_km, due_date, km_left and due_rank (0 when overdue).
+    """
+    today = today or date.today()
+    open_work = Maintenance.objects.filter(car=OuterRef('pk'), status__in=OPEN_STATUSES)
+    return (
+        Car.objects
+        .annotate(
+            next_date=latest_service('next_service_date'),
+            next_km=latest_service('next_service_mileage'),
+        )
+        .annotate(
+            due_date=Coalesce('next_date', Value(NO_DATE)),
+            km_left=Coalesce(F('next_km') - F('mileage'), Value(NO_KM)),
+        )
+        .annotate(due_rank=Case(
+            When(Q(due_date__lt=today) | Q(km_left__lte=0), then=Value(0)),
+            default=Value(1),
+            output_field=IntegerField(),
+        ))
+        .filter(Q(due_date__lte=today + timedelta(days=days)) | Q(km_left__lte=km))
+        .exclude(Exists(open_work))
+        .order_by(*QUEUE_ORDERING)
+    )
+
+
+def overdue_maintenances(today=None):
+    """Scheduled work past its date: Maintenance.is_overdue as a filter."""
+    return Maintenance.objects.filter(
+        status=Maintenance.STATUS_SCHEDULED, scheduled_date__lt=today or date.today()
+    )
@@ -0,0 +1,215 @@
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import analytics, ledger, search, stats, versions
+from .availability import FLEET_VERSION
+from .models import Car, Customer, Employee, Maintenance, Payment, Rental, Reservation, User
+from .principals import principal_changed
+
+
+# ================= DASHBOARD STATS =================
+@receiver(post_save, sender=Customer)
+def customer_saved(sender, instance, created, **kwargs):
+    if created:
+        stats.record_customer(1)
+
+
+@receiver(post_delete, sender=Customer)
+def customer_deleted(sender, instance, **kwargs):
+    stats.record_customer(-1)
+
+
+@receiver(post_save, sender=Car)
+def car_saved(sender, instance, created, **kwargs):
+    if created:
+        stats.record_car(1)
+
+
+@receiver(post_delete, sender=Car)
+def car_deleted(sender, instance, **kwargs):
+    stats.record_car(-1)
+
+
+@receiver(pre_save, sender=Rental)
+def rental_pre_save(sender, instance, **kwargs):
+    # Remember the stored car and charges so post_save can tell what changed
+    instance._previous_car_id = None
+    instance._previous_charges = None
+    if instance.pk and not instance._state.adding:
+        previous = (
+            Rental.objects.filter(pk=instance.pk)
+            .values_list('car_id', 'customer_id', 'total_cost', 'deposit_paid')
+            .first()
+        )
+        if previous:
+            instance._previous_car_id = previous[0]
+            instance._previous_charges = previous[1:]
+
+
+@receiver(post_save, sender=Rental)
+def rental_saved(sender, instance, created, **kwargs):
+    if created:
+        stats.record_rental(instance.car_id, 1)
+    elif getattr(instance, '_previous_car_id', None) is not None:
+        stats.move_rental(instance._previous_car_id, instance.car_id)
+
+
+@receiver(post_delete, sender=Rental)
+def rental_deleted(sender, instance, **kwargs):
+    stats.record_rental(instance.car_id, -1)
+
+
+@receiver(pre_save, sender=Payment)
+def payment_pre_save(sender, instance, **kwargs):
+    # Remember the stored values so post_save can apply the difference
+    instance._previous_payment = None
+    if instance.pk and not instance._state.adding:
+        instance._previous_payment = (
+            Payment.objects.filter(pk=instance.pk)
+            .values_list(
+                'amount', 'payment_date', 'payment_method', 'rental_id',
+                'customer_id', 'rental__customer_id',
+            )
+            .first()
+        )
+
+
+@receiver(post_save, sender=Payment)
+def payment_saved(sender, instance, created, **kwargs):
+    previous = getattr(instance, '_previous_payment', None)
+    current = (instance.amount, instance.payment_date, instance.payment_method, instance.rental_id)
+    if created or previous is None:
+        stats.record_payment(instance.amount, instance.payment_date)
+        analytics.record_payment(*current)
+    else:
+        amount, payment_date = previous[:2]
+        stats.change_payment(amount, payment_date, instance.amount, instance.payment_date)
+        analytics.change_payment(previous[:4], current)
+
+
+@receiver(post_delete, sender=Payment)
+def payment_deleted(sender, instance, **kwargs):
+    stats.record_payment(instance.amount, instance.payment_date, sign=-1)
+    analytics.record_payment(
+        instance.amount, instance.payment_date, instance.payment_method, instance.rental_id,
+        sign=-1,
+    )
+
+
+# ================= CUSTOMER LEDGER =================
+@receiver(post_save, sender=Rental)
+def rental_ledger_saved(sender, instance, created, **kwargs):
+    current = (instance.customer_id, instance.total_cost, instance.deposit_paid)
+    previous = getattr(instance, '_previous_charges', None)
+    if created or previous is None:
+        ledger.record_rental(*current)
+    else:
+        ledger.change_rental(previous, current)
+        ledger.move_rental_payments(instance.pk, previous[0], instance.customer_id)
+
+
+@receiver(post_delete, sender=Rental)
+def rental_ledger_deleted(sender, instance, **kwargs):
+    ledger.record_rental(instance.customer_id, instance.total_cost, instance.deposit_paid, sign=-1)
+
+
+@receiver(post_save, sender=Payment)
+def payment_ledger_saved(sender, instance, created, **kwargs):
+    current = (ledger.payment_customer(instance.customer_id, instance.rental_id), instance.amount)
+    previous = getattr(instance, '_previous_payment', None)
+    if created or previous is None:
+        ledger.record_payment(*current)
+    else:
+        amount, customer_id, rental_customer_id = previous[0], previous[4], previous[5]
+        ledger.change_payment((customer_id or rental_customer_id, amount), current)
+
+
+@receiver(post_delete, sender=Payment)
+def payment_ledger_deleted(sender, instance, **kwargs):
+    ledger.record_payment(
+        ledger.payment_customer(instance.customer_id, instance.rental_id), instance.amount, sign=-1
+    )
+
+
+# ================= SEARCH INDEX =================
+@receiver(post_save, sender=Customer)
+def customer_search_saved(sender, instance, **kwargs):
+    search.index_customer(instance)
+
+
+@receiver(post_delete, sender=Customer)
+def customer_search_deleted(sender, instance, **kwargs):
+    search.unindex_customer(instance)
+
+
+@receiver(post_save, sender=Car)
+def car_search_saved(sender, instance, created, update_fields=None, **kwargs):
+    # Rental.save() touches only the availability flag; nothing indexed
+    if not created and (update_fields is None or {'brand', 'model'} & set(update_fields)):
+        search.index_car(instance)
+
+
+@receiver(post_save, sender=Rental)
+def rental_search_saved(sender, instance, **kwargs):
+    search.index_rental(instance)
+
+
+@receiver(post_delete, sender=Rental)
+def rental_search_deleted(sender, instance, **kwargs):
+    search.unindex_rental(instance)
+
+
+# ================= FLEET VERSION =================
+# Invalidates the cached car choice lists (availability.car_choices)
+@receiver(post_save, sender=Car)
+@receiver(post_delete, sender=Car)
+@receiver(post_save, sender=Rental)
+@receiver(post_delete, sender=Rental)
+@receiver(post_save, sender=Reservation)
+@receiver(post_delete, sender=Reservation)
+def fleet_changed(sender, **kwargs):
+    versions.changed(FLEET_VERSION)
+
+
+# ================= TABLE VERSIONS =================
+# One counter per table (versions.table_version): the ETags of the chart
+# data (charts.py) and the keys of the cached dashboard tables (fragments.py)
+VERSIONED_MODELS = (Car, Customer, Employee, Maintenance, Payment, Rental, Reservation, User)
+
+
+@receiver(post_save)
+@receiver(post_delete)
+def table_changed(sender, update_fields=None, **kwargs):
+    if sender not in VERSIONED_MODELS:
+        return
+    # Logging in only stamps last_login, which no page shows
+    if sender is User and update_fields == frozenset({'last_login'}):
+        return
+    versions.changed(versions.table_version(sender))
+
+
+# ================= PRINCIPAL CACHE =================
+# Invalidates the cached request.user (principals.get_principal)
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def user_changed(sender, instance, **kwargs):
+    principal_changed(instance.pk)
+
+
+@receiver(post_save, sender=Employee)
+@receiver(post_delete, sender=Employee)
+def employee_changed(sender, instance, **kwargs):
+    principal_changed(instance.user_id)
+
+
+# ================= DATABASE CONNECTIONS =================
+@receiver(connection_created)
+def sqlite_pragmas(sender, connection, **kwargs):
+    """settings.SQLITE_PRAGMAS on every new SQLite connection."""
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        for name, value in settings.SQLITE_PRAGMAS.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
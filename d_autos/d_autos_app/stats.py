@@ -0,0 +1,147 @@
+from datetime import date
+from decimal import Decimal
+
+from asgiref.sync import sync_to_async
+from django.db import transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+from . import versions
+from .models import (
+    Car, CarRentalStats, Customer, DashboardStats,
+    MonthlyRevenueStats, Payment, Rental
+)
+
+
+def month_of(day):
+    """First day of the month containing ``day``."""
+    if isinstance(day, str):
+        day = date.fromisoformat(day)
+    return day.replace(day=1)
+
+
+def _update_snapshot(**deltas):
+    """
+    Add ``deltas`` to the snapshot row.
+
+    Returns False when the snapshot has not been built yet, in which case
+    callers skip their incremental work: the first read rebuilds everything.
+    """
+    changes = {field: F(field) + delta for field, delta in deltas.items()}
+    return bool(
+        DashboardStats.objects
+        .filter(pk=DashboardStats.SINGLETON_PK)
+        .update(updated_at=timezone.now(), **changes)
+    )
+
+
+def _bump(model, field, delta, **lookup):
+    """Atomically add ``delta`` to ``field`` on the row matching ``lookup``."""
+    if model.objects.filter(**lookup).update(**{field: F(field) + delta}):
+        return
+    # Only positive changes create rows; a negative change for a missing row
+    # means its parent is being deleted along with it (cascade).
+    if delta > 0:
+        obj, created = model.objects.get_or_create(defaults={field: delta}, **lookup)
+        if not created:
+            model.objects.filter(pk=obj.pk).update(**{field: F(field) + delta})
+
+
+def is_built():
+    return DashboardStats.objects.filter(pk=DashboardStats.SINGLETON_PK).exists()
+
+
+# ================= INCREMENTAL UPDATES =================
+def record_customer(delta):
+    _update_snapshot(total_customers=delta)
+
+
+def record_car(delta):
+    _update_snapshot(total_cars=delta)
+
+
+def record_rental(car_id, delta):
+    """A rental for ``car_id`` was added (+1) or removed (-1)."""
+    if _update_snapshot(total_rentals=delta):
+        _bump(CarRentalStats, 'rental_count', delta, car_id=car_id)
+
+
+def move_rental(old_car_id, new_car_id):
+    """An existing rental was reassigned to another car."""
+    if old_car_id == new_car_id or not is_built():
+        return
+    _bump(CarRentalStats, 'rental_count', -1, car_id=old_car_id)
+    _bump(CarRentalStats, 'rental_count', 1, car_id=new_car_id)
+
+
+def record_payment(amount, payment_date, sign=1):
+    """A payment was added (sign=1) or removed (sign=-1)."""
+    amount = Decimal(amount or 0) * sign
+    if amount and _update_snapshot(total_revenue=amount):
+        _bump(MonthlyRevenueStats, 'total', amount, month=month_of(payment_date))
+
+
+def change_payment(old_amount, old_date, new_amount, new_date):
+    """An existing payment's amount and/or date changed."""
+    if old_amount == new_amount and month_of(old_date) == month_of(new_date):
+        return
+    record_payment(old_amount, old_date, sign=-1)
+    record_payment(new_amount, new_date)
+
+
+# ================= FULL REBUILD =================
+@transaction.atomic
+def rebuild_dashboard_stats():
+    """Recompute every snapshot row from the fact tables."""
+    revenue = Payment.objects.aggregate(total=Sum('amount'))['total'] or Decimal('0.00')
+    stats, created = DashboardStats.objects.update_or_create(
+        pk=DashboardStats.SINGLETON_PK,
+        defaults={
+            'total_customers': Customer.objects.count(),
+            'total_cars': Car.objects.count(),
+            'total_rentals': Rental.objects.count(),
+            'total_revenue': revenue,
+        },
+    )
+
+    CarRentalStats.objects.all().delete()
+    CarRentalStats.objects.bulk_create(
+        CarRentalStats(car_id=row['car'], rental_count=row['total'])
+        for row in Rental.objects.values('car').annotate(total=Count('id')).order_by()
+    )
+
+    MonthlyRevenueStats.objects.all().delete()
+    MonthlyRevenueStats.objects.bulk_create(
+        MonthlyRevenueStats(month=row['month'], total=row['total'])
+        for row in (
+            Payment.objects
+            .annotate(month=TruncMonth('payment_date'))
+            .values('month')
+            .annotate(total=Sum('amount'))
+            .order_by()
+        )
+    )
+    # Chart ETags (charts.py) come from these tables' versions, so clients
+    # holding series from the replaced snapshot must fetch them again. The
+    # first build replaces nothing any client has seen.
+    if not created:
+        for model in (Rental, Car, Payment):
+            versions.changed(versions.table_version(model))
+    return stats
+
+
+def get_dashboard_stats():
+    """The current snapshot, built on first use."""
+    stats = DashboardStats.objects.filter(pk=DashboardStats.SINGLETON_PK).first()
+    if stats is None:
+        stats = rebuild_dashboard_stats()
+    return stats
+
+
+async def aget_dashboard_stats():
+    """get_dashboard_stats() for async views."""
+    stats = await DashboardStats.objects.filter(pk=DashboardStats.SINGLETON_PK).afirst()
+    if stats is None:
+        stats = await sync_to_async(rebuild_dashboard_stats)()
+    return stats
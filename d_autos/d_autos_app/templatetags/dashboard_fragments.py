@@ -0,0 +1,39 @@
+from django import template
+
+from ..fragments import FRAGMENT_MODELS, render_fragment
+
+register = template.Library()
+
+
+class FragmentNode(template.Node):
+
+    def __init__(self, nodelist, table, vary_on):
+        self.nodelist = nodelist
+        self.table = table
+        self.vary_on = vary_on
+
+    def render(self, context):
+        table = self.table.resolve(context)
+        if table not in FRAGMENT_MODELS:
+            raise template.TemplateSyntaxError(f'No dashboard table named "{table}".')
+        vary_on = [value.resolve(context) for value in self.vary_on]
+        return render_fragment(
+            context.template.name, table, vary_on, lambda: self.nodelist.render(context)
+        )
+
+
+@register.tag
+def fragment(parser, token):
+    """
+    Cache the enclosed HTML until a model of the dashboard table changes::
+
+        {% fragment 'rentals' [vary_on ...] %} ... {% endfragment %}
+
+    The page objects it renders should be lazy, so a hit runs no query.
+    """
+    bits = token.split_contents()
+    if len(bits) < 2:
+        raise template.TemplateSyntaxError(f'"{bits[0]}" takes a dashboard table name.')
+    nodelist = parser.parse(('endfragment',))
+    parser.delete_first_token()
+    return FragmentNode(nodelist, parser.compile_filter(bits[1]), [parser.compile_filter(bit) for bit in bits[2:]])
@@ -1,3 +1,1408 @@
-from django.test import TestCase
+import json
+import threading
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+from io import BytesIO
+from itertools import product
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import Client, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from . import availability, versions
+from .analytics import build_revenue_cube, revenue_series
+from .benchmarks import regressions, run_scenarios, run_writer_benchmark, scenarios
+from .availability import car_choices
+from .forms import RentalForm
+from .fragments import fragment_counts, reset_fragment_counts
+from .importers import ImportFileError, import_file
+from .ledger import outstanding_balances, rebuild_customer_ledger
+from .models import (
+    Car, CarRentalStats, Customer, CustomerLedger, DashboardStats, Employee, EquipmentRate,
+    IdSequence, Maintenance, MonthlyRevenueStats, Payment, Rental, Reservation, RevenueCube, User,
+)
+from .pagination import InvalidCursor, encode_cursor, keyset_paginate
+from .pricing import EQUIPMENT_FIELDS, price_rental, reprice_rentals
+from .principals import get_principal
+from .query_plans import advise, explain, plan_problems
+from .reconciliation import reconcile_file
+from .rentals import CarUnavailable, CheckInError, check_in_rentals, create_rental
+from .search import search_customers, search_rentals
+from .service_due import QUEUE_ORDERING, service_queue
+from .seeding import seed_benchmark_data
+from .sequences import allocate, assign_employee_ids
+from .signals import VERSIONED_MODELS
+from .stats import get_dashboard_stats, rebuild_dashboard_stats
+
+
+def shared_cache(cls):
+    """
+    Run ``cls`` with the shared cache and cached sessions its query counts
+    assume, whatever CACHE_PROFILE the suite runs under.
+    """
+    return override_settings(
+        SHARED_CACHE=True, SESSION_ENGINE='django.contrib.sessions.backends.cached_db',
+    )(cls)
+
+
+def make_customer(n=1):
+    return Customer.objects.create(
+        first_name=f'Customer{n}',
+        last_name='Test',
+        phone='0200000000',
+        email=f'customer{n}@example.com',
+        license_number=f'LIC-{n}',
+        license_issue_date=date(2020, 1, 1),
+        license_expiry_date=date(2030, 1, 1),
+    )
+
+
+def make_car(n=1, **fields):
+    fields.setdefault('rental_price_per_day', 100)
+    return Car.objects.create(
+        brand='Toyota',
+        model=f'Corolla {n}',
+        year=2022,
+        plate_number=f'GR-{n:04d}-24',
+        **fields
+    )
+
+
+def make_admin():
+    return User.objects.create_user(
+        email='admin@example.com', password='secret', user_type=User.USER_TYPE_ADMIN
+    )
+
+
+class KeysetPaginationTests(TestCase):
+
+    def setUp(self):
+        # Prices repeat, so the leading column ties across page boundaries
+        for n, price in enumerate([100, 80, 100, 120, 80, 100, 90], start=1):
+            make_car(n, rental_price_per_day=price)
+
+    def walk(self, queryset, ordering, page_size):
+        pks, cursor = [], None
+        while True:
+            page = keyset_paginate(queryset, ordering, cursor=cursor, page_size=page_size)
+            pks.extend(row.pk for row in page)
+            if not page.has_next:
+                return pks
+            cursor = page.next_cursor
+
+    def test_pages_follow_the_ordering(self):
+        for ordering in [
+            ('id',), ('-id',),
+            ('rental_price_per_day', 'id'), ('-rental_price_per_day', '-id'),
+            ('rental_price_per_day', '-id'), ('-rental_price_per_day', 'id'),
+            ('brand', '-rental_price_per_day', 'id'),
+        ]:
+            expected = list(Car.objects.order_by(*ordering).values_list('pk', flat=True))
+            for page_size in (1, 2, 3, 7):
+                with self.subTest(ordering=ordering, page_size=page_size):
+                    self.assertEqual(self.walk(Car.objects.all(), ordering, page_size), expected)
+
+    def test_date_cursors_round_trip(self):
+        today = date.today()
+        customer = make_customer()
+        for car in Car.objects.all():
+            # Three rentals start on each day
+            start = today + timedelta(days=car.pk % 3)
+            Rental.objects.create(
+                customer=customer, car=car, rental_date=start, return_date=start + timedelta(days=2),
+            )
+        ordering = ('-rental_date', '-id')
+        expected = list(Rental.objects.order_by(*ordering).values_list('pk', flat=True))
+        for page_size in (1, 2, 4):
+            self.assertEqual(self.walk(Rental.objects.all(), ordering, page_size), expected)
+
+    def test_malformed_cursors(self):
+        ordering = ('rental_price_per_day', 'id')
+        valid = keyset_paginate(Car.objects.all(), ordering, page_size=2).next_cursor
+        for cursor in [
+            'not a cursor!',
+            valid[:-3],  # truncated
+            encode_cursor({'id': 1}),  # not a list
+            encode_cursor([100]),  # too few values
+            encode_cursor(['cheap', 1]),  # wrong types
+            encode_cursor([100, 'one']),
+        ]:
+            with self.subTest(cursor=cursor), self.assertRaises(InvalidCursor):
+                keyset_paginate(Car.objects.all(), ordering, cursor=cursor)
+
+    def test_dashboard_table_rejects_bad_cursors(self):
+        self.client.force_login(make_admin())
+        response = self.client.get(reverse('dashboard_table', args=['cars']), {'cursor': 'not a cursor!'})
+        self.assertEqual(response.status_code, 400)
+
+
+class DashboardStatsTests(TestCase):
+
+    def setUp(self):
+        self.customer = make_customer()
+        self.car = make_car(1)
+        self.other_car = make_car(2)
+        today = date.today()
+        self.rental = Rental.objects.create(
+            customer=self.customer, car=self.car, rental_date=today, return_date=today + timedelta(days=3),
+        )
+        get_dashboard_stats()
+
+    def snapshot(self):
+        stats = DashboardStats.objects.get(pk=DashboardStats.SINGLETON_PK)
+        return (
+            (stats.total_customers, stats.total_cars, stats.total_rentals, stats.total_revenue),
+            set(CarRentalStats.objects.filter(rental_count__gt=0).values_list('car_id', 'rental_count')),
+            set(MonthlyRevenueStats.objects.exclude(total=0).values_list('month', 'total')),
+        )
+
+    def assertStatsConsistent(self):
+        """The incrementally kept snapshot equals a fresh rebuild."""
+        kept = self.snapshot()
+        rebuild_dashboard_stats()
+        self.assertEqual(kept, self.snapshot())
+
+    def test_signals_keep_the_snapshot_current(self):
+        payment = Payment.objects.create(rental=self.rental, amount=100, payment_method='cash')
+        self.assertStatsConsistent()
+
+        self.rental.car = self.other_car
+        self.rental.save()
+        self.assertStatsConsistent()
+
+        payment.amount = 140
+        payment.save()
+        self.assertStatsConsistent()
+        payment.payment_date = date.today() - timedelta(days=40)  # another month
+        payment.save()
+        self.assertStatsConsistent()
+
+        make_customer(2)
+        make_car(3)
+        self.assertEqual(self.snapshot()[0], (2, 3, 1, 140))
+        payment.delete()
+        self.assertStatsConsistent()
+        self.rental.delete()
+        self.assertStatsConsistent()
+        self.car.delete()
+        self.customer.delete()
+        self.assertStatsConsistent()
+
+    def test_cascades_keep_the_snapshot_current(self):
+        Payment.objects.create(rental=self.rental, amount=100, payment_method='cash')
+        # Deleting the car deletes its rental and the rental's payment
+        self.car.delete()
+        self.assertStatsConsistent()
+        self.assertEqual(self.snapshot()[0], (1, 1, 0, 0))
+
+
+class AvailabilityBoundaryTests(TestCase):
+
+    def setUp(self):
+        self.customer = make_customer()
+        self.car = make_car()
+        self.first_day = date.today() + timedelta(days=10)
+        # Day 0 to day 4; ranges include both ends
+        self.rental = Rental.objects.create(
+            customer=self.customer, car=self.car, rental_date=self.day(0), return_date=self.day(4),
+        )
+
+    def day(self, n):
+        return self.first_day + timedelta(days=n)
+
+    def free(self, start, end, **kwargs):
+        return availability.is_car_available(self.car, self.day(start), self.day(end), **kwargs)
+
+    def test_future_rentals_leave_the_car_available_now(self):
+        today = date.today()
+        self.assertTrue(Car.objects.get(pk=self.car.pk).availability)
+        self.assertTrue(availability.is_car_available(self.car, today, today + timedelta(days=1)))
+        self.assertIn(self.car.pk, [pk for pk, label in car_choices(today, today + timedelta(days=1))])
+
+        create_rental(Rental(
+            customer=self.customer, car=Car.objects.get(pk=self.car.pk),
+            rental_date=today, return_date=today + timedelta(days=2),
+        ))
+        self.assertFalse(Car.objects.get(pk=self.car.pk).availability)
+
+    def test_rental_boundaries(self):
+        self.assertFalse(self.free(4, 6))  # starts on the return day: no same-day turnover
+        self.assertFalse(self.free(-3, 0))  # ends on the first day
+        self.assertFalse(self.free(1, 2))
+        self.assertFalse(self.free(-1, 5))
+        self.assertTrue(self.free(5, 7))  # starts the day after
+        self.assertTrue(self.free(-3, -1))  # ends the day before
+        self.assertTrue(self.free(0, 4, exclude_rental=self.rental.pk))
+        with self.assertRaises(ValueError):  # refused by Rental.save()
+            Rental.objects.create(
+                customer=make_customer(2), car=Car.objects.get(pk=self.car.pk),
+                rental_date=self.day(4), return_date=self.day(6),
+            )
+
+    def test_reservations_block_like_rentals(self):
+        reservation = Reservation.objects.create(
+            customer=make_customer(2), car=self.car,
+            start_date=self.day(20), end_date=self.day(22), reservation_status='pending',
+        )
+        self.assertFalse(self.free(22, 23))
+        self.assertFalse(self.free(18, 20))
+        self.assertTrue(self.free(23, 24))
+        self.assertTrue(self.free(5, 19))
+        # The reservation holder's own rental, or editing the reservation itself
+        self.assertTrue(self.free(20, 22, for_customer=reservation.customer))
+        self.assertTrue(self.free(20, 22, exclude_reservation=reservation.pk))
+        self.assertFalse(self.free(20, 22, for_customer=self.customer))
+
+        Reservation.objects.filter(pk=reservation.pk).update(reservation_status='approved')
+        self.assertFalse(self.free(20, 22))
+
+    def test_finished_bookings_do_not_block(self):
+        Reservation.objects.create(
+            customer=make_customer(2), car=self.car,
+            start_date=self.day(0), end_date=self.day(4), reservation_status='cancelled',
+        )
+        self.assertFalse(self.free(0, 4))
+        Rental.objects.filter(pk=self.rental.pk).update(status='returned')
+        self.assertTrue(self.free(0, 4))
+        self.assertEqual(list(availability.available_cars(self.day(0), self.day(4))), [self.car])
+
+
+class PricingTests(TestCase):
+
+    def setUp(self):
+        self.customer = make_customer()
+        self.car = make_car()
+        EquipmentRate.objects.update_or_create(equipment='gps', defaults={'daily_rate': '11.50'})
+
+    def test_single_and_bulk_pricing_agree(self):
+        start = date.today()
+        rentals = []
+        for n, flags in enumerate(product([False, True], repeat=len(EQUIPMENT_FIELDS))):
+            rentals.append(Rental(
+                customer=self.customer, car=self.car, total_cost=0,
+                # Same-day rentals are charged one day
+                rental_date=start, return_date=start + timedelta(days=n % 5),
+                **dict(zip(EQUIPMENT_FIELDS.values(), flags)),
+            ))
+        expected = [price_rental(rental) for rental in rentals]
+        rentals = Rental.objects.bulk_create(rentals)  # unpriced: save() is skipped
+
+        self.assertEqual(reprice_rentals(Rental.objects.all(), batch_size=10), len(rentals))
+        totals = dict(Rental.objects.values_list('pk', 'total_cost'))
+        self.assertEqual([totals[rental.pk] for rental in rentals], expected)
+
+        gps_and_driver = Rental(
+            car=self.car, rental_date=start, return_date=start + timedelta(days=3),
+            equipment_gps=True, equipment_driver=True,
+        )
+        self.assertEqual(price_rental(gps_and_driver), Decimal('394.50'))
+
+
+class RentalConcurrencyTests(TransactionTestCase):
+    """Parallel rental_create requests for one car: exactly one may win."""
+
+    workers = 8
+
+    def setUp(self):
+        self.admin = make_admin()
+        self.customer = make_customer()
+        self.car = make_car()
+
+    def post_rental(self, barrier, results):
+        client = Client()
+        client.force_login(self.admin)
+        today = date.today()
+        barrier.wait()
+        try:
+            response = client.post(reverse('rental_add'), {
+                'customer': self.customer.pk,
+                'car': self.car.pk,
+                'rental_date': today,
+                'return_date': today + timedelta(days=3),
+                'deposit_paid': '0',
+                'payment_status': 'pending',
+                'payment_method': 'cash',
+                'status': 'active',
+            })
+            results.append(response.status_code)
+        finally:
+            connection.close()
+
+    def test_parallel_rental_create_books_car_once(self):
+        # Widen the window between the availability check and the insert so
+        # that an unlocked implementation reliably double-books
+        check = availability.is_car_available
+
+        def slow_check(*args, **kwargs):
+            result = check(*args, **kwargs)
+            time.sleep(0.05)
+            return result
+
+        barrier = threading.Barrier(self.workers)
+        results = []
+        with mock.patch.object(availability, 'is_car_available', slow_check):
+            threads = [
+                threading.Thread(target=self.post_rental, args=(barrier, results))
+                for _ in range(self.workers)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        # One redirect to the dashboard; everyone else gets the form back
+        self.assertEqual(sorted(results), [200] * (self.workers - 1) + [302])
+        self.assertEqual(Rental.objects.filter(car=self.car).count(), 1)
+        self.car.refresh_from_db()
+        self.assertFalse(self.car.availability)
+
+
+class DatabaseProfileTests(TransactionTestCase):
+
+    def test_sqlite_connections_are_tuned(self):
+        settings_found = []
+
+        def read_pragmas():
+            try:
+                with connection.cursor() as cursor:
+                    for name in ('journal_mode', 'synchronous', 'busy_timeout'):
+                        cursor.execute(f'PRAGMA {name}')
+                        settings_found.append(cursor.fetchone()[0])
+            finally:
+                connection.close()
+
+        # A new connection, as each worker thread opens
+        thread = threading.Thread(target=read_pragmas)
+        thread.start()
+        thread.join()
+        self.assertEqual(settings_found, ['wal', 1, 5000])
+
+    def test_concurrent_writers(self):
+        results = run_writer_benchmark(writers=3, transactions=10)
+        old, tuned = results.values()
+        self.assertEqual(old['connections_opened'], 30)
+        self.assertEqual(old['counted'], old['committed'])
+        self.assertEqual(tuned['committed'], 30)
+        self.assertEqual(tuned['locked_errors'], 0)
+        self.assertEqual(tuned['counted'], 30)
+        self.assertEqual(tuned['connections_opened'], 3)
+
+
+class EmployeeIdTests(TransactionTestCase):
+
+    def test_ids_continue_after_existing_ones(self):
+        IdSequence.objects.all().delete()  # start the counter from the table
+        user = User.objects.create_user(email='old@example.com', password='secret')
+        Employee.objects.create(
+            user=user, employee_id='EMP-0041', role=Employee.ROLE_MECHANIC,
+            hire_date=date(2024, 1, 1), salary=1000,
+        )
+        self.assertEqual(make_employee().employee_id, 'EMP-0042')
+
+        users = [
+            User.objects.create_user(email=f'bulk{n}@example.com', password='secret')
+            for n in range(3)
+        ]
+        employees = [
+            Employee(user=user, role=Employee.ROLE_SALES_AGENT, hire_date=date(2024, 1, 1), salary=1000)
+            for user in users
+        ]
+        with CaptureQueriesContext(connection) as queries:
+            Employee.objects.bulk_create(assign_employee_ids(employees))
+        # One counter update (and read back) for the whole block
+        self.assertEqual(sum('d_autos_app_idsequence' in query['sql'] for query in queries), 2)
+        self.assertEqual(
+            [employee.employee_id for employee in employees], ['EMP-0043', 'EMP-0044', 'EMP-0045'],
+        )
+
+    def test_parallel_allocations_do_not_overlap(self):
+        allocate('test', 1)
+        blocks = []
+
+        def allocate_block():
+            try:
+                blocks.append(allocate('test', 5))
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=allocate_block) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        numbers = sorted(number for block in blocks for number in block)
+        self.assertEqual(numbers, list(range(2, 42)))
+
+
+class CreateRentalTests(TestCase):
+
+    def setUp(self):
+        self.customer = make_customer()
+        self.car = make_car()
+
+    def test_overlapping_rental_is_refused(self):
+        today = date.today()
+        create_rental(Rental(
+            customer=self.customer, car=self.car,
+            rental_date=today, return_date=today + timedelta(days=3),
+        ))
+        with self.assertRaises(CarUnavailable):
+            create_rental(Rental(
+                customer=make_customer(2), car=Car.objects.get(pk=self.car.pk),
+                rental_date=today + timedelta(days=2), return_date=today + timedelta(days=5),
+            ))
+        self.assertEqual(Rental.objects.count(), 1)
+
+
+class CheckInTests(TestCase):
+
+    def setUp(self):
+        self.customer = make_customer()
+        self.today = date.today()
+
+    def make_rentals(self, count, offset=0):
+        rentals = []
+        for n in range(offset + 1, offset + count + 1):
+            rentals.append(create_rental(Rental(
+                customer=self.customer, car=make_car(n, mileage=1000),
+                rental_date=self.today - timedelta(days=3), return_date=self.today,
+            )))
+        return rentals
+
+    def check_in(self, rentals):
+        with CaptureQueriesContext(connection) as queries:
+            check_in_rentals([(rental.pk, self.today, 1500) for rental in rentals])
+        return len(queries)
+
+    def test_rentals_and_cars_are_updated(self):
+        rentals = self.make_rentals(2)
+        check_in_rentals([(rentals[0].pk, self.today, 1200), (rentals[1].pk, self.today, None)])
+        for rental, mileage in zip(rentals, (1200, 1000)):
+            rental.refresh_from_db()
+            self.assertEqual(rental.status, 'returned')
+            self.assertEqual(rental.actual_return_date, self.today)
+            self.assertTrue(rental.car.availability)
+            self.assertEqual(rental.car.mileage, mileage)
+
+    def test_query_count_does_not_grow_with_the_batch(self):
+        self.assertEqual(self.check_in(self.make_rentals(2)), self.check_in(self.make_rentals(10, 2)))
+
+    def test_an_invalid_row_writes_nothing(self):
+        rentals = self.make_rentals(2)
+        with self.assertRaises(CheckInError) as raised:
+            check_in_rentals([(rentals[0].pk, self.today, 1200), (rentals[1].pk, self.today, 10)])
+        self.assertEqual(list(raised.exception.errors), [rentals[1].pk])
+        self.assertFalse(Rental.objects.exclude(status='active').exists())
+        self.assertFalse(Car.objects.filter(availability=True).exists())
+
+    def test_api(self):
+        self.client.force_login(make_admin())
+        rental, = self.make_rentals(1)
+        url = reverse('rental_check_in_api')
+        body = {'returns': [{'rental': rental.pk, 'actual_return_date': self.today.isoformat()}]}
+        response = self.client.post(url, json.dumps(body), content_type='application/json')
+        self.assertEqual(response.json(), {'returned': [rental.pk]})
+        response = self.client.post(url, json.dumps(body), content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'errors': {str(rental.pk): 'Already returned.'}})
+
+    def test_form(self):
+        self.client.force_login(make_admin())
+        first, second = self.make_rentals(2)
+        url = reverse('rental_check_in')
+        self.assertContains(self.client.get(url), 'Corolla 2')
+        response = self.client.post(url, {
+            'form-TOTAL_FORMS': 2, 'form-INITIAL_FORMS': 2,
+            'form-0-rental': first.pk, 'form-0-selected': 'on',
+            'form-0-actual_return_date': self.today, 'form-0-mileage': 1100,
+            'form-1-rental': second.pk, 'form-1-actual_return_date': self.today,
+        })
+        self.assertRedirects(response, reverse('rental_list'))
+        self.assertEqual(
+            list(Rental.objects.filter(status='returned').values_list('pk', flat=True)), [first.pk]
+        )
+
+
+class SearchTests(TestCase):
+
+    def setUp(self):
+        self.ama = make_customer(1)
+        self.ama.first_name, self.ama.last_name = 'Ama', 'Mensah'
+        self.ama.save()
+        self.kofi = make_customer(2)
+        self.kofi.first_name, self.kofi.last_name = 'Kofi', 'Amankwah'
+        self.kofi.save()
+
+    def test_prefix_matches_every_word(self):
+        self.assertEqual(list(search_customers('am')), [self.ama, self.kofi])
+        self.assertEqual(list(search_customers('kof aman')), [self.kofi])
+        self.assertEqual(list(search_customers('lic 2')), [self.kofi])
+        self.assertEqual(list(search_customers('nobody')), [])
+
+    def test_limit(self):
+        self.assertEqual(len(search_customers('example', limit=1)), 1)
+
+    def test_rentals_follow_customer_and_car_edits(self):
+        today = date.today()
+        car = make_car()
+        rental = create_rental(Rental(
+            customer=self.ama, car=car, rental_date=today, return_date=today + timedelta(days=2),
+        ))
+        self.assertEqual(list(search_rentals('toyota ama')), [rental])
+
+        self.ama.first_name = 'Abena'
+        self.ama.save()
+        car.brand = 'Honda'
+        car.save()
+        self.assertEqual(list(search_rentals('toyota')), [])
+        self.assertEqual(list(search_rentals('hond aben')), [rental])
+
+        rental.delete()
+        self.assertEqual(list(search_rentals('honda')), [])
+
+
+def make_employee(n=1):
+    user = User.objects.create_user(
+        email=f'employee{n}@example.com', password='secret',
+        first_name=f'Employee{n}', last_name='Test',
+    )
+    return Employee.objects.create(
+        user=user, role=Employee.ROLE_SALES_AGENT, hire_date=date(2024, 1, 1), salary=1000,
+    )
+
+
+def stale_fragments():
+    """Move every table version on, so no cached dashboard fragment is current."""
+    for model in VERSIONED_MODELS:
+        versions.bump_version(versions.table_version(model))
+
+
+def seed_listings(start, count, employee):
+    """``count`` rows of every listed model, numbered from ``start``."""
+    today = date.today()
+    for n in range(start, start + count):
+        customer = make_customer(n)
+        car = make_car(n)
+        rental = Rental.objects.create(
+            customer=customer, car=car, employee=employee,
+            rental_date=today, return_date=today + timedelta(days=2),
+        )
+        Payment.objects.create(
+            rental=rental, customer=customer, amount=100, payment_method='cash',
+        )
+        Reservation.objects.create(
+            customer=customer, car=make_car(n + 1000),
+            start_date=today + timedelta(days=10), end_date=today + timedelta(days=12),
+            reservation_status='pending',
+        )
+        Maintenance.objects.create(
+            car=car, employee=employee, title=f'Service {n}',
+            scheduled_date=today, service_type='oil_change',
+        )
+        make_employee(n + 1)
+
+
+@shared_cache
+class QueryBudgetTests(TestCase):
+    """
+    Listing pages must run a fixed number of queries however many rows they
+    show. Each page is rendered over a small and a larger data set; the
+    counts must match and stay within the page's budget.
+    """
+
+    # url name -> most queries the page may run. Identity costs none: the
+    # session and user come from the cache (principals.py) and the session
+    # is not saved (SessionRefreshMiddleware). Cached dashboard fragments
+    # are made stale first, so the budgets cover rendering every table.
+    budgets = {
+        'admin_dashboard': 11,
+        'customer_list': 1,
+        'car_list': 1,
+        'rental_list': 1,
+        'payment_list': 1,
+        'reservation_list': 1,
+        'maintenance_list': 1,
+        'employee_list': 1,
+    }
+    tables = ['customers', 'cars', 'rentals', 'payments', 'maintenances', 'reservations', 'employees']
+
+    def setUp(self):
+        self.admin = make_admin()
+        self.employee = make_employee()
+        self.client.force_login(self.admin)
+
+    def count_queries(self, url):
+        stale_fragments()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, url)
+        return len(queries)
+
+    def assertQueryBudget(self, urls):
+        """Check every ``url: budget`` pair at two data set sizes."""
+        seed_listings(1, 2, self.employee)
+        # The first request also builds the dashboard snapshot; not counted
+        for url in urls:
+            self.count_queries(url)
+        small = {url: self.count_queries(url) for url in urls}
+        seed_listings(3, 6, self.employee)
+        for url, budget in urls.items():
+            with self.subTest(url=url):
+                queries = self.count_queries(url)
+                self.assertEqual(queries, small[url], f'{url} runs a query per row')
+                self.assertLessEqual(queries, budget, f'{url} is over its query budget')
+
+    def test_admin_pages(self):
+        urls = {reverse(name): budget for name, budget in self.budgets.items()}
+        urls.update({reverse('dashboard_table', args=[table]): 1 for table in self.tables})
+        self.assertQueryBudget(urls)
+
+    def test_search_results(self):
+        self.assertQueryBudget({
+            reverse('customer_list') + '?q=customer': 2,
+            reverse('rental_list') + '?q=toyota': 2,
+        })
+
+    def test_employee_dashboard(self):
+        self.client.force_login(self.employee.user)
+        self.assertQueryBudget({reverse('employee_dashboard'): 11})
+
+
+@shared_cache
+class AsyncDashboardTests(TestCase):
+    """The async dashboards show what the sync ones do, with the same queries."""
+
+    def setUp(self):
+        self.admin = make_admin()
+        self.employee = make_employee()
+        seed_listings(1, 3, self.employee)
+
+    def get(self, client, url):
+        if isinstance(client, Client):
+            return client.get(url)
+        return async_to_sync(client.get)(url)
+
+    def assertSamePage(self, user, sync_name, async_name, keys):
+        pages = []
+        for client, name in ((self.client, sync_name), (self.async_client, async_name)):
+            client.force_login(user)
+            self.get(client, reverse(name))  # caches the session, user and snapshot
+            with CaptureQueriesContext(connection) as queries:
+                response = self.get(client, reverse(name))
+            self.assertEqual(response.status_code, 200)
+            context = response.context
+            pages.append((
+                len(queries),
+                {key: [getattr(row, 'pk', row) for row in context[key]] for key in keys},
+                [row.pk for row in context['rentals_page']],
+            ))
+        self.assertEqual(pages[0], pages[1])
+
+    def test_admin_dashboard(self):
+        self.assertSamePage(
+            self.admin, 'admin_dashboard', 'admin_dashboard_async',
+            ['customers', 'cars', 'rentals'],
+        )
+
+    def test_employee_dashboard(self):
+        self.assertSamePage(
+            self.employee.user, 'employee_dashboard', 'employee_dashboard_async',
+            ['rentals', 'maintenances', 'customers', 'cars'],
+        )
+
+
+@shared_cache
+class FragmentCacheTests(TestCase):
+
+    def setUp(self):
+        self.admin = make_admin()
+        self.employee = make_employee()
+        seed_listings(1, 2, self.employee)
+        self.client.force_login(self.admin)
+        self.client.get(reverse('admin_dashboard'))  # caches the session, user and snapshot
+        stale_fragments()
+        reset_fragment_counts()
+
+    def get(self, name='admin_dashboard'):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse(name))
+        self.assertEqual(response.status_code, 200)
+        return response, len(queries)
+
+    def test_unchanged_tables_are_served_from_the_cache(self):
+        first, rendered = self.get()
+        self.assertEqual(fragment_counts()['rentals'], (0, 1))
+        second, cached = self.get()
+        self.assertEqual(fragment_counts()['rentals'], (1, 1))
+        self.assertEqual(second.content, first.content)
+        # The seven table pages are not read
+        self.assertEqual(rendered - cached, 7)
+
+    def test_writes_render_dependent_tables_again(self):
+        self.get()
+        car = Car.objects.get(plate_number='GR-0001-24')
+        car.model = 'Yaris'
+        car.save()
+        response, _ = self.get()
+        self.assertContains(response, 'Toyota Yaris')
+        counts = fragment_counts()
+        # Tables showing cars are rendered again; the others come from the cache
+        self.assertEqual(counts['cars'], (0, 2))
+        self.assertEqual(counts['rentals'], (0, 2))
+        self.assertEqual(counts['customers'], (1, 1))
+        self.assertEqual(counts['employees'], (1, 1))
+        stats = self.client.get(reverse('dashboard_fragment_stats')).json()
+        self.assertEqual(stats['cars'], {'hits': 0, 'misses': 2})
+
+    def test_agents_share_the_employee_dashboard(self):
+        self.client.force_login(self.employee.user)
+        self.get('employee_dashboard')
+        self.client.force_login(make_employee(50).user)
+        self.get('employee_dashboard')
+        # 'customers' is also cached once more as the overview table
+        self.assertEqual(fragment_counts()['payments'], (1, 1))
+        self.assertEqual(fragment_counts()['customers'], (2, 2))
+
+    @override_settings(SHARED_CACHE=False)
+    def test_nothing_is_cached_without_a_shared_cache(self):
+        _, first = self.get()
+        Car.objects.filter(plate_number='GR-0001-24').update(model='Yaris')  # bumps no version
+        response, second = self.get()
+        self.assertContains(response, 'Toyota Yaris')
+        self.assertEqual(second, first)
+        self.assertEqual(fragment_counts()['cars'], (0, 0))
+
+
+@shared_cache
+class ChartDataTests(TestCase):
+
+    def setUp(self):
+        self.admin = make_admin()
+        self.employee = make_employee()
+        seed_listings(1, 2, self.employee)
+        self.client.force_login(self.admin)
+        self.rentals_url = reverse('dashboard_chart', args=['rentals-per-car'])
+        self.revenue_url = reverse('dashboard_chart', args=['revenue-per-month'])
+
+    def test_series(self):
+        data = self.client.get(self.rentals_url).json()
+        self.assertEqual(data, {'labels': ['Toyota Corolla 1', 'Toyota Corolla 2'], 'data': [1, 1]})
+        data = self.client.get(self.revenue_url).json()
+        self.assertEqual(data, {'labels': [date.today().strftime('%b %Y')], 'data': [200.0]})
+
+    def test_unchanged_data_is_not_modified_without_queries(self):
+        response = self.client.get(self.revenue_url)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('no-cache', response['Cache-Control'])
+        etag, last_modified = response['ETag'], response['Last-Modified']
+
+        for headers in ({'If-None-Match': etag}, {'If-Modified-Since': last_modified}):
+            with self.subTest(headers=headers):
+                with CaptureQueriesContext(connection) as queries:
+                    response = self.client.get(self.revenue_url, headers=headers)
+                self.assertEqual(response.status_code, 304)
+                self.assertEqual(len(queries), 0)
+
+    def test_writes_change_the_etag(self):
+        rentals_etag = self.client.get(self.rentals_url)['ETag']
+        revenue_etag = self.client.get(self.revenue_url)['ETag']
+
+        Payment.objects.create(customer=Customer.objects.first(), amount=50, payment_method='cash')
+        response = self.client.get(self.revenue_url, headers={'If-None-Match': revenue_etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['data'], [250.0])
+        # Another table's write leaves the chart valid
+        response = self.client.get(self.rentals_url, headers={'If-None-Match': rentals_etag})
+        self.assertEqual(response.status_code, 304)
+
+        car = Car.objects.get(plate_number='GR-0001-24')
+        car.brand = 'Honda'
+        car.save()
+        response = self.client.get(self.rentals_url, headers={'If-None-Match': rentals_etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['labels'][0], 'Honda Corolla 1')
+
+    def test_rebuilding_the_snapshot_changes_the_etag(self):
+        etag = self.client.get(self.revenue_url)['ETag']
+        Payment.objects.update(amount=150)  # no signals: only a rebuild sees it
+        rebuild_dashboard_stats()
+        response = self.client.get(self.revenue_url, headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['data'], [300.0])
+
+    @override_settings(SHARED_CACHE=False)
+    def test_unshared_cache_validates_the_content(self):
+        response = self.client.get(self.revenue_url)
+        self.assertNotIn('Last-Modified', response)
+        etag = response['ETag']
+        response = self.client.get(self.revenue_url, headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 304)
+
+        # Written through another worker: no table version moves here
+        Payment.objects.filter(pk=Payment.objects.first().pk).update(amount=150)
+        rebuild_dashboard_stats()
+        response = self.client.get(self.revenue_url, headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['data'], [250.0])
+
+    def test_revenue_is_admin_only(self):
+        self.client.force_login(self.employee.user)
+        self.assertEqual(self.client.get(self.rentals_url).status_code, 200)
+        self.assertEqual(self.client.get(self.revenue_url).status_code, 404)
+        self.assertEqual(self.client.get(reverse('dashboard_chart', args=['nope'])).status_code, 404)
+
+
+@shared_cache
+class SessionRefreshTests(TestCase):
+
+    def setUp(self):
+        self.client.force_login(make_admin())
+        self.url = reverse('car_list')
+
+    def session_writes(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url)
+        writes = [
+            query for query in queries
+            if 'django_session' in query['sql'] and not query['sql'].startswith('SELECT')
+        ]
+        cookie = response.cookies.get(settings.SESSION_COOKIE_NAME)
+        # A deleted cookie is sent back empty
+        return len(writes), bool(cookie and cookie.value)
+
+    def test_expiry_is_refreshed_once_per_interval(self):
+        now = time.time()
+        with mock.patch('d_autos_app.middleware.time.time', return_value=now):
+            self.assertEqual(self.session_writes(), (1, True))
+            self.assertEqual(self.session_writes(), (0, False))
+        later = now + settings.SESSION_REFRESH_INTERVAL
+        with mock.patch('d_autos_app.middleware.time.time', return_value=later):
+            self.assertEqual(self.session_writes(), (1, True))
+            self.assertEqual(self.session_writes(), (0, False))
+
+    def test_logout_does_not_save_a_new_session(self):
+        self.client.get(reverse('logout'))
+        self.assertEqual(self.session_writes(), (0, False))
+
+
+@shared_cache
+class PrincipalCacheTests(TestCase):
+
+    def test_user_and_profile_are_cached_until_saved(self):
+        employee = make_employee()
+        user = get_principal(employee.user_id)
+        with self.assertNumQueries(0):
+            user = get_principal(employee.user_id)
+            self.assertTrue(user.is_employee)
+            self.assertEqual(user.employee_profile.role, Employee.ROLE_SALES_AGENT)
+
+        employee.role = Employee.ROLE_MANAGER
+        employee.save()
+        self.assertEqual(get_principal(employee.user_id).employee_profile.role, Employee.ROLE_MANAGER)
+
+        admin = make_admin()
+        with self.assertRaises(Employee.DoesNotExist):
+            get_principal(admin.pk).employee_profile
+        with self.assertNumQueries(0), self.assertRaises(Employee.DoesNotExist):
+            get_principal(admin.pk).employee_profile
+
+    @override_settings(SHARED_CACHE=False)
+    def test_nothing_is_cached_without_a_shared_cache(self):
+        employee = make_employee()
+        get_principal(employee.user_id)
+        with self.assertNumQueries(1):
+            self.assertEqual(get_principal(employee.user_id).employee_profile, employee)
+        self.client.force_login(employee.user)
+        self.assertEqual(self.client.get(reverse('employee_dashboard')).status_code, 200)
+        # Another worker deactivates the user; this one has nothing cached to go stale
+        User.objects.filter(pk=employee.user_id).update(is_active=False)
+        self.assertEqual(self.client.get(reverse('employee_dashboard')).status_code, 302)
+
+    def test_deactivated_user_is_logged_out(self):
+        employee = make_employee()
+        self.client.force_login(employee.user)
+        self.assertEqual(self.client.get(reverse('employee_dashboard')).status_code, 200)
+        employee.user.is_active = False
+        employee.user.save()
+        self.assertEqual(self.client.get(reverse('employee_dashboard')).status_code, 302)
+
+
+@shared_cache
+class ProfilingTests(TestCase):
+
+    def setUp(self):
+        self.client.force_login(make_admin())
+
+    @override_settings(PROFILING_ENABLED=True, PROFILING_SAMPLE_RATE=1, PROFILING_SLOW_REQUEST_MS=0)
+    def test_timings_header_and_slow_log(self):
+        make_car()
+        with self.assertLogs('d_autos_app.slow_requests') as logs:
+            self.client.get(reverse('car_list'))  # loads the session and user
+            response = self.client.get(reverse('car_list'))
+        timings = dict(
+            part.split(';')[0:2] for part in response['Server-Timing'].split(', ')
+        )
+        self.assertEqual(set(timings), {'db', 'tpl', 'view', 'total'})
+        self.assertIn('desc="1 queries"', response['Server-Timing'])
+
+        entry = json.loads(logs.records[-1].getMessage())
+        self.assertEqual((entry['path'], entry['status'], entry['queries']), ('/cars/', 200, 1))
+        self.assertEqual(entry['view'], 'd_autos_app.views.car_list')
+        self.assertIn('d_autos_app_car', entry['slowest_queries'][0]['sql'])
+        self.assertGreater(entry['template_ms'], 0)
+
+    @override_settings(PROFILING_ENABLED=True, PROFILING_SAMPLE_RATE=0)
+    def test_unsampled_requests_are_not_measured(self):
+        self.assertNotIn('Server-Timing', self.client.get(reverse('car_list')))
+
+    def test_off_by_default(self):
+        self.assertNotIn('Server-Timing', self.client.get(reverse('car_list')))
+
+
+@shared_cache
+class CarChoicesTests(TestCase):
+
+    def setUp(self):
+        self.car = make_car()
+        self.today = date.today()
+        self.end = self.today + timedelta(days=3)
+
+    def test_choices_are_cached_until_the_fleet_changes(self):
+        choices = car_choices(self.today, self.end)
+        self.assertEqual([pk for pk, label in choices], [self.car.pk])
+        with self.assertNumQueries(0):
+            self.assertEqual(car_choices(self.today, self.end), choices)
+            RentalForm({'rental_date': self.today, 'return_date': self.end})
+
+        other = make_car(2)
+        self.assertEqual([pk for pk, label in car_choices(self.today, self.end)], [self.car.pk, other.pk])
+
+        create_rental(Rental(
+            customer=make_customer(), car=other, rental_date=self.today, return_date=self.end,
+        ))
+        self.assertEqual([pk for pk, label in car_choices(self.today, self.end)], [self.car.pk])
+
+    @override_settings(SHARED_CACHE=False)
+    def test_choices_are_read_every_time_without_a_shared_cache(self):
+        car_choices(self.today, self.end)
+        Car.objects.filter(pk=self.car.pk).update(availability=False)  # bumps no version
+        self.assertEqual(car_choices(self.today, self.end), [])
+
+
+class ImportTests(TestCase):
+
+    fleet_csv = (
+        'brand,model,year,plate_number,rental_price_per_day,availability\n'
+        'Toyota,Corolla,2022,GR-0001-24,100,yes\n'
+        'Kia,Rio,not a year,GR-0002-24,80,yes\n'
+        'Kia,Picanto,2021,GR-0001-24,70,no\n'
+        'Honda,Civic,2023,GR-0009-24,120,no\n'
+    )
+
+    def import_csv(self, kind, text, **kwargs):
+        errors = []
+        result = import_file(
+            kind, BytesIO(text.encode()), 'upload.csv',
+            on_error=lambda line, row_errors: errors.append((line, sorted(row_errors))),
+            **kwargs
+        )
+        return result, errors
+
+    def test_fleet_import_reports_bad_rows_and_loads_the_rest(self):
+        make_car(9)  # GR-0009-24 already exists
+        get_dashboard_stats()
+        result, errors = self.import_csv('fleet', self.fleet_csv, batch_size=2)
+
+        self.assertEqual((result.created, result.failed), (1, 3))
+        self.assertEqual(errors, [(3, ['year']), (4, ['plate_number']), (5, ['plate_number'])])
+        car = Car.objects.get(plate_number='GR-0001-24')
+        self.assertTrue(car.availability)
+        self.assertEqual(car.daily_rate, 100)
+        self.assertEqual(get_dashboard_stats().total_cars, 2)
+
+    def test_customer_import_is_searchable(self):
+        result, errors = self.import_csv('customers', (
+            'first_name,last_name,phone,email,license_number,license_issue_date,license_expiry_date\n'
+            'Ama,Mensah,0200000000,ama@example.com,LIC-9,2020-01-01,2030-01-01\n'
+        ))
+        self.assertEqual((result.created, errors), (1, []))
+        self.assertEqual([c.email for c in search_customers('mensah')], ['ama@example.com'])
+
+    def test_upload_view(self):
+        self.client.force_login(make_admin())
+        response = self.client.post(reverse('import_data'), {
+            'kind': 'fleet',
+            'file': SimpleUploadedFile('cars.csv', self.fleet_csv.encode()),
+        })
+        self.assertEqual(response.context['result'].created, 2)
+        self.assertEqual([line for line, field, message in response.context['errors']], [3, 4])
+
+    def test_latin1_csv_is_rejected_before_any_row_loads(self):
+        latin1 = (self.fleet_csv + 'Citroën,C3,2022,GR-0010-24,90,yes\n').encode('latin-1')
+        with self.assertRaisesMessage(ImportFileError, 'not UTF-8'):
+            import_file('fleet', BytesIO(latin1), 'cars.csv', batch_size=1)
+        self.assertFalse(Car.objects.exists())
+
+        class Stream(BytesIO):
+            def seekable(self):
+                return False
+
+        # A stream cannot be checked up front; its rows stop at the bad line
+        with self.assertRaisesMessage(ImportFileError, 'not UTF-8'):
+            import_file('fleet', Stream(latin1), 'cars.csv', batch_size=1)
+
+    def test_unreadable_xlsx_is_rejected(self):
+        for content in (b'garbage', self.fleet_csv.encode()):
+            with self.assertRaisesMessage(ImportFileError, 'not a readable Excel'):
+                import_file('fleet', BytesIO(content), 'cars.xlsx')
+
+    def test_upload_view_reports_unreadable_files(self):
+        self.client.force_login(make_admin())
+        for upload in (
+            SimpleUploadedFile('cars.csv', 'Citroën,C3'.encode('latin-1')),
+            SimpleUploadedFile('cars.xlsx', b'garbage'),
+        ):
+            response = self.client.post(reverse('import_data'), {'kind': 'fleet', 'file': upload})
+            self.assertEqual(response.status_code, 200)
+            self.assertTrue(response.context['form'].has_error('file'))
+
+
+class ReconciliationTests(TestCase):
+
+    statement = (
+        'transaction_id,amount,date\n'
+        'TX-1,300.00,2026-01-05\n'
+        'TX-2,"1,000.00",2026-01-05\n'
+        'TX-3,50,2026-01-06\n'
+        'TX-404,10,2026-01-06\n'
+        'TX-1,300.00,2026-01-07\n'
+        'TX-4,oops,2026-01-07\n'
+    )
+
+    def setUp(self):
+        customer = make_customer()
+        today = date.today()
+        self.rentals = [
+            create_rental(Rental(
+                customer=customer, car=make_car(n),
+                rental_date=today, return_date=today + timedelta(days=3),
+            ))
+            for n in (1, 2, 3)
+        ]
+        for rental, (transaction_id, amount) in zip(
+            self.rentals, [('TX-1', 300), ('TX-2', 1000), ('TX-3', 60)]
+        ):
+            Payment.objects.create(
+                rental=rental, amount=amount, payment_method='momo', transaction_id=transaction_id,
+            )
+
+    def reconcile(self, **kwargs):
+        problems = []
+        result = reconcile_file(
+            BytesIO(self.statement.encode()), 'statement.csv',
+            on_problem=lambda *problem: problems.append(problem), **kwargs
+        )
+        return result, problems
+
+    def test_matches_are_marked_paid_and_the_rest_reported(self):
+        with CaptureQueriesContext(connection) as queries:
+            result, problems = self.reconcile()
+
+        self.assertEqual((result.matched, result.already_paid, result.problems), (2, 0, 4))
+        self.assertEqual(sorted(line for line, transaction_id, message in problems), [4, 5, 6, 7])
+        self.assertEqual(
+            dict(Payment.objects.values_list('transaction_id', 'payment_status')),
+            {'TX-1': 'paid', 'TX-2': 'paid', 'TX-3': 'pending'},
+        )
+        self.assertEqual(
+            [rental.payment_status for rental in Rental.objects.order_by('pk')],
+            ['paid', 'paid', 'pending'],
+        )
+        # One lookup and one update per table, not one per line
+        self.assertEqual(len([q for q in queries if not q['sql'].startswith(('SAVEPOINT', 'RELEASE'))]), 3)
+
+    def test_rerun_counts_already_paid(self):
+        self.reconcile(batch_size=2)
+        result, problems = self.reconcile(batch_size=2)
+        self.assertEqual((result.matched, result.already_paid), (0, 2))
+
+    def test_upload_view(self):
+        self.client.force_login(make_admin())
+        response = self.client.post(reverse('payment_reconcile'), {
+            'file': SimpleUploadedFile('statement.csv', self.statement.encode()),
+        })
+        self.assertEqual(response.context['result'].matched, 2)
+        self.assertEqual(len(response.context['problems']), 4)
+
+    def test_upload_view_reports_unreadable_files(self):
+        self.client.force_login(make_admin())
+        for upload in (
+            SimpleUploadedFile('statement.csv', (self.statement + 'TX-5,1,Déc\n').encode('latin-1')),
+            SimpleUploadedFile('statement.xlsx', b'garbage'),
+        ):
+            response = self.client.post(reverse('payment_reconcile'), {'file': upload})
+            self.assertEqual(response.status_code, 200)
+            self.assertTrue(response.context['form'].has_error('file'))
+        self.assertFalse(Payment.objects.filter(payment_status='paid').exists())
+
+
+@shared_cache
+class CustomerLedgerTests(TestCase):
+
+    def setUp(self):
+        self.customer = make_customer()
+        self.other = make_customer(2)
+        today = date.today()
+        self.rental = create_rental(Rental(
+            customer=self.customer, car=make_car(1), deposit_paid=50,
+            rental_date=today, return_date=today + timedelta(days=3),
+        ))
+        rebuild_customer_ledger()
+
+    def ledger(self):
+        return {
+            row.customer_id: (row.charged, row.deposits, row.paid, row.balance)
+            for row in CustomerLedger.objects.all() if any((row.charged, row.deposits, row.paid))
+        }
+
+    def assertLedgerConsistent(self):
+        """The incrementally kept ledger equals a fresh rebuild."""
+        kept = self.ledger()
+        rebuild_customer_ledger()
+        self.assertEqual(kept, self.ledger())
+
+    def test_signals_keep_the_ledger_current(self):
+        self.assertEqual(self.ledger()[self.customer.pk], (300, 50, 0, 250))
+        payment = Payment.objects.create(rental=self.rental, amount=100, payment_method='cash')
+        self.assertEqual(self.ledger()[self.customer.pk][3], 150)
+        payment.amount = 120
+        payment.save()
+        Payment.objects.create(customer=self.other, amount=20, payment_method='cash')
+        self.rental.deposit_paid = 80
+        self.rental.save()
+        self.assertLedgerConsistent()
+        self.assertEqual(self.ledger()[self.customer.pk], (300, 80, 120, 100))
+        payment.delete()
+        self.assertLedgerConsistent()
+        self.rental.delete()
+        self.assertLedgerConsistent()
+
+    def test_payments_follow_a_rental_to_its_new_customer(self):
+        Payment.objects.create(rental=self.rental, amount=100, payment_method='cash')
+        Payment.objects.create(rental=self.rental, customer=self.customer, amount=30, payment_method='cash')
+        self.rental.customer = self.other
+        self.rental.save()
+        self.assertLedgerConsistent()
+        # Only the payment made by the customer themselves stays with them
+        self.assertEqual(self.ledger()[self.customer.pk], (0, 0, 30, -30))
+        self.assertEqual(self.ledger()[self.other.pk], (300, 50, 100, 150))
+
+    def test_bulk_repricing_adjusts_the_ledger(self):
+        Rental.objects.filter(pk=self.rental.pk).update(equipment_gps=True)
+        reprice_rentals()
+        self.assertLedgerConsistent()
+
+    def test_deleting_a_customer_drops_their_row(self):
+        Payment.objects.create(rental=self.rental, amount=100, payment_method='cash')
+        self.customer.delete()
+        self.assertFalse(CustomerLedger.objects.exists())
+
+    def test_outstanding_balances_page(self):
+        self.client.force_login(make_admin())
+        self.client.get(reverse('customer_balances'))  # caches the session and user
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('customer_balances'))
+        self.assertEqual([row.customer_id for row in response.context['page']], [self.customer.pk])
+        self.assertEqual(len(queries), 2)  # ledger built check, page
+        self.assertEqual(list(outstanding_balances()), list(response.context['page']))
+
+
+class ServiceDueTests(TestCase):
+
+    def serviced(self, n, days_ago, mileage_at_service, mileage, status=Maintenance.STATUS_COMPLETED):
+        car = make_car(n, mileage=mileage)
+        done = date.today() - timedelta(days=days_ago)
+        Maintenance.objects.create(
+            car=car, status=status, scheduled_date=done, completed_date=done,
+            mileage_at_service=mileage_at_service,
+        )
+        return car
+
+    def setUp(self):
+        # General services: next one 180 days / 5000 km later
+        self.overdue = self.serviced(1, days_ago=200, mileage_at_service=10_000, mileage=11_000)
+        self.worn = self.serviced(2, days_ago=10, mileage_at_service=10_000, mileage=14_500)
+        self.soon = self.serviced(3, days_ago=170, mileage_at_service=10_000, mileage=10_100)
+        self.serviced(4, days_ago=10, mileage_at_service=10_000, mileage=10_100)  # not due
+        booked = self.serviced(5, days_ago=300, mileage_at_service=10_000, mileage=10_100)
+        Maintenance.objects.create(car=booked, scheduled_date=date.today() + timedelta(days=2))
+        make_car(6)  # never serviced
+
+    def test_completing_a_service_records_it_on_the_car(self):
+        self.assertEqual(Car.objects.get(pk=self.worn.pk).last_service_date, date.today() - timedelta(days=10))
+
+    def test_queue_is_prioritized(self):
+        queue = list(service_queue())
+        self.assertEqual([car.pk for car in queue], [self.overdue.pk, self.soon.pk, self.worn.pk])
+        self.assertEqual([car.due_rank for car in queue], [0, 1, 1])
+        self.assertEqual(queue[2].km_left, 500)
+
+    def test_queue_pages(self):
+        first = keyset_paginate(service_queue(), QUEUE_ORDERING, page_size=2)
+        second = keyset_paginate(service_queue(), QUEUE_ORDERING, cursor=first.next_cursor, page_size=2)
+        self.assertEqual([car.pk for car in second], [self.worn.pk])
+
+    def test_view(self):
+        self.client.force_login(make_admin())
+        response = self.client.get(reverse('maintenance_due'), {'days': 0, 'km': 0})
+        self.assertEqual([car.pk for car in response.context['page']], [self.overdue.pk])
+
+    def test_horizons_are_limited(self):
+        self.client.force_login(make_admin())
+        url = reverse('maintenance_due')
+        self.assertEqual(self.client.get(url, {'days': 99_999_999}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'km': 3_000_000_000}).status_code, 400)
+        with self.assertRaisesMessage(CommandError, 'days must be between'):
+            call_command('service_due', days=99_999_999)
+        with self.assertRaisesMessage(CommandError, 'km must be between'):
+            call_command('service_due', km=-1)
+
+
+class ExportTests(TestCase):
+
+    def setUp(self):
+        self.employee = make_employee()
+        seed_listings(1, 3, self.employee)
+        Rental.objects.filter(customer__first_name='Customer2').update(status='returned')
+        self.client.force_login(make_admin())
+
+    def export(self, table, **params):
+        response = self.client.get(reverse('export_csv', args=[table]), params)
+        self.assertTrue(response.streaming)
+        return b''.join(response.streaming_content).decode().splitlines()
+
+    def test_filters(self):
+        lines = self.export('rentals', status='active')
+        self.assertTrue(lines[0].startswith('Rental ID,Rental date'))
+        self.assertEqual(len(lines), 3)
+        tomorrow = (date.today() + timedelta(days=1)).isoformat()
+        self.assertEqual(len(self.export('payments', start=tomorrow)), 1)
+        self.assertEqual(len(self.export('maintenances', end=date.today().isoformat())), 4)
+
+    def test_bad_filters(self):
+        url = reverse('export_csv', args=['rentals'])
+        self.assertEqual(self.client.get(url, {'start': 'soon'}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'status': 'lost'}).status_code, 400)
+        self.assertEqual(self.client.get(reverse('export_csv', args=['users'])).status_code, 404)
+
+
+class RevenueCubeTests(TestCase):
+
+    def cube(self):
+        return set(
+            RevenueCube.objects.filter(payments__gt=0)
+            .values_list('period', 'bucket', 'dimension', 'key', 'total', 'payments')
+        )
+
+    def test_signals_keep_the_cube_equal_to_a_rebuild(self):
+        employee = make_employee()
+        seed_listings(1, 2, employee)
+        build_revenue_cube()
+
+        rental = Rental.objects.first()
+        payment = Payment.objects.create(
+            rental=rental, amount=40, payment_method='card', payment_date=date(2024, 2, 29),
+        )
+        payment.amount = 55
+        payment.payment_date = date(2024, 3, 4)
+        payment.save()
+        Payment.objects.create(amount=10, payment_method='cash')
+        Payment.objects.exclude(pk=payment.pk).filter(rental__isnull=False).first().delete()
+
+        incremental = self.cube()
+        build_revenue_cube()
+        self.assertEqual(incremental, self.cube())
+
+    def test_series(self):
+        car = make_car()
+        rental = create_rental(Rental(
+            customer=make_customer(), car=car,
+            rental_date=date.today(), return_date=date.today() + timedelta(days=2),
+        ))
+        for day, amount in ((date(2024, 1, 1), 100), (date(2024, 1, 7), 50), (date(2024, 1, 8), 25)):
+            Payment.objects.create(rental=rental, amount=amount, payment_method='cash', payment_date=day)
+
+        weeks = revenue_series('week', 'brand', start=date(2024, 1, 3), end=date(2024, 1, 31))
+        self.assertEqual(
+            [(row['bucket'], row['label'], row['total'], row['payments']) for row in weeks],
+            [(date(2024, 1, 1), 'Toyota', 150, 2), (date(2024, 1, 8), 'Toyota', 25, 1)],
+        )
+        cars = revenue_series('month', 'car', end=date(2024, 1, 31))
+        self.assertEqual([(row['label'], row['total']) for row in cars], [(str(car), 175)])
+
+        self.client.force_login(make_admin())
+        response = self.client.get(reverse('revenue_analytics'), {'period': 'year'})
+        self.assertEqual(response.status_code, 400)
+        response = self.client.get(reverse('revenue_analytics'), {'dimension': 'payment_method'})
+        self.assertEqual(response.json()['rows'][0]['label'], 'cash')
+
+
+class QueryPlanTests(TestCase):
+
+    def test_hot_queries_use_indexes(self):
+        with CaptureQueriesContext(connection) as queries:
+            results = advise()
+        for name, plan, problems in results:
+            with self.subTest(name):
+                self.assertEqual(problems, [], plan)
+        # Read-only: nothing is built on the way
+        writes = [q['sql'] for q in queries if q['sql'].startswith(('INSERT', 'UPDATE', 'DELETE'))]
+        self.assertEqual(writes, [])
+
+    def test_full_scan_is_flagged(self):
+        plan = explain(Customer.objects.filter(first_name='Ann').order_by('last_name'))
+        self.assertIn('full scan of d_autos_app_customer', plan_problems(plan))
+        self.assertEqual(
+            plan_problems('Seq Scan on d_autos_app_rental  (cost=0.00..1.01 rows=1)', 'postgresql'),
+            ['full scan of d_autos_app_rental'],
+        )
+
+
+@shared_cache
+class BenchmarkTests(TestCase):
+
+    def test_seeded_data_is_consistent(self):
+        rows = seed_benchmark_data(300, seed=1)
+        self.assertEqual(rows['rentals'], 300)
+        self.assertEqual(rows['customers'], Customer.objects.count())
+        self.assertEqual(get_dashboard_stats().total_rentals, 300)
+        # Each car's rentals follow one another, as the availability engine expects
+        for rental in Rental.objects.all()[:50]:
+            overlapping = Rental.objects.exclude(pk=rental.pk).filter(
+                car=rental.car_id, rental_date__lte=rental.return_date, return_date__gte=rental.rental_date,
+            )
+            self.assertFalse(overlapping.exists())
+        # Totals include the equipment surcharges
+        self.assertTrue(Rental.objects.filter(equipment_gps=True).exists())
+        self.assertEqual(reprice_rentals(Rental.objects.all()), 0)
+
+        results = run_scenarios(repeat=1)
+        self.assertEqual(set(results), {scenario.name for scenario in scenarios()})
+        self.assertEqual(results['car list']['queries'], 1)
+
+    def test_regressions(self):
+        def run(ms, queries):
+            return {'scales': {'1k': {'scenarios': {'car list': {'median_ms': ms, 'queries': queries}}}}}
+
+        self.assertEqual(regressions(run(10, 1), run(12, 1)), [])
+        self.assertEqual(
+            regressions(run(10, 1), run(20, 2)),
+            ['1k car list: 1 -> 2 queries', '1k car list: 10 -> 20 ms'],
+        )
@@ -8,6 +8,12 @@ urlpatterns = [
     path('dashboard/', views.dashboard, name='dashboard'),
     path('dashboard/admin/', views.admin_dashboard_view, name='admin_dashboard'),
     path('dashboard/employee/', views.employee_dashboard_view, name='employee_dashboard'),
+    # The same dashboards as async views, for ASGI deployments
+    path('dashboard/admin/async/', views.admin_dashboard_async_view, name='admin_dashboard_async'),
+    path('dashboard/employee/async/', views.employee_dashboard_async_view, name='employee_dashboard_async'),
+    path('dashboard/tables/<str:table>/', views.dashboard_table, name='dashboard_table'),
+    path('dashboard/charts/<str:chart>/', views.dashboard_chart, name='dashboard_chart'),
+    path('dashboard/fragments/', views.dashboard_fragment_stats, name='dashboard_fragment_stats'),
 
     # Authentication URLs
     path('login/', views.LoginView.as_view(), name='login'),
@@ -16,12 +22,14 @@ urlpatterns = [
     # Customer URLs
     path('customers/', views.customer_list, name='customer_list'),
     path('customers/add/', views.customer_create, name='customer_add'),
+    path('customers/balances/', views.customer_balances, name='customer_balances'),
     path('customers/<int:pk>/edit/', views.customer_update, name='customer_edit'),
     path('customers/<int:pk>/delete/', views.customer_delete, name='customer_delete'),
 
     # Car URLs
     path('cars/', views.car_list, name='car_list'),
     path('cars/add/', views.car_create, name='car_add'),
+    path('cars/availability/', views.car_availability, name='car_availability'),
     path('cars/<int:pk>/edit/', views.car_update, name='car_edit'),
     path('cars/<int:pk>/delete/', views.car_delete, name='car_delete'),
 
@@ -31,12 +39,15 @@ urlpatterns = [
     path('rentals/<int:pk>/edit/', views.rental_update, name='rental_edit'),
     path('rentals/<int:pk>/delete/', views.rental_delete, name='rental_delete'),
     path('rentals/<int:pk>/return/', views.return_rental, name='return_rental'),
+    path('rentals/check-in/', views.check_in, name='rental_check_in'),
+    path('rentals/check-in/api/', views.check_in_api, name='rental_check_in_api'),
 
     # Payment URLs
     path('payments/', views.payment_list, name='payment_list'),
     path('payments/add/', views.payment_create, name='payment_add'),
     path('payments/<int:pk>/edit/', views.payment_update, name='payment_edit'),
     path('payments/<int:pk>/delete/', views.payment_delete, name='payment_delete'),
+    path('payments/reconcile/', views.reconcile_payments, name='payment_reconcile'),
 
     # Reservation URLs
     path('reservations/', views.reservation_list, name='reservation_list'),
@@ -47,6 +58,7 @@ urlpatterns = [
     # Maintenance URLs
     path('maintenances/', views.maintenance_list, name='maintenance_list'),
     path('maintenances/add/', views.maintenance_create, name='maintenance_add'),
+    path('maintenances/due/', views.maintenance_due, name='maintenance_due'),
     path('maintenances/<int:pk>/edit/', views.maintenance_update, name='maintenance_edit'),
     path('maintenances/<int:pk>/delete/', views.maintenance_delete, name='maintenance_delete'),
 
@@ -57,6 +69,15 @@ urlpatterns = [
     path('employees/<int:pk>/delete/', views.employee_delete, name='employee_delete'),
     path('employees/<int:pk>/reset-password/', views.employee_reset_password, name='employee_reset_password'),
 
+    # Analytics
+    path('analytics/revenue/', views.revenue_analytics, name='revenue_analytics'),
+
+    # CSV exports
+    path('export/<str:table>.csv', views.export_csv, name='export_csv'),
+
+    # Bulk import (admin only)
+    path('import/', views.import_data, name='import_data'),
+
     # Password Reset URLs (optional)
     path('password-reset/', 
          auth_views.PasswordResetView.as_view(
@@ -0,0 +1,67 @@
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+
+VERSION_KEY = 'd_autos:version:{}'
+CHANGED_AT_KEY = 'd_autos:changed_at:{}'
+
+
+def _initial_version():
+    # A counter lost to eviction restarts from the clock rather than 1, so
+    # it never comes back to a value older cache entries were keyed on
+    return time.time_ns()
+
+
+def get_version(name):
+    """Current value of the ``name`` change counter."""
+    key = VERSION_KEY.format(name)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, _initial_version(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def get_versions(names):
+    """get_version() of each of ``names``, in one cache round trip once they exist."""
+    keys = {name: VERSION_KEY.format(name) for name in names}
+    found = cache.get_many(keys.values())
+    return [found[keys[name]] if keys[name] in found else get_version(name) for name in names]
+
+
+def table_version(model):
+    """Name of the counter ``model``'s saves and deletes bump (see signals.py)."""
+    return f'table:{model._meta.label_lower}'
+
+
+def bump_version(name):
+    key = VERSION_KEY.format(name)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, _initial_version(), timeout=None)
+    cache.set(CHANGED_AT_KEY.format(name), time.time(), timeout=None)
+
+
+def last_changed(name):
+    """When ``name`` last changed, as a Unix timestamp."""
+    key = CHANGED_AT_KEY.format(name)
+    changed_at = cache.get(key)
+    if changed_at is None:
+        # Unknown after eviction or a restart: assume it just changed
+        cache.add(key, time.time(), timeout=None)
+        changed_at = cache.get(key)
+    return changed_at
+
+
+def changed(name):
+    """
+    Record a change to ``name`` made in the current transaction.
+
+    The counter moves straight away, so this process never serves data
+    cached before the change, and again on commit, so nothing another
+    request cached from the pre-commit state outlives it.
+    """
+    bump_version(name)
+    transaction.on_commit(lambda: bump_version(name))
@@ -1,17 +1,41 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from .models import Customer, Car, Rental, Payment, Reservation, Maintenance, Employee, User
 from .forms import CustomerForm, CarForm, EmployeeForm, RentalForm, PaymentForm, ReservationForm, MaintenanceForm
-from django.db.models import Count, Sum, Q
-from django.db.models.functions import TruncMonth
+from .pagination import akeyset_paginate, keyset_paginate, InvalidCursor
+from .stats import aget_dashboard_stats, get_dashboard_stats
 from django.contrib.auth import login, logout, authenticate
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django.contrib import messages
+from django.conf import settings
+from django.http import Http404, HttpResponseBadRequest, JsonResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.template.loader import render_to_string
+from django.utils.functional import SimpleLazyObject
 from django.views.generic import View
-from .forms import UserLoginForm
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition
+from asgiref.sync import sync_to_async
+from .forms import UserLoginForm, ImportUploadForm, CheckInFormSet, StatementUploadForm
+from .availability import car_choices
+from .rentals import CarUnavailable, CheckInError, check_in_rentals, create_rental
+from .pricing import equipment_rates
+from .search import search_customers, search_rentals
+from .importers import ImportFileError, error_messages, import_file
+from .reconciliation import reconcile_file
+from .exports import EXPORTS
+from .analytics import revenue_series
+from . import charts, fragments
+from .ledger import outstanding_balances
+from .service_due import (
+    QUEUE_ORDERING, SERVICE_DUE_DAYS, SERVICE_DUE_KM, check_horizon, overdue_maintenances,
+    service_queue,
+)
 from datetime import date
+from functools import partial
+import asyncio
+import json
 import random
 from datetime import date
-from decimal import Decimal
 
 def is_admin(user):
     return user.is_authenticated and user.is_admin
@@ -19,6 +43,61 @@ def is_admin(user):
 def is_employee(user):
     return user.is_authenticated and user.is_employee
 
+# ================= DASHBOARD TABLES =================
+# Every dashboard tab: base queryset, keyset ordering (ending in a unique
+# column) and the template that renders its rows.
+DASHBOARD_TABLES = {
+    'customers': (
+        Customer.objects.all(),
+        ('id',),
+        'd_autos_app/partials/customer_rows.html',
+    ),
+    'cars': (
+        Car.objects.all(),
+        ('id',),
+        'd_autos_app/partials/car_rows.html',
+    ),
+    'rentals': (
+        Rental.objects.select_related('customer', 'car', 'employee__user'),
+        ('-rental_date', '-id'),
+        'd_autos_app/partials/rental_rows.html',
+    ),
+    'payments': (
+        Payment.objects.select_related('rental__car', 'rental__customer', 'customer'),
+        ('-payment_date', '-id'),
+        'd_autos_app/partials/payment_rows.html',
+    ),
+    'maintenances': (
+        Maintenance.objects.select_related('car', 'employee__user'),
+        ('-scheduled_date', '-id'),
+        'd_autos_app/partials/maintenance_rows.html',
+    ),
+    'reservations': (
+        Reservation.objects.select_related('customer', 'car'),
+        ('-start_date', '-id'),
+        'd_autos_app/partials/reservation_rows.html',
+    ),
+    'employees': (
+        Employee.objects.select_related('user'),
+        ('employee_id',),
+        'd_autos_app/partials/employee_rows.html',
+    ),
+}
+
+ADMIN_ONLY_TABLES = {'employees'}
+
+def dashboard_table_pages(*tables):
+    """
+    First page of each dashboard table, keyed '<table>_page' for the template.
+
+    Pages are read when first rendered, so not at all while the table's
+    cached fragment (fragments.py) is current.
+    """
+    return {
+        f'{table}_page': SimpleLazyObject(partial(keyset_paginate, *DASHBOARD_TABLES[table][:2]))
+        for table in tables
+    }
+
 # ================= DASHBOARD VIEWS =================
 @login_required
 def dashboard(request):
@@ -31,82 +110,72 @@ def dashboard(request):
         # Fallback to admin dashboard
         return admin_dashboard_view(request)
 
+ADMIN_DASHBOARD_TABLES = (
+    'customers', 'cars', 'rentals', 'payments',
+    'maintenances', 'reservations', 'employees',
+)
+EMPLOYEE_DASHBOARD_TABLES = (
+    'customers', 'cars', 'rentals', 'payments',
+    'maintenances', 'reservations',
+)
+
+# The dashboards' reads, shared by the sync and async views
+def recent_customers():
+    return Customer.objects.all().order_by('-id')[:5]
+
+def recent_cars():
+    return Car.objects.all().order_by('-id')[:5]
+
+def recent_available_cars():
+    return Car.objects.filter(availability=True).order_by('-id')[:5]
+
+def recent_rentals():
+    return Rental.objects.select_related('customer', 'car').all().order_by('-rental_date')[:5]
+
+def employee_rentals(employee):
+    return Rental.objects.filter(employee=employee).select_related('customer', 'car').order_by('-rental_date')
+
+def employee_maintenances(employee):
+    return Maintenance.objects.filter(employee=employee).select_related('car').order_by('-scheduled_date')
+
+def admin_dashboard_context(stats, customers, cars, rentals):
+    return {
+        'total_customers': stats.total_customers,
+        'total_cars': stats.total_cars,
+        'total_rentals': stats.total_rentals,
+        'total_revenue': stats.total_revenue,
+
+        'customers': customers,
+        'cars': cars,
+        'rentals': rentals,
+    }
+
+def employee_dashboard_context(stats, employee, rentals, maintenances, customers, cars):
+    return {
+        'total_customers': stats.total_customers,
+        'total_cars': stats.total_cars,
+        'total_rentals': stats.total_rentals,
+        'rentals': rentals,
+        'maintenances': maintenances,
+        'employee': employee,
+        'customers': customers,
+        'cars': cars,
+    }
+
 @login_required
 @user_passes_test(is_admin, login_url='employee_dashboard')
 def admin_dashboard_view(request):
     """Admin dashboard view."""
-    # Summary counts
-    total_customers = Customer.objects.count()
-    total_cars = Car.objects.count()
-    total_rentals = Rental.objects.count()
-    
-    # Calculate total revenue
-    revenue_result = Payment.objects.aggregate(total=Sum('amount'))
-    total_revenue = revenue_result['total'] or Decimal('0.00')
-
-    # Rentals per Car
-    rentals_per_car = (
-        Rental.objects
-        .values('car__brand', 'car__model')
-        .annotate(total=Count('id'))
-    )
-
-    car_labels = [
-        f"{r['car__brand']} {r['car__model']}"
-        for r in rentals_per_car
-    ]
-    car_data = [r['total'] for r in rentals_per_car]
-
-    # Revenue per Month
-    revenue_per_month = (
-        Payment.objects
-        .annotate(month=TruncMonth('payment_date'))
-        .values('month')
-        .annotate(total=Sum('amount'))
-        .order_by('month')
+    # Summary counts (precomputed, see stats.py)
+    context = admin_dashboard_context(
+        get_dashboard_stats(),
+        # Recent items for tables (limit to 5)
+        recent_customers(),
+        recent_cars(),
+        recent_rentals(),
     )
-
-    month_labels = [
-        r['month'].strftime('%b %Y')
-        for r in revenue_per_month
-    ]
-    month_data = [float(r['total'] or 0) for r in revenue_per_month]
-
-    # Recent items for tables (limit to 5)
-    recent_customers = Customer.objects.all().order_by('-id')[:5]
-    recent_cars = Car.objects.all().order_by('-id')[:5]
-    recent_rentals = Rental.objects.select_related('customer', 'car').all().order_by('-rental_date')[:5]
-
-    # All data for tables
-    all_customers = Customer.objects.all()
-    all_cars = Car.objects.all()
-    all_rentals = Rental.objects.select_related('customer', 'car', 'employee').order_by('-rental_date')
-    all_payments = Payment.objects.select_related('rental', 'customer').order_by('-payment_date')
-    all_maintenances = Maintenance.objects.select_related('car', 'employee').order_by('-scheduled_date')
-    all_reservations = Reservation.objects.select_related('customer', 'car').order_by('-start_date')
-    all_employees = Employee.objects.select_related('user').all()
-
-    context = {
-        'total_customers': total_customers,
-        'total_cars': total_cars,
-        'total_rentals': total_rentals,
-        'total_revenue': total_revenue,
-
-        'car_labels': car_labels,
-        'car_data': car_data,
-        'month_labels': month_labels,
-        'month_data': month_data,
-        'customers': recent_customers,
-        'cars': recent_cars,
-        'rentals': recent_rentals,
-        'all_customers': all_customers,
-        'all_cars': all_cars,
-        'all_rentals': all_rentals,
-        'all_payments': all_payments,
-        'all_maintenances': all_maintenances,
-        'all_reservations': all_reservations,
-        'all_employees': all_employees,
-    }
+    # Only the first page of each table; the rest is fetched on demand
+    context.update(dashboard_table_pages(*ADMIN_DASHBOARD_TABLES))
 
     return render(request, 'd_autos_app/dashboard.html', context)
 
@@ -118,66 +187,157 @@ def employee_dashboard_view(request):
         employee = request.user.employee_profile
     except Employee.DoesNotExist:
         employee = None
-    
-    # Summary counts
-    total_customers = Customer.objects.count()
-    total_cars = Car.objects.count()
-    total_rentals = Rental.objects.count()
-
-    # Rentals handled by this employee
-    employee_rentals = []
-    employee_maintenances = []
-    
-    if employee:
-        employee_rentals = Rental.objects.filter(employee=employee).select_related('customer', 'car').order_by('-rental_date')
-        employee_maintenances = Maintenance.objects.filter(employee=employee).select_related('car').order_by('-scheduled_date')
-
-    # Recent items (limit to 5)
-    recent_customers = Customer.objects.all().order_by('-id')[:5]
-    recent_cars = Car.objects.filter(availability=True).order_by('-id')[:5]
-
-    # All data for tables
-    all_customers = Customer.objects.all()
-    all_cars = Car.objects.all()
-    all_rentals = Rental.objects.select_related('customer', 'car', 'employee').order_by('-rental_date')
-    all_payments = Payment.objects.select_related('rental', 'customer').order_by('-payment_date')
-    all_maintenances = Maintenance.objects.select_related('car', 'employee').order_by('-scheduled_date')
-    all_reservations = Reservation.objects.select_related('customer', 'car').order_by('-start_date')
-
-    context = {
-        'total_customers': total_customers,
-        'total_cars': total_cars,
-        'total_rentals': total_rentals,
-        'rentals': employee_rentals,
-        'maintenances': employee_maintenances,
-        'employee': employee,
-        'customers': recent_customers,
-        'cars': recent_cars,
-        'all_customers': all_customers,
-        'all_cars': all_cars,
-        'all_rentals': all_rentals,
-        'all_payments': all_payments,
-        'all_maintenances': all_maintenances,
-        'all_reservations': all_reservations,
-    }
+
+    # Summary counts (precomputed, see stats.py); rentals and maintenance
+    # handled by this employee; recent items (limit to 5)
+    context = employee_dashboard_context(
+        get_dashboard_stats(),
+        employee,
+        employee_rentals(employee) if employee else [],
+        employee_maintenances(employee) if employee else [],
+        recent_customers(),
+        recent_available_cars(),
+    )
+    # Only the first page of each table; the rest is fetched on demand
+    context.update(dashboard_table_pages(*EMPLOYEE_DASHBOARD_TABLES))
 
     return render(request, 'd_autos_app/employee_dashboard.html', context)
 
+# ================= ASYNC DASHBOARD VIEWS =================
+# The same pages for ASGI deployments. The independent reads are started
+# together with asyncio.gather() through the async ORM and the page is
+# rendered once they are all in. Django's async ORM still runs each query
+# through sync_to_async on one thread per request, so the queries do not
+# overlap each other yet; run_benchmarks compares both paths.
+async def _rows(queryset):
+    return [row async for row in queryset]
+
+async def _nothing():
+    return []
+
+async def _table_pages(template_name, tables):
+    # Only the tables whose fragment has to be rendered are read up front;
+    # the rest stay lazy in case their fragment expires before rendering
+    pages = dashboard_table_pages(*tables)
+    cached = fragments.cached_tables(template_name, tables)
+    missing = [table for table in tables if table not in cached]
+    read = await asyncio.gather(*(
+        akeyset_paginate(*DASHBOARD_TABLES[table][:2]) for table in missing
+    ))
+    pages.update((f'{table}_page', page) for table, page in zip(missing, read))
+    return pages
+
+@login_required
+@user_passes_test(is_admin, login_url='employee_dashboard_async')
+async def admin_dashboard_async_view(request):
+    """admin_dashboard_view for ASGI."""
+    *reads, pages = await asyncio.gather(
+        aget_dashboard_stats(),
+        _rows(recent_customers()),
+        _rows(recent_cars()),
+        _rows(recent_rentals()),
+        _table_pages('d_autos_app/dashboard.html', ADMIN_DASHBOARD_TABLES),
+    )
+    context = admin_dashboard_context(*reads)
+    context.update(pages)
+    return await sync_to_async(render)(request, 'd_autos_app/dashboard.html', context)
+
+@login_required
+@user_passes_test(is_employee, login_url='admin_dashboard_async')
+async def employee_dashboard_async_view(request):
+    """employee_dashboard_view for ASGI."""
+    user = await request.auser()
+    # The cached user (principals.py) carries its profile; no query here
+    employee = getattr(user, 'employee_profile', None)
+    *reads, pages = await asyncio.gather(
+        aget_dashboard_stats(),
+        _rows(employee_rentals(employee)) if employee else _nothing(),
+        _rows(employee_maintenances(employee)) if employee else _nothing(),
+        _rows(recent_customers()),
+        _rows(recent_available_cars()),
+        _table_pages('d_autos_app/employee_dashboard.html', EMPLOYEE_DASHBOARD_TABLES),
+    )
+    stats, rentals, maintenances, customers, cars = reads
+    context = employee_dashboard_context(stats, employee, rentals, maintenances, customers, cars)
+    context.update(pages)
+    return await sync_to_async(render)(request, 'd_autos_app/employee_dashboard.html', context)
+
+@login_required
+def dashboard_table(request, table):
+    """Next page of a dashboard table, as rendered rows inside a JSON envelope."""
+    if table not in DASHBOARD_TABLES:
+        raise Http404
+    if table in ADMIN_ONLY_TABLES and not request.user.is_admin:
+        raise Http404
+
+    queryset, ordering, template = DASHBOARD_TABLES[table]
+    try:
+        page = keyset_paginate(queryset, ordering, cursor=request.GET.get('cursor'))
+    except InvalidCursor:
+        return JsonResponse({'error': 'Invalid cursor.'}, status=400)
+
+    return JsonResponse({
+        'html': render_to_string(template, {'rows': page.rows}, request=request),
+        'next_cursor': page.next_cursor,
+    })
+
+@login_required
+@user_passes_test(is_admin)
+def dashboard_fragment_stats(request):
+    """Hits and misses of the cached dashboard tables, as counted in this cache."""
+    return JsonResponse({
+        table: {'hits': hits, 'misses': misses}
+        for table, (hits, misses) in fragments.fragment_counts().items()
+    })
+
+# ================= DASHBOARD CHARTS =================
+# The chart series as JSON, fetched by script.js. With a shared cache,
+# responses carry an ETag and Last-Modified from the charts' table versions
+# (charts.py), so a revalidation that finds nothing changed is a 304
+# without a query. Otherwise another worker may have seen a write this one
+# did not, and the ETag is a hash of the series read from the database.
+@condition(
+    etag_func=lambda request, chart: charts.etag(chart),
+    last_modified_func=lambda request, chart: charts.last_modified(chart),
+)
+def _chart_data(request, chart):
+    return JsonResponse(charts.chart_series(chart))
+
+@login_required
+@cache_control(private=True, no_cache=True)
+def dashboard_chart(request, chart):
+    """One dashboard chart's labels and data."""
+    if chart not in charts.CHARTS:
+        raise Http404
+    if chart in charts.ADMIN_ONLY_CHARTS and not request.user.is_admin:
+        raise Http404
+    if settings.SHARED_CACHE:
+        return _chart_data(request, chart)
+    response = JsonResponse(charts.chart_series(chart))
+    response['ETag'] = charts.content_etag(response.content)
+    return get_conditional_response(request, etag=response['ETag'], response=response)
+
 # ================= CUSTOMER CRUD =================
 @login_required
 def customer_list(request):
-    query = request.GET.get('q')
+    query = request.GET.get('q', '').strip()
     customers = Customer.objects.all()
 
     if query:
-        customers = customers.filter(
-            Q(first_name__icontains=query) |
-            Q(last_name__icontains=query) |
-            Q(email__icontains=query) |
-            Q(license_number__icontains=query)
-        )
+        customers = search_customers(query, queryset=customers)
 
-    return render(request, 'd_autos_app/customer.html', {'customers': customers})
+    return render(request, 'd_autos_app/customer.html', {'customers': customers, 'query': query})
+
+@login_required
+def customer_balances(request):
+    """Customers who owe money, largest balance first, from the ledger."""
+    try:
+        page = keyset_paginate(
+            outstanding_balances(), ('-balance', '-customer_id'), cursor=request.GET.get('cursor')
+        )
+    except InvalidCursor:
+        return HttpResponseBadRequest('Invalid cursor.')
+    return render(request, 'd_autos_app/outstanding_balances.html', {'page': page})
 
 @login_required
 def customer_create(request):
@@ -249,21 +409,42 @@ def car_delete(request, pk):
         return redirect('dashboard')
     return render(request, 'd_autos_app/cars_confirm_delete.html', {'car': car})
 
+@login_required
+def car_availability(request):
+    """Cars free between ?start= and ?end= (ISO dates), and whether ?car= is one of them."""
+    try:
+        start = date.fromisoformat(request.GET.get('start', ''))
+        end = date.fromisoformat(request.GET.get('end', ''))
+    except ValueError:
+        return JsonResponse({'error': 'start and end must be dates (YYYY-MM-DD).'}, status=400)
+    if end < start:
+        return JsonResponse({'error': 'end must not be before start.'}, status=400)
+
+    # Ignore the booking being edited, if any
+    exclude = {}
+    for param, kwarg in (('rental', 'exclude_rental'), ('reservation', 'exclude_reservation')):
+        if request.GET.get(param, '').isdigit():
+            exclude[kwarg] = int(request.GET[param])
+
+    data = {'cars': [{'id': pk, 'label': label} for pk, label in car_choices(start, end, **exclude)]}
+    if request.GET.get('car', '').isdigit():
+        data['available'] = any(car['id'] == int(request.GET['car']) for car in data['cars'])
+    return JsonResponse(data)
+
 # ================= RENTAL CRUD =================
 @login_required
 def rental_list(request):
-    query = request.GET.get('q')
-    rentals = Rental.objects.select_related('customer', 'car', 'employee').all()
+    query = request.GET.get('q', '').strip()
+    rentals = Rental.objects.select_related('customer', 'car', 'employee__user').all()
 
     if query:
-        rentals = rentals.filter(
-            Q(customer__first_name__icontains=query) |
-            Q(customer__last_name__icontains=query) |
-            Q(car__brand__icontains=query) |
-            Q(car__model__icontains=query)
-        )
+        rentals = search_rentals(query, queryset=rentals)
 
-    return render(request, 'd_autos_app/rentals.html', {'rentals': rentals})
+    return render(request, 'd_autos_app/rentals.html', {
+        'rentals': rentals,
+        'query': query,
+        'export_statuses': EXPORTS['rentals'].statuses,
+    })
 
 @login_required
 def rental_create(request):
@@ -275,10 +456,18 @@ def rental_create(request):
             rental.employee = request.user.employee_profile
         except Exception:
             rental.employee = None
-        rental.save()
-        messages.success(request, 'Rental created successfully!')
-        return redirect('dashboard')
-    return render(request, 'd_autos_app/rental_form.html', {'form': form})
+        try:
+            create_rental(rental)
+        except CarUnavailable as exc:
+            # Another agent booked the car between form load and submit
+            form.add_error('car', str(exc))
+        else:
+            messages.success(request, 'Rental created successfully!')
+            return redirect('dashboard')
+    return render(request, 'd_autos_app/rental_form.html', {
+        'form': form,
+        'equipment_rates': equipment_rates(),
+    })
 
 @login_required
 def rental_update(request, pk):
@@ -295,7 +484,10 @@ def rental_update(request, pk):
         updated_rental.save()
         messages.success(request, 'Rental updated successfully!')
         return redirect('dashboard')
-    return render(request, 'd_autos_app/rental_form.html', {'form': form})
+    return render(request, 'd_autos_app/rental_form.html', {
+        'form': form,
+        'equipment_rates': equipment_rates(),
+    })
 
 @login_required
 def rental_delete(request, pk):
@@ -316,11 +508,88 @@ def return_rental(request, pk):
     messages.success(request, 'Rental returned successfully!')
     return redirect('dashboard')
 
+# ================= BULK CHECK-IN =================
+@login_required
+def check_in(request):
+    """End-of-day sheet of active rentals due back by today, returned in one go."""
+    due = list(
+        Rental.objects.select_related('customer', 'car')
+        .filter(status='active', return_date__lte=date.today())
+        .order_by('return_date', 'id')
+    )
+    if request.method == 'POST':
+        formset = CheckInFormSet(request.POST)
+    else:
+        formset = CheckInFormSet(initial=[
+            {'rental': rental.pk, 'actual_return_date': date.today()} for rental in due
+        ])
+
+    if formset.is_valid():
+        forms_by_rental = {
+            form.cleaned_data['rental']: form
+            for form in formset if form.cleaned_data.get('selected')
+        }
+        returns = [
+            (pk, form.cleaned_data['actual_return_date'], form.cleaned_data['mileage'])
+            for pk, form in forms_by_rental.items()
+        ]
+        if not returns:
+            messages.error(request, 'Tick at least one rental to check in.')
+        else:
+            try:
+                check_in_rentals(returns)
+            except CheckInError as exc:
+                for pk, message in exc.errors.items():
+                    forms_by_rental[pk].add_error(None, message)
+            else:
+                messages.success(request, f'Checked in {len(returns)} rental(s).')
+                return redirect('rental_list')
+
+    rentals = {str(rental.pk): rental for rental in due}
+    rows = [(rentals.get(str(form['rental'].value())), form) for form in formset]
+    return render(request, 'd_autos_app/rental_check_in.html', {
+        'formset': formset,
+        'rows': rows,
+    })
+
+@login_required
+def check_in_api(request):
+    """
+    POST {"returns": [{"rental": id, "actual_return_date": "YYYY-MM-DD",
+    "mileage": km or null}, ...]}: all rows are checked in, or none are.
+    """
+    if request.method != 'POST':
+        return JsonResponse({'error': 'POST a JSON body.'}, status=405)
+    try:
+        rows = json.loads(request.body)['returns']
+        returns = [
+            (
+                int(row['rental']),
+                date.fromisoformat(row['actual_return_date']),
+                None if row.get('mileage') is None else int(row['mileage']),
+            )
+            for row in rows
+        ]
+    except (ValueError, TypeError, KeyError):
+        return JsonResponse({
+            'error': 'Expected {"returns": [{"rental", "actual_return_date", "mileage"}]}.',
+        }, status=400)
+    if len({pk for pk, day, mileage in returns}) != len(returns):
+        return JsonResponse({'error': 'A rental is listed more than once.'}, status=400)
+    try:
+        returned = check_in_rentals(returns)
+    except CheckInError as exc:
+        return JsonResponse({'errors': {str(pk): message for pk, message in exc.errors.items()}}, status=400)
+    return JsonResponse({'returned': [rental.pk for rental in returned]})
+
 # ================= PAYMENT CRUD =================
 @login_required
 def payment_list(request):
-    payments = Payment.objects.select_related('rental', 'customer')
-    return render(request, 'd_autos_app/payments.html', {'payments': payments})
+    payments = Payment.objects.select_related('rental__car', 'rental__customer', 'customer')
+    return render(request, 'd_autos_app/payments.html', {
+        'payments': payments,
+        'export_statuses': EXPORTS['payments'].statuses,
+    })
 
 @login_required
 def payment_create(request):
@@ -410,12 +679,38 @@ def reservation_delete(request, pk):
 # ================= MAINTENANCE CRUD =================
 @login_required
 def maintenance_list(request):
-    maintenances = Maintenance.objects.select_related('car', 'employee')
-    return render(request, 'd_autos_app/maintenances.html', {'maintenances': maintenances})
+    maintenances = Maintenance.objects.select_related('car', 'employee__user')
+    return render(request, 'd_autos_app/maintenances.html', {
+        'maintenances': maintenances,
+        'export_statuses': EXPORTS['maintenances'].statuses,
+    })
+
+@login_required
+def maintenance_due(request):
+    """Cars due for service within ?days= days or ?km= kilometres, most urgent first."""
+    days = int(request.GET['days']) if request.GET.get('days', '').isdigit() else SERVICE_DUE_DAYS
+    km = int(request.GET['km']) if request.GET.get('km', '').isdigit() else SERVICE_DUE_KM
+    try:
+        check_horizon(days, km)
+    except ValueError as exc:
+        return HttpResponseBadRequest(str(exc))
+    try:
+        page = keyset_paginate(
+            service_queue(days, km), QUEUE_ORDERING, cursor=request.GET.get('cursor')
+        )
+    except InvalidCursor:
+        return HttpResponseBadRequest('Invalid cursor.')
+    return render(request, 'd_autos_app/service_due.html', {
+        'page': page,
+        'days': days,
+        'km': km,
+        'overdue_count': overdue_maintenances().count(),
+    })
 
 @login_required
 def maintenance_create(request):
-    form = MaintenanceForm(request.POST or None)
+    # ?car= preselects the car, e.g. from the service due list
+    form = MaintenanceForm(request.POST or None, initial={'car': request.GET.get('car')})
     if form.is_valid():
         form.save()
         messages.success(request, 'Maintenance scheduled successfully!')
@@ -573,6 +868,116 @@ def employee_reset_password(request, pk):
     
     return redirect('dashboard')
 
+# ================= ANALYTICS =================
+@login_required
+@user_passes_test(is_admin)
+def revenue_analytics(request):
+    """
+    Revenue from the pre-aggregated cube: ?period=day|week|month,
+    ?dimension=all|car|brand|fuel_type|payment_method|employee, optional
+    ?start= and ?end= (ISO dates).
+    """
+    period = request.GET.get('period', 'month')
+    dimension = request.GET.get('dimension', 'all')
+    try:
+        start = date.fromisoformat(request.GET['start']) if request.GET.get('start') else None
+        end = date.fromisoformat(request.GET['end']) if request.GET.get('end') else None
+        rows = revenue_series(period, dimension, start, end)
+    except ValueError as exc:
+        return JsonResponse({'error': str(exc)}, status=400)
+    return JsonResponse({'period': period, 'dimension': dimension, 'rows': rows})
+
+# ================= CSV EXPORT =================
+@login_required
+def export_csv(request, table):
+    """Stream ``table`` as CSV, filtered by ?start=, ?end= (ISO dates) and ?status=."""
+    export = EXPORTS.get(table)
+    if export is None:
+        raise Http404('Unknown export')
+    try:
+        start = date.fromisoformat(request.GET['start']) if request.GET.get('start') else None
+        end = date.fromisoformat(request.GET['end']) if request.GET.get('end') else None
+    except ValueError:
+        return HttpResponseBadRequest('start and end must be dates (YYYY-MM-DD).')
+    status = request.GET.get('status') or None
+    if status is not None and status not in dict(export.statuses):
+        return HttpResponseBadRequest(f'Unknown status "{status}".')
+
+    filename = '-'.join(str(part) for part in (table, start, end, status) if part)
+    return StreamingHttpResponse(
+        export.stream(start, end, status),
+        content_type='text/csv',
+        headers={'Content-Disposition': f'attachment; filename="{filename}.csv"'},
+    )
+
+# ================= BULK IMPORT =================
+# Problems shown on the page; the commands can report every one
+MAX_REPORTED_IMPORT_ERRORS = 500
+
+@login_required
+@user_passes_test(is_admin)
+def import_data(request):
+    form = ImportUploadForm(request.POST or None, request.FILES or None)
+    result = None
+    errors = []
+    errors_truncated = False
+
+    if form.is_valid():
+        def on_error(line, row_errors):
+            nonlocal errors_truncated
+            for field, message in error_messages(row_errors):
+                if len(errors) < MAX_REPORTED_IMPORT_ERRORS:
+                    errors.append((line, field, message))
+                else:
+                    errors_truncated = True
+
+        upload = form.cleaned_data['file']
+        try:
+            result = import_file(form.cleaned_data['kind'], upload, upload.name, on_error=on_error)
+        except ImportFileError as exc:
+            form.add_error('file', str(exc))
+        else:
+            messages.success(request, f'Imported {result.created} row(s).')
+
+    return render(request, 'd_autos_app/import_form.html', {
+        'form': form,
+        'result': result,
+        'errors': errors,
+        'errors_truncated': errors_truncated,
+    })
+
+# ================= PAYMENT RECONCILIATION =================
+@login_required
+@user_passes_test(is_admin)
+def reconcile_payments(request):
+    form = StatementUploadForm(request.POST or None, request.FILES or None)
+    result = None
+    problems = []
+    problems_truncated = False
+
+    if form.is_valid():
+        def on_problem(line, transaction_id, message):
+            nonlocal problems_truncated
+            if len(problems) < MAX_REPORTED_IMPORT_ERRORS:
+                problems.append((line, transaction_id, message))
+            else:
+                problems_truncated = True
+
+        upload = form.cleaned_data['file']
+        try:
+            result = reconcile_file(upload, upload.name, on_problem=on_problem)
+        except ImportFileError as exc:
+            form.add_error('file', str(exc))
+        else:
+            messages.success(request, f'Marked {result.matched} payment(s) paid.')
+
+    return render(request, 'd_autos_app/payment_reconcile.html', {
+        'form': form,
+        'result': result,
+        'problems': problems,
+        'problems_truncated': problems_truncated,
+    })
+
 @login_required
 def logout_view(request):
     """Handle user logout."""
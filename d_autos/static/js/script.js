@@ -938,4 +938,122 @@ document.addEventListener('DOMContentLoaded', function() {
             });
         });
     }
-});
\ No newline at end of file
+});
+
+// ================= DASHBOARD TABLE PAGINATION =================
+document.addEventListener('DOMContentLoaded', function() {
+    // Dashboard tables only render their first page; "Load more" appends the next one
+    document.querySelectorAll('.load-more').forEach(button => {
+        button.addEventListener('click', function() {
+            const tbody = this.closest('.table-section').querySelector('tbody');
+            const url = this.dataset.url + '?cursor=' + encodeURIComponent(this.dataset.cursor);
+
+            this.disabled = true;
+            fetch(url, { headers: { 'X-Requested-With': 'XMLHttpRequest' } })
+                .then(response => response.json())
+                .then(data => {
+                    tbody.insertAdjacentHTML('beforeend', data.html);
+                    if (data.next_cursor) {
+                        this.dataset.cursor = data.next_cursor;
+                        this.disabled = false;
+                    } else {
+                        this.remove();
+                    }
+                })
+                .catch(() => {
+                    this.disabled = false;
+                });
+        });
+    });
+});
+
+// ================= DASHBOARD CHARTS =================
+// Chart series come from the dashboard_chart endpoints. The last response
+// is kept in localStorage with its ETag and revalidated on every visit:
+// the server answers 304 without touching the database until a rental,
+// payment or car changes.
+function fetchChartData(url) {
+    const key = 'chart:' + url;
+    let cached = null;
+    try {
+        cached = JSON.parse(localStorage.getItem(key));
+    } catch (e) {
+        cached = null;
+    }
+
+    const headers = { 'X-Requested-With': 'XMLHttpRequest' };
+    if (cached && cached.etag) {
+        headers['If-None-Match'] = cached.etag;
+    }
+    // no-store: the 304 comes back to us instead of being resolved by the browser cache
+    return fetch(url, { headers: headers, cache: 'no-store' }).then(response => {
+        if (response.status === 304 && cached) {
+            return cached.data;
+        }
+        if (!response.ok) {
+            throw new Error('Chart data unavailable');
+        }
+        const etag = response.headers.get('ETag');
+        return response.json().then(data => {
+            try {
+                localStorage.setItem(key, JSON.stringify({ etag: etag, data: data }));
+            } catch (e) {
+                // Storage full or disabled; the chart still draws
+            }
+            return data;
+        });
+    });
+}
+
+const CHART_OPTIONS = {
+    rentalsChart: series => ({
+        type: 'bar',
+        data: {
+            labels: series.labels,
+            datasets: [{
+                label: 'Number of Rentals',
+                data: series.data,
+                backgroundColor: '#3498db'
+            }]
+        },
+        options: {
+            responsive: true,
+            plugins: {
+                legend: {
+                    display: false
+                }
+            }
+        }
+    }),
+    revenueChart: series => ({
+        type: 'line',
+        data: {
+            labels: series.labels,
+            datasets: [{
+                label: 'Revenue (₵)',
+                data: series.data,
+                borderColor: '#27ae60',
+                backgroundColor: 'rgba(39, 174, 96, 0.1)',
+                fill: true
+            }]
+        },
+        options: {
+            responsive: true
+        }
+    })
+};
+
+document.addEventListener('DOMContentLoaded', function() {
+    if (typeof Chart === 'undefined') {
+        return;
+    }
+    Object.keys(CHART_OPTIONS).forEach(id => {
+        const canvas = document.getElementById(id);
+        if (!canvas || !canvas.dataset.url) {
+            return;
+        }
+        fetchChartData(canvas.dataset.url)
+            .then(series => new Chart(canvas, CHART_OPTIONS[id](series)))
+            .catch(() => {});
+    });
+});